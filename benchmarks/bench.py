@@ -0,0 +1,372 @@
+'''
+Benchmarks for gcody with synthetic GCODE and STL files
+
+Usage:
+
+    python benchmarks/bench.py                            # 10k, 100k and 1M lines
+    python benchmarks/bench.py --sizes 10000 10000000     # any sizes
+    python benchmarks/bench.py --update                   # store results as the baseline
+    python benchmarks/bench.py --threshold 0.25           # fail if 25% slower than baseline
+    python benchmarks/bench.py --programs koch --repeat 9 # one program, median of 9 runs
+    python benchmarks/bench.py --lod-sizes 5000000        # level of detail on longer paths
+
+Every case is timed on its own five times by default, keeping the median run,
+and then run again under tracemalloc for its peak memory. The level of detail
+reduction the viewers use is also timed on its own for paths of millions of
+points. Results are written to JSON and compared to the baseline. Cases that
+look slower are run again, and the script exits with status 1 if any case is
+still beyond the threshold.
+'''
+
+# imports ----------------------------------------------------------------------------
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+import numpy as np
+
+# running from a checkout without installing gcody
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gcody
+from gcody.lod import decimate
+from gcody.raster import colormap
+
+
+# directory of this file, where the baseline is stored
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+
+## ----------------------------------------------------------------------------------------
+## synthetic programs. each returns an array of positions with shape (n,3)
+
+
+# back and forth rows that step up a layer when the square is filled
+def serpentine(n, size=200, spacing=0.4, layer=0.2, seed=0):
+
+    # points per row and rows per layer
+    rows = int(size/spacing)
+    i = np.arange(n)
+    row = i // 2
+    x = np.where((row % 2 == 0) == (i % 2 == 0), 0, size)
+    y = (row % rows) * spacing
+    z = (row // rows + 1) * layer
+
+    return np.column_stack((x, y, z)).astype(float)
+
+
+# outward spiral with a layer for every turn
+def spiral(n, radius=100, turns=100, layer=0.2, seed=0):
+
+    theta = np.linspace(0, 2*np.pi*turns, n)
+    r = radius * (theta / theta[-1] if n > 1 else theta)
+
+    return np.column_stack((r*np.cos(theta), r*np.sin(theta),
+                            layer*theta/(2*np.pi)))
+
+
+# random touch probe points as in natural_touch.py. every touch is approach,
+# touch, retreat so three lines per point
+def probe(n, lim=(20, 80, 80), touch=(10, 15, 20), seed=0):
+
+    rng = np.random.default_rng(seed)
+    m = n // 3 + 1
+
+    points = np.column_stack((rng.choice(touch, m),
+                              np.round(rng.uniform(0, lim[1], m), 3),
+                              np.round(rng.uniform(0, lim[2], m), 3)))
+
+    # approach from x = 0, touch, and back to x = 0
+    away = points.copy()
+    away[:, 0] = 0
+    path = np.stack((away, points, away), axis=1).reshape(-1, 3)
+
+    return path[:n]
+
+
+# koch fractal from koch_demo.py, repeated in layers
+def koch(n, order=None, size=500, angle=85, tear_angle=170, layer=1, seed=0):
+
+    # smallest order with enough segments for a single layer, within reason
+    if order is None:
+        order = min(max(int(np.ceil(np.log(max(n, 1))/np.log(4))), 1), 8)
+
+    # turns between the segments of one side, built by the recursion in koch_demo.py
+    turns = np.zeros(0)
+    for _ in range(order):
+        turns = np.concatenate((turns, [angle], turns, [360 - tear_angle],
+                                turns, [angle], turns, [0]))
+
+    # three sides per layer with a clockwise turn between them
+    side = np.concatenate((turns, [-120]))
+    heading = np.cumsum(np.concatenate(([0], np.tile(side, 3)[:-1])))
+    step = size / 3**order
+    xy = np.cumsum(step*np.column_stack((np.cos(np.deg2rad(heading)),
+                                         np.sin(np.deg2rad(heading)))), axis=0)
+
+    # stacking layers until there are n points
+    layers = int(np.ceil(n / len(xy)))
+    z = np.repeat(np.arange(layers)*layer, len(xy))
+
+    return np.column_stack((np.tile(xy, (layers, 1)), z))[:n]
+
+
+# the synthetic programs by name
+PROGRAMS = {'serpentine':serpentine, 'spiral':spiral, 'probe':probe, 'koch':koch}
+
+
+
+## ----------------------------------------------------------------------------------------
+## writing synthetic files
+
+
+# writes positions as G1 lines with a speed on the first line
+def write_gcode(file, points, speed=6000):
+
+    with open(file, 'w') as f:
+        f.write('G1 X0.0000 Y0.0000 Z0.0000 F{} \n'.format(speed))
+        np.savetxt(f, points, fmt='G1 X%.4f Y%.4f Z%.4f ')
+
+    return file
+
+
+# writes n random triangles to a binary STL file
+def write_stl(file, n, seed=0):
+
+    rng = np.random.default_rng(seed)
+
+    data = np.zeros(n, dtype=np.dtype([('normals', np.float32, (3,)),
+                                       ('vectors', np.float32, (3, 3)),
+                                       ('attr', np.uint16, (1,))]))
+    data['vectors'] = rng.uniform(0, 100, (n, 3, 3))
+
+    with open(file, 'wb') as f:
+        f.write(b'gcody benchmark'.ljust(80, b' '))
+        f.write(np.uint32(n).tobytes())
+        data.tofile(f)
+
+    return file
+
+
+
+## ----------------------------------------------------------------------------------------
+## cases. each takes the prepared inputs and returns nothing
+
+
+# reading a GCODE file
+def case_read(inputs):
+    inputs['code'] = gcody.read(inputs['file'])
+
+
+# batch move of all positions into a new gcode object
+def case_move(inputs):
+    g = gcody.gcode()
+    g.move(0, 0, 0, speed=100)
+    g.move(inputs['points'])
+
+
+# saving the read gcode object
+def case_save(inputs):
+    inputs['code'].save(os.path.join(inputs['dir'], 'saved.gcode'))
+
+
+# loading an STL file
+def case_stl(inputs):
+    gcody.readstl(inputs['stl'])
+
+
+# data the viewers need before drawing: the level of detail of the positions
+# and times, their colors in time and the axis limits
+def case_view_prep(inputs):
+    code = inputs['code']
+    history, t = code.lod(cached=False)
+    colormap('jet')[(255*t/max(t[-1], 1e-300)).astype(np.intp)]
+    code.stats
+
+
+# reducing the path to the level of detail budget of the viewers
+def case_lod(inputs):
+    decimate(inputs['points'], gcody.gsettings().lod)
+
+
+# cases in the order they run. read has to be first to fill inputs['code']
+CASES = [('read', case_read), ('move', case_move), ('save', case_save),
+         ('stl', case_stl), ('view_prep', case_view_prep), ('lod', case_lod)]
+
+
+
+## ----------------------------------------------------------------------------------------
+## running
+
+
+# runs func, returning the median seconds taken and the peak memory in bytes
+def measure(func, inputs, memory=True, repeat=5):
+
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func(inputs)
+        times.append(perf_counter() - start)
+    seconds = float(np.median(times))
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        func(inputs)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return seconds, peak
+
+
+# runs every case for every program and size
+def run(sizes, programs, memory=True, repeat=5, seed=0, verbose=True, lod_sizes=()):
+
+    results = {}
+
+    # prints a result as it comes
+    def report(key, seconds, peak):
+        if verbose:
+            print('{:<32}{:>12.4f} s{:>14}'.format(
+                key, seconds, '' if peak is None else '{:.1f} MB'.format(peak/1e6)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in programs:
+            for n in sizes:
+
+                # preparing the synthetic inputs
+                points = PROGRAMS[name](n, seed=seed)
+                inputs = {'dir':tmp, 'points':points,
+                          'file':write_gcode(os.path.join(tmp, name + '.gcode'), points),
+                          'stl':write_stl(os.path.join(tmp, 'mesh.stl'), max(n // 10, 1), seed)}
+
+                for case, func in CASES:
+                    key = '{}/{}/{}'.format(case, name, n)
+                    seconds, peak = measure(func, inputs, memory, repeat)
+                    results[key] = {'seconds':seconds, 'peak_bytes':peak}
+                    report(key, seconds, peak)
+
+            # level of detail alone on paths too long to write as files
+            for n in lod_sizes:
+                key = 'lod/{}/{}'.format(name, n)
+                seconds, peak = measure(case_lod, {'points':PROGRAMS[name](n, seed=seed)},
+                                        memory, repeat)
+                results[key] = {'seconds':seconds, 'peak_bytes':peak}
+                report(key, seconds, peak)
+
+    return results
+
+
+# differences smaller than these are noise, whatever the threshold. cases that
+# take a few milliseconds vary by that much between runs
+FLOOR = {'seconds':0.02, 'peak_bytes':262144}
+
+
+# compares results with the baseline and returns the key, field, old and new
+# value of every regression
+def compare(results, baseline, threshold):
+
+    regressed = []
+
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+
+        old = baseline[key]
+        for field in ['seconds', 'peak_bytes']:
+            if result[field] is None or old.get(field) is None:
+                continue
+            if (result[field] > old[field] * (1 + threshold)
+                    and result[field] - old[field] > FLOOR[field]):
+                regressed.append((key, field, old[field], result[field]))
+
+    return regressed
+
+
+# runs the programs and sizes of the given keys again, keeping the better of the
+# old and new result of every case. a machine that was busy for a moment makes
+# a single case look slower, a real regression stays slower when it is rerun
+def rerun(results, keys, memory=True, repeat=5, seed=0):
+
+    for key in sorted(set(keys)):
+        case, name, n = key.split('/')
+
+        # the level of detail alone, or every case of the program and size
+        if case == 'lod' and 'read/{}/{}'.format(name, n) not in results:
+            again = run([], [name], memory, repeat, seed, False, [int(n)])
+        else:
+            again = run([int(n)], [name], memory, repeat, seed, False)
+
+        for field in ['seconds', 'peak_bytes']:
+            if results[key][field] is not None and again[key][field] is not None:
+                results[key][field] = min(results[key][field], again[key][field])
+
+    return results
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='number of lines in each synthetic program')
+    parser.add_argument('--lod-sizes', type=int, nargs='*', default=[2000000],
+                        help='number of points of the paths the level of detail is timed on')
+    parser.add_argument('--programs', nargs='+', default=list(PROGRAMS),
+                        choices=list(PROGRAMS), help='synthetic programs to run')
+    parser.add_argument('--out', default='bench_output.json', help='file to write results to')
+    parser.add_argument('--baseline', default=os.path.join(HERE, 'baseline.json'),
+                        help='results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed fraction slower or larger than the baseline')
+    parser.add_argument('--update', action='store_true', help='store the results as the baseline')
+    parser.add_argument('--repeat', type=int, default=5, help='take the median of this many runs')
+    parser.add_argument('--confirm', type=int, default=3,
+                        help='times a regressed case is run again before it counts')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc runs')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.programs, not args.no_memory, args.repeat, args.seed,
+                  lod_sizes=args.lod_sizes)
+
+    output = {'python':platform.python_version(), 'numpy':np.__version__,
+              'machine':platform.machine(), 'results':results}
+    with open(args.out, 'w') as f:
+        json.dump(output, f, indent=2)
+
+    if args.update:
+        with open(args.baseline, 'w') as f:
+            json.dump(output, f, indent=2)
+        return 0
+
+    # comparing to the stored baseline
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+        # confirming the regressions before failing
+        regressed = compare(results, baseline, args.threshold)
+        for _ in range(args.confirm):
+            if not regressed:
+                break
+            results = rerun(results, [key for key, *_ in regressed], not args.no_memory,
+                            args.repeat, args.seed)
+            regressed = compare(results, baseline, args.threshold)
+
+        if regressed:
+            print('\nRegressed beyond {:.0%}:'.format(args.threshold))
+            for key, field, old, new in regressed:
+                print('{} {}: {:.4g} -> {:.4g}'.format(key, field, old, new))
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
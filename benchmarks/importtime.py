@@ -0,0 +1,106 @@
+'''
+Checks the cold start of gcody for short lived headless worker processes
+
+Usage:
+
+    python benchmarks/importtime.py                 # default budget of 0.25 s
+    python benchmarks/importtime.py --budget 0.2    # any budget in seconds
+
+The import of gcody is measured with python -X importtime in fresh processes
+and the best of several runs is compared with the budget. A headless workflow
+of reading, saving, timing and comparing GCODE is then run to check that it
+never imports matplotlib. Exits with status 1 if either check fails.
+'''
+
+# imports ----------------------------------------------------------------------------
+import argparse
+import os
+import subprocess
+import sys
+
+
+# root of the repository so gcody is imported from this checkout
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# a headless workflow that must not load any plotting library
+WORKFLOW = '''
+import sys, gcody
+g = gcody.read({file!r})
+g.save({out!r})
+g.time(printit=False)
+g.material(printit=False)
+g.stats
+gcody.gdiff(g, g)
+loaded = [m for m in sys.modules if m.split('.')[0] in ('matplotlib', 'mpl_toolkits', 'mayavi')]
+print('loaded:' + ','.join(loaded))
+'''
+
+
+# seconds to import a module in a fresh process, from python -X importtime
+def import_seconds(module='gcody'):
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+
+    # lines are 'import time: self [us] | cumulative | imported package'
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e6
+
+    raise RuntimeError('{} not found in the importtime output'.format(module))
+
+
+# modules of plotting libraries loaded by the headless workflow
+def workflow_plotting_modules(file, out):
+
+    code = WORKFLOW.format(file=file, out=out)
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+
+    # the last line is the modules, other lines are printed by the workflow
+    loaded = result.stdout.strip().splitlines()[-1][len('loaded:'):]
+    return [m for m in loaded.split(',') if m]
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--budget', type=float, default=0.25,
+                        help='seconds allowed for import gcody')
+    parser.add_argument('--runs', type=int, default=5, help='take the best of this many runs')
+    parser.add_argument('--file', default=os.path.join(ROOT, 'ten.gcode'),
+                        help='GCODE file for the headless workflow')
+    args = parser.parse_args(argv)
+
+    failed = False
+
+    # import time of gcody and of numpy, which it needs
+    total = min(import_seconds('gcody') for _ in range(args.runs))
+    numpy = min(import_seconds('numpy') for _ in range(args.runs))
+    print('import gcody: {:.3f} s ({:.3f} s of it numpy), budget {:.3f} s'.format(
+        total, numpy, args.budget))
+
+    if total > args.budget:
+        print('import time is over budget')
+        failed = True
+
+    # headless workflow
+    out = os.path.join(ROOT, 'bench_output.gcode')
+    try:
+        loaded = workflow_plotting_modules(args.file, out)
+    finally:
+        if os.path.exists(out):
+            os.remove(out)
+
+    if loaded:
+        print('headless workflow imported: ' + ', '.join(sorted(loaded)))
+        failed = True
+    else:
+        print('headless workflow imported no plotting libraries')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
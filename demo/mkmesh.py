@@ -1,48 +1,31 @@
-
 # getting imports
-from gcody import gcode, read
-from stlview import viewmesh
-from scipy.spatial import Delaunay
-from numpy import array
-
-
-def surfg_np(file, **kwargs):
-
-    # reading the gcode file
-    gcode_obj = read(file)
-
-    # converting to a numpy array
-    data = array(gcode_obj.history)
-
-    # running Delaunary algorithm for triangulation
-    tri = Delaunay(data[:,0:2])
-
-    # viewing the generated mesh
-    viewmesh(data[:,0], data[:,1], data[:,2],
-             tri.simplices, backend='mayavi', **kwargs)
-
-    return
+from gcody import read, viewmesh, writestl
 
 
 # plotting the surface from gcode
-def surfg(file, **kwargs):
+def surfg(file, grid=None, reduce='mean', save_file=None, **kwargs):
+    '''
+    Parameters:
+
+    > FILE: the gcode file, such as the points of a touch probe
+    > GRID, REDUCE: see gcody surface. Points that are not on a lattice need
+        GRID without scipy
+    > SAVE_FILE: if given, the surface is saved to this binary stl file
+    '''
 
     # reading the gcode file
     gcode_obj = read(file)
-    
-    #getting points from gcode_object
-    points = [[i[0], i[1]] for i in gcode_obj.history]
-    x = [i[0] for i in gcode_obj.history]
-    y = [i[1] for i in gcode_obj.history]
-    z = [i[2] for i in gcode_obj.history]
 
-    # running Delaunary algorithm for triangulation
-    tri = Delaunay(points)
+    # triangulating the height surface from the motion history
+    mesh = gcode_obj.surface(grid=grid, reduce=reduce)
+
+    if save_file:
+        writestl(save_file, mesh)
 
     # viewing the generated mesh
-    viewmesh(x, y, z, tri.simplices, backend='mayavi', **kwargs)
+    viewmesh(mesh, **kwargs)
 
-    return
+    return mesh
 
 
 
@@ -53,25 +36,5 @@ def surfg(file, **kwargs):
 # input file
 file = 'elefante_small.gcode'
 
-# viewing the gcode
-surfg(file)
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+# viewing the top surface of the gcode, resampled to a 200 by 200 grid
+surfg(file, grid=200, reduce='max', save_file='elefante_surface.stl')
@@ -5,6 +5,14 @@
 from .gsettings import gsettings
 from .gcode import gcode
 from .readg import read
-from .stl import readstl, viewstl, viewmesh
+from .stl import readstl, writestl, viewstl, viewmesh, stlmap
+from .gmesh import gmesh, readmesh
+from .zindex import zindex
+from .metrics import meshstats
+from .surface import surface
+from .slicer import slice_mesh, gslice
+from .gdiff import gdiff
+from .gprofile import gprofile
+from .render import render_dir
 
 
@@ -5,9 +5,18 @@ Class gcode written by Ryan Zambrotta
 # imports -----------------------------------------------------------------------
 from .gline import gline
 from .gsettings import gsettings
+from .gprofile import gprofile, active
+from .lod import decimate
+from .render import render, thumbnail_block, THUMBNAIL_SIZES
+from .heatmap import density, heat_image, PLANES
+from .raster import rasterize
+from .webview import export_html
+from .infill import rectilinear, write_lines
+from .surface import surface
 from .helper import *
-from .visual import *
-from numpy import array, zeros, any, all, shape
+# visual.py is imported by the viewing methods so matplotlib is only loaded when needed
+from numpy import (array, zeros, any, all, shape, diff, where, errstate, linspace,
+                   searchsorted, concatenate, unique)
 from numpy.linalg import norm
 
 
@@ -15,13 +24,15 @@ from numpy.linalg import norm
 # represents and stores all information of a path and constructs the GCODE 
 class gcode():
 
-    def __init__(self, debug_mode=False, settings=None):
+    def __init__(self, debug_mode=False, settings=None, profile=None):
         '''
         Parameters:
 
         > DEBUG_MOVE: This causes nothing to be saved internally. It is automatically
         > SETTINGS: This is a gsettings object that that contains a dictionary
             of strings to format numbers for specific gcode commands
+        > PROFILE: True or a gprofile object to time reading, writing and saving.
+            Defaults to the gprofile of an enclosing with block, if any
         '''
 
         # settings
@@ -67,13 +78,36 @@ class gcode():
         # recording the print speed
         self.print_speed = 0
 
+        # sets the default extrusion mode (absolute extrusion, M82)
+        self.extrude_mode = 'abs'
+
+        # position of the extruder axis as the printer sees it. G92 E resets this
+        self.current_e = 0
+
+        # internal recording of the total filament fed, unaffected by G92 resets
+        self.filament = 0 # units of unit_sys
+
+        # internal recording of the filament fed at each motion
+        self.e = []
+
+        # running totals updated with each motion. see the stats property
+        self._length = 0
+        self._travel = 0
+        self._opcodes = {}
+
+        # the last positions and times decimated for the viewers
+        self._lod_cache = (None, None)
+
+        # the last bounds and mean of history, found when stats is asked for
+        self._bounds_cache = (None, None)
+
         # Contains names of all the method in GCODE
         self.gcode_methods = {'G0':self.rapid_move,'G1':self.move,'G4':self.dwell,
                               'G10':self.retract,'G11':self.unretract,
                               'G20':self.use_in,'G21':self.use_mm,'G28':self.go_home,
                               'G90':self.abs_move,'G91':self.rel_move,'G92':self.set_pos,
                               'M30':self.manual_mask_off,
-                              'M82':self.rel_extrude,'M83':self.abs_extrude,'M84':self.stop_idle,
+                              'M82':self.abs_extrude,'M83':self.rel_extrude,'M84':self.stop_idle,
                               'M103':self.stop_extrude,'M104':self.extruders_off,
                               'M106':self.fan,
                               'M107':self.fan_off,'M190':self.wait_for_temp,'M721':self.unprime,
@@ -81,6 +115,23 @@ class gcode():
                               'M756':self.first_layer_thick,'M790':self.new_layer,
                               ';':self.comment,'\n':self.blank}
 
+        # profiling. nothing is wrapped when this is off
+        if profile is None:
+            profile = active() # from gprofile.py
+        elif profile is True:
+            profile = gprofile()
+
+        if profile:
+            profile.attach(self)
+            self.profile = profile
+        else:
+            self.profile = None
+
+            # calling gline and the formatting of settings directly, without the
+            # methods that only exist to be timed on their own
+            self._gline = gline
+            self._format = self.settings.format
+
         # end of init
         return
 
@@ -108,8 +159,11 @@ class gcode():
         > Z: the z coordinate to move the print head to. Behaves the same as X except for
             that only arrays of shape (n,) can be passed.
         > SPEED: The speed to move the print head for this motion. This input should
-            be in the same units as the attribute UNIT_SYS
-        > EXTRUDE: The volume to extrude for this motion.... NEED MORE HERE
+            be in the same units as the attribute UNIT_SYS. With arrays of positions,
+            SPEED can also be an array of shape (n,) with the speed of every motion
+        > EXTRUDE: The volume to extrude for this motion.... NEED MORE HERE. With arrays
+            of positions, EXTRUDE can also be an array of shape (n,) with the E word of
+            every motion
         > CHECK_END: determines whether the printer checks if an endstop was hit. Default
             to '0'. Options are '0', '1','2'. '1' makes printer check. '2' is more
         > COM: The comment to be added at the end of the lines
@@ -155,7 +209,7 @@ class gcode():
         if isinstance(x,(int,float)) or isinstance(y,(int,float)) or isinstance(z,(int,float)):
 
             # creating line of GCODE
-            line = gline('G1', com)
+            line = self._gline('G1', com)
 
             # calling hidden function to do the string formatting
             # This command writes the gcode line to memory
@@ -169,7 +223,7 @@ class gcode():
         elif all(x == None) and all(y == None) and all(z == None):
 
             # Creating line of gcode
-            line = gline('G1', com)
+            line = self._gline('G1', com)
 
             # writing only speed and extrude
             self._move_format(line, speed=speed, extrude=extrude)
@@ -178,15 +232,21 @@ class gcode():
             # array case
             if len(x) == len(y) and len(x) == len(z):
 
+                # one E word and speed for every motion or the same for all of them
+                each = len(shape(extrude)) == 1 # numpy
+                each_speed = len(shape(speed)) == 1 # numpy
+
                 # Creating GCODE line for all row in x
                 for i in range(len(x)):
 
                     # creating line of GCODE
-                    line = gline('G1', com)
+                    line = self._gline('G1', com)
 
                     # calling hidden function to do the string formatting
                     # This command writes the gcode line to memory
-                    self._move_format(line,pos,x[i],y[i],z[i],speed,extrude)
+                    self._move_format(line,pos,x[i],y[i],z[i],
+                                      speed[i] if each_speed else speed,
+                                      extrude[i] if each else extrude)
 
                 return
     # end of move
@@ -240,7 +300,7 @@ class gcode():
         if isinstance(x,(int,float)) or isinstance(y,(int,float)) or isinstance(z,(int,float)):
 
             # creating an empty line of GCODE
-            line = gline()
+            line = self._gline()
 
             # calling hidden function to do the string formatting
             # this writes this to memory
@@ -257,7 +317,7 @@ class gcode():
                 for i in range(len(x)):
 
                     # creating line of GCODE
-                    line = gline()
+                    line = self._gline()
 
                     # calling hidden function to do the string formatting
                     self._move_format(line,pos,x[i],y[i],z[i])
@@ -314,7 +374,7 @@ class gcode():
         if isinstance(x,(int,float)) or isinstance(y,(int,float)) or isinstance(z,(int,float)):
 
             # creating line of GCODE
-            line = gline('G1', com)
+            line = self._gline('G1', com)
 
             # calling hidden function to do the string formatting
             # which also writes to memory
@@ -330,7 +390,7 @@ class gcode():
                 for i in range(len(x)):
 
                     # creating line of GCODE
-                    line = gline('G1', com)
+                    line = self._gline('G1', com)
 
                     # calling hidden function to do the string formatting
                     self._move_format(line,pos,
@@ -359,7 +419,7 @@ class gcode():
         '''
 
         # creating GCODE command
-        line = gline('G4',com)
+        line = self._gline('G4',com)
 
         # adding the time to wait
         if sec:
@@ -392,7 +452,7 @@ class gcode():
         '''
 
         # writing GCODE line
-        line = gline('G10', com)
+        line = self._gline('G10', com)
 
         # Adding the parameter to the retract statement
         if short == 0:
@@ -413,7 +473,7 @@ class gcode():
         '''
 
         # writing GCODE line
-        line = gline('G11', com)
+        line = self._gline('G11', com)
 
         # Adding the parameter to the retract statement
         if short == 0:
@@ -431,7 +491,7 @@ class gcode():
     def use_mm(self, com='set units to millimeters'):
 
         # create the gcode line and the comment
-        line = gline('G21', com)
+        line = self._gline('G21', com)
 
         # internally recording the distance units
         self.unit_sys = 'mm'
@@ -443,7 +503,7 @@ class gcode():
     def use_in(self, com='set units to inches'):
 
         # creates the line of gcode with inches command and comment
-        line = gline('G20', com)
+        line = self._gline('G20', com)
 
         # internally recording unit system
         self.unit_sys = 'in'
@@ -473,7 +533,7 @@ class gcode():
                 self.rel_move()
 
             # going home by raising z
-            line = gline('G28', com)
+            line = self._gline('G28', com)
 
             # ensuring z has acceptable values values
             if z > 0:
@@ -491,14 +551,14 @@ class gcode():
 
         else:
             # command to set the home position
-            line = gline('G28', com)
+            line = self._gline('G28', com)
 
             if x or x == 0:
-                line.append('X' + self.settings['pos'].format(x))
+                line.append('X' + self._format('pos', x))
             if y or y == 0:
-                line.append('Y' + self.settings['pos'].format(y))
+                line.append('Y' + self._format('pos', y))
             if z or z == 0:
-                line.append('Z' + self.settings['pos'].format(z))
+                line.append('Z' + self._format('pos', z))
 
             # recording line to mem and indicating that this is a move to write
             # the position of zeros forces the printer to return to the zero
@@ -512,7 +572,7 @@ class gcode():
     def abs_move(self, com='Use Absolute motion'):
 
         # create gcode line with command and comment
-        line = gline('G90', com)
+        line = self._gline('G90', com)
 
         # internally recording coordinate system
         self.coords = 'abs'
@@ -527,7 +587,7 @@ class gcode():
     def rel_move(self, com='Use Relative Motion'):
 
         # create gcode line with command and comment
-        line = gline('G91', com)
+        line = self._gline('G91', com)
 
         # internally recording coordinate system
         self.coords = 'rel'
@@ -539,28 +599,32 @@ class gcode():
     # method to reset current position
     def set_pos(self, x=None,y=None,z=None,extrude=None,com=None):
         '''
-        This method does not do anything to the gcode class
+        This method only resets the extruder position in the gcode class.
+        The total filament fed is not changed by the reset
         http://reprap.org/wiki/G-code#G92:_Set_Position
 
         Parameters:
         '''
 
         # creating GCODE line
-        line = gline('G92', com)
+        line = self._gline('G92', com)
 
         # appending parameters to line of GCODE
         if x or x == 0:
-            line.append('X' + self.settings['pos'].format(x) )
+            line.append('X' + self._format('pos', x) )
 
         if y or y == 0:
-            line.append('Y' + self.settings['pos'].format(y))
+            line.append('Y' + self._format('pos', y))
 
         if z or z == 0:
-            line.append('Z' + self.settings['pos'].format(z))
+            line.append('Z' + self._format('pos', z))
 
         # writes the extrusion command to this line
         if extrude or extrude == 0:
-            line.append('E' + self.settings['extrude'].format(extrude))
+            line.append('E' + self._format('extrude', extrude))
+
+            # resetting the extruder position
+            self.current_e = extrude
 
         # writing to memory
         self.write(line)
@@ -574,7 +638,7 @@ class gcode():
         Parameters:
         '''
 
-        self.write(gline('M30',com))
+        self.write(self._gline('M30',com))
         return
 
 
@@ -582,21 +646,24 @@ class gcode():
     def abs_extrude(self, com='Absolute Extrusion Mode'):
 
         # create gcode command
-        line = gline('M83', com)
+        line = self._gline('M82', com)
 
-        # should I record the volume used?
+        # internally recording extrusion mode
+        self.extrude_mode = 'abs'
 
         # writing line gcode to memory
         self.write(line)
+        return
 
 
     # Method to tell printer to use relative extrusion
     def rel_extrude(self, com='Relative Extrusion Mode'):
 
         # create gcode command
-        line = gline('M82', com)
+        line = self._gline('M83', com)
 
-        # should I record the volume used?
+        # internally recording extrusion mode
+        self.extrude_mode = 'rel'
 
         # writing line gcode to memory
         self.write(line)
@@ -609,7 +676,7 @@ class gcode():
 
         '''
 
-        self.write(gline('M84',com))
+        self.write(self._gline('M84',com))
         return
 
 
@@ -620,7 +687,7 @@ class gcode():
         Parameters:
         '''
 
-        self.write(gline('M103',com))
+        self.write(self._gline('M103',com))
         return
 
 
@@ -635,7 +702,7 @@ class gcode():
         '''
 
         # Creating GCODE line
-        line = gline('M104',com)
+        line = self._gline('M104',com)
 
         if t or t == 0:
             line.append('T' + str(t))
@@ -658,7 +725,7 @@ class gcode():
         '''
 
         # creating GCODE line
-        line = gline('M106', com)
+        line = self._gline('M106', com)
 
         # formatting line and saving it to memory
         self._control_fan(line, **kwargs)
@@ -672,7 +739,7 @@ class gcode():
         '''
 
         # writing a single line to memory
-        self.write(gline('M107',com))
+        self.write(self._gline('M107',com))
 
         return
 
@@ -689,7 +756,7 @@ class gcode():
         '''
 
         # Creating command
-        line = gline('M190',com)
+        line = self._gline('M190',com)
 
         # adding parameters values and command letters to line
         if temp:
@@ -712,7 +779,7 @@ class gcode():
         '''
 
         # Writes the GCODe line
-        self.write(gline('M721',com))
+        self.write(self._gline('M721',com))
 
         return
 
@@ -729,7 +796,7 @@ class gcode():
         '''
 
         # creating GCODE command
-        line = gline('M734', com)
+        line = self._gline('M734', com)
 
         # checking if time is given
         if time or time == 0:
@@ -749,7 +816,7 @@ class gcode():
         '''
 
         # Creating GCODE command
-        line = gline('M756', com)
+        line = self._gline('M756', com)
 
         if thick or thick == 0:
             line.append('S' + str(thick))
@@ -764,7 +831,7 @@ class gcode():
 
     # adds a new layer
     def new_layer(self, com='announce new layer'):
-        line = gline('M790', com)
+        line = self._gline('M790', com)
 
         # writing to memory
         self.write(line)
@@ -773,6 +840,38 @@ class gcode():
     # end of new_layer
 
 
+    # fills closed contours with lines at the current height
+    def infill(self, contours, spacing=1, angle=45, line_width=0.4, layer_height=0.2,
+               speed=30, travel_speed=120, diameter=1.75, grid=False):
+        '''
+        Parameters:
+
+        > CONTOURS: a list of arrays with shape (m,2) of closed x,y contours. Holes
+            are left empty by the even-odd rule
+        > SPACING: the distance between the lines
+        > ANGLE: the direction of the lines in degrees from the x axis
+        > LINE_WIDTH, LAYER_HEIGHT: the size of the printed lines
+        > SPEED: the speed along the lines in units of unit_sys per second
+        > TRAVEL_SPEED: the speed of the moves between lines
+        > DIAMETER: the diameter of the filament
+        > GRID: lines in both directions
+
+        Returns the number of lines
+
+        * Notes: all lines are found at once and written as one batch move in
+            serpentine order, see infill.rectilinear. The moves between lines
+            feed no filament
+        '''
+
+        lines = rectilinear(contours, spacing=spacing, angle=angle, grid=grid)[0]
+
+        # filament fed per unit length of line
+        area = line_width * layer_height / filament_area(diameter) # from helper.py
+        write_lines(self, lines, self.current_pos[2], area, speed, travel_speed)
+
+        return len(lines)
+
+
     # writes command for comments
     def comment(self, com):
         '''
@@ -780,7 +879,7 @@ class gcode():
 
         > COM: a string to be written as a comment
         '''
-        line = gline(comment=com)
+        line = self._gline(comment=com)
 
         # writing to memory
         self.write(line)
@@ -797,7 +896,7 @@ class gcode():
         # creating black lines
         for i in range(lines):
             # determining how to return values
-            self.write(gline())
+            self.write(self._gline())
 
         # end of blank
         return
@@ -830,13 +929,16 @@ class gcode():
 
 
     # writes the output to a file
-    def save(self, file):
+    def save(self, file, thumbnails=None):
         '''
         Parameters:
 
         > FILE: The file name to save to. If this has no extension, then
             a .gcode file is writen to. If there is an extension, then
             a file of that type is used
+        > THUMBNAILS: a list of image sizes to render and embed as base64 comment
+            blocks at the top of the file, as slicers do. True uses the common
+            sizes 16x16 and 220x124
         '''
 
         file_type = file.split('.')
@@ -850,19 +952,30 @@ class gcode():
         # opening and creating file
         with open(file,'w') as f:
 
+            # writes the thumbnails first so printers find them without parsing the file
+            if thumbnails:
+                if thumbnails is True:
+                    thumbnails = THUMBNAIL_SIZES
+                for size in thumbnails:
+                    f.writelines(thumbnail_block(render(self, size=size), size)) # render.py
+
             # writes all the GCODE lines at once
             f.writelines(self.code)
 
             # closing text file
             f.close()
 
+        # recording the bytes written
+        if self.profile:
+            self.profile.save_done(self, file)
+
         # end of store
         return
 
 
 
     ## IMPORTANT function here. write writes a line to memory as well as parses
-    def write(self, line, move=None, time=None):
+    def write(self, line, move=None, time=None, extrude=None):
 
         '''
         Parameters:
@@ -870,11 +983,18 @@ class gcode():
         > LINE:
         > MOVE:
         > TIME:
+        > EXTRUDE: the length of filament fed while writing this line
         '''
 
         # increasing counter
         self.count +=1
 
+        # counting lines by command. modal lines without a command are moves
+        if line.command:
+            self._opcodes[line.command] = self._opcodes.get(line.command, 0) + 1
+        elif move is not None:
+            self._opcodes['G1'] = self._opcodes.get('G1', 0) + 1
+
         # checking debug mode
         # determining how to return values
         if self.debug:
@@ -883,8 +1003,12 @@ class gcode():
         else:
             # appending the line of GCODE to the vector of lines
             if any(move) or any(move == 0): # any is overriden by numpy import
-                # records motion, time to print, and position
-                self._pos_update(move, time)
+                # records motion, time to print, extrusion, and position
+                self._pos_update(move, time, extrude)
+
+            # extrusion without motion (retracting, priming) is only added to the total
+            elif extrude:
+                self.filament += extrude
 
 
             # records GCODE
@@ -915,6 +1039,147 @@ class gcode():
     # end of time
 
 
+    # method that gives the length of filament fed for each motion in history
+    def filament_lengths(self):
+
+        '''
+        Returns a numpy array the same length as history. Element i is the
+        filament fed moving to history[i]. Negative values are retractions
+        '''
+
+        # the recorded filament is a running total
+        return diff(array(self.e, dtype=float), prepend=0) # numpy
+
+
+    # method that gives the volumetric flow rate for each motion in history
+    def volumetric_flow(self, diameter=1.75):
+
+        '''
+        Parameters:
+
+        > DIAMETER: the filament diameter in the same units as UNIT_SYS
+
+        Returns a numpy array the same length as history in units of UNIT_SYS^3
+        per second. Motions that take no time have zero flow.
+        '''
+
+        # volume of filament fed at each motion
+        volume = self.filament_lengths() * filament_area(diameter) # from helper.py
+
+        # time taken by each motion in seconds
+        dt = min2sec(diff(array(self.t, dtype=float), prepend=0)) # from helper.py
+
+        # ignoring the divide by zero of instant motions
+        with errstate(divide='ignore', invalid='ignore'):
+            return where(dt > 0, volume/dt, 0) # numpy
+
+
+    # method that gives the material needed for the print job
+    def material(self, diameter=1.75, density=None, printit=True):
+
+        '''
+        Parameters:
+
+        > DIAMETER: the filament diameter in the same units as UNIT_SYS
+        > DENSITY: if given, the mass is also calculated. This is in units of
+            grams per cubic centimeter
+        > PRINTIT: if true, the material used is printed to screen and returned.
+            If false, then it is just returned
+
+        Returns a dictionary with the keys 'length', 'volume' and 'mass'
+        '''
+
+        # the net length of filament is the total fed
+        length = self.filament
+
+        # volume in units of UNIT_SYS^3
+        volume = length * filament_area(diameter) # from helper.py
+
+        # volume in cubic centimeters for the mass
+        if self.unit_sys == 'mm':
+            cc = volume / 1000
+        else:
+            cc = volume * 16.387064
+
+        # calculating the mass if density is given
+        mass = cc * density if density else None
+
+        used = {'length':length, 'volume':volume, 'mass':mass}
+
+        # printing the material used
+        if printit:
+            text = '{:0.2f} {} of filament, {:0.2f} cm^3'.format(length, self.unit_sys, cc)
+            if mass is not None:
+                text += ', {:0.2f} g'.format(mass)
+            print(text)
+
+        return used
+    # end of material
+
+
+    # summary of the motion kept up to date as lines are written
+    @property
+    def stats(self):
+
+        '''
+        Returns a dictionary with the keys:
+
+        > COUNT: the number of motions in history
+        > MIN, MAX, MEAN: numpy arrays of the x,y,z bounds and mean position.
+            None if nothing has moved
+        > LENGTH: the total path length
+        > TRAVEL: the path length moved without extruding
+        > PRINT_TIME: the print time in minutes
+        > FILAMENT: the length of filament fed
+        > OPCODES: a dictionary of the number of lines written for each command
+
+        * Notes: the lengths, times and counts are running totals. The bounds and
+            mean are found from history the first time they are asked for after
+            a motion, so writing each line does no array work for them
+        '''
+
+        n = len(self.history)
+
+        # reusing the bounds if nothing has moved since
+        if self._bounds_cache[0] != n:
+            history = array(self.history).reshape(-1, 3) # numpy
+            self._bounds_cache = (n, (history.min(axis=0), history.max(axis=0),
+                                      history.mean(axis=0)) if n else (None, None, None))
+        low, high, mean = self._bounds_cache[1]
+
+        return {'count':n,
+                'min':None if low is None else low.copy(),
+                'max':None if high is None else high.copy(),
+                'mean':None if mean is None else mean.copy(),
+                'length':self._length,
+                'travel':self._travel,
+                'print_time':self.print_time,
+                'filament':self.filament,
+                'opcodes':dict(self._opcodes)}
+
+
+    # method that gives the positions and times the viewers draw
+    def lod(self, budget=None, cached=True):
+
+        '''
+        Parameters:
+
+        > BUDGET: the most points to keep. Defaults to the lod of settings.
+            False keeps every point
+        > CACHED: if false, the path is decimated again even if nothing has
+            moved since the last call
+
+        Returns an array of the kept positions with shape (n,3) and an array
+        of their print times
+        '''
+
+        # forgetting the last decimation
+        if not cached:
+            self._lod_cache = (None, None)
+
+        return self._lod(budget)
+
+
 
 
     ######################################################################################
@@ -937,11 +1202,13 @@ class gcode():
         another color not with a legend
     > break this into several methods
     '''
-    def view(self, *args, fig_title='Print Path', labels=False, **kwargs):
+    def view(self, *args, fig_title='Print Path', labels=False, lod=None, **kwargs):
 
         '''
         Parameters:
 
+        > LOD: the most points to draw. Defaults to the lod of settings. False
+            draws every point
 
         > *args,**kwargs : are passed to matplotlib's pyplot.plot function
 
@@ -955,27 +1222,118 @@ class gcode():
         ax_labels = ['X ({})'.format(self.unit_sys),'Y ({})'.format(self.unit_sys),
                      'Z ({})'.format(self.unit_sys)]
 
+        # imported here so matplotlib is only loaded when viewing
+        from .visual import plot3
+
+        # positions reduced to the point budget
+        history, _ = self._lod(lod)
+
         # function call from module visual
         if labels:
 
-            fig = plot3(self.history, *args, title=fig_title,
+            fig = plot3(history, *args, title=fig_title,
                 axis_label=ax_labels, backend=self.settings.graphics,
-                **kwargs)
+                ax_lim=self._ax_lim(), **kwargs)
         else:
-            fig = plot3(self.history, *args, title=fig_title,
-                        backend=self.settings.graphics, **kwargs)
+            fig = plot3(history, *args, title=fig_title,
+                        backend=self.settings.graphics, ax_lim=self._ax_lim(), **kwargs)
 
 
         return fig
 
 
+    # method that renders the path to a PNG without a display
+    def preview(self, file=None, size=(220, 124), **kwargs):
+        '''
+        Parameters:
+
+        > FILE: if given, the PNG is written to this file
+        > SIZE: width and height of the image in pixels
+        > KWARGS: see render.py render
+
+        Returns the PNG as bytes
+        '''
+
+        return render(self, file, size=size, **kwargs) # from render.py
+
+
+    # method that draws the path into an image with NumPy only, without matplotlib
+    def raster(self, file=None, size=(800, 600), view='iso', color='time', cmap='jet',
+               lod=False, **kwargs):
+        '''
+        Parameters:
+
+        > FILE: if given, the image is saved to this file with Pillow
+        > SIZE: width and height of the image in pixels
+        > VIEW: one of 'top', 'front', 'side' or 'iso', or a tuple of the camera
+            elevation and azimuth in degrees
+        > COLOR: what colors the path, one of 'time', 'layer' or 'feed'
+        > CMAP: one of the colormaps in raster.py COLORMAPS
+        > LOD: the most points to draw. Defaults to every point, as drawing is
+            cheaper than decimating. None uses the lod of settings
+        > KWARGS: see raster.py rasterize
+
+        Returns the image as an array with shape (height, width, 3) of uint8
+        '''
+
+        # positions and times, reduced to the point budget if one is given
+        history, t = self._lod(lod)
+
+        if color == 'time':
+            values = t
+
+        elif color == 'layer':
+            # layers numbered by height
+            values = unique(history[:, 2], return_inverse=True)[1] # numpy
+
+        elif color == 'feed':
+            # speed of the motion ending at each point, zero for dwells
+            distance = norm(diff(history, axis=0, prepend=zeros((1, 3))), axis=1)
+            dt = diff(t, prepend=0) # numpy
+            values = zeros(len(t)) # numpy
+            values[dt > 0] = distance[dt > 0] / dt[dt > 0]
+        else:
+            raise ValueError("color must be 'time', 'layer' or 'feed'")
+
+        return rasterize(history, values, size=size, view=view, cmap=cmap, file=file,
+                         **kwargs) # from raster.py
+
+
+    # method that writes the path to a single HTML file with an inline WebGL viewer
+    def export_html(self, file, quantize=True, lod=False, title='Print Path', layers=1000):
+        '''
+        Parameters:
+
+        > FILE: the HTML file to write
+        > QUANTIZE: stores positions as int16 instead of float32
+        > LOD: the most points to keep. Defaults to every point, as browsers draw
+            millions of segments. None uses the lod of settings
+        > TITLE: the title of the page
+        > LAYERS: the most stops of the layer sliders, see webview.py export_html
+
+        Returns the size of the file in bytes
+
+        * Notes: the file opens offline in any browser with WebGL. Drag to
+            orbit, scroll to zoom and use the sliders for time and layers
+        '''
+
+        # positions and times, reduced to the point budget if one is given
+        history, t = self._lod(lod)
+
+        return export_html(history, t, file, quantize=quantize, title=title,
+                           unit=self.unit_sys, layers=layers) # from webview.py
+
+
     # method that has a colorbar to parameterize the time of the print
-    def cbar_view(self, *args, labels=False, fig_title='Printer Path', **kwargs):
+    def cbar_view(self, *args, labels=False, fig_title='Printer Path', lod=None, **kwargs):
         '''
         Parameters:
 
         see visual.py color_view for all arguments. Some are defined here. Still working on it
 
+        > LOD: the most points to draw. Defaults to the lod of settings. False
+            draws every point
+
         '''
 
         # generating labels
@@ -998,18 +1356,24 @@ class gcode():
         colorbar_label = 'Time (min)'
 
 
+        # imported here so matplotlib is only loaded when viewing
+        from .visual import color_view
+
+        # positions and times reduced to the point budget
+        history, t = self._lod(lod)
+
         # function call from module visual
         if labels:
 
-            fig = color_view(self.history, self.t, *args, fig_title=fig_title,
+            fig = color_view(history, t, *args, fig_title=fig_title,
                     colorbar_ticks=colorbar_ticks, colorbar_tick_labels=colorbar_tick_labels,
                     colorbar_label=colorbar_label, axis_label=ax_labels,
-                    backend=self.settings.graphics, **kwargs)
+                    backend=self.settings.graphics, ax_lim=self._ax_lim(), **kwargs)
         else:
-            fig = color_view(self.history, self.t, *args, fig_title=fig_title,
+            fig = color_view(history, t, *args, fig_title=fig_title,
                    colorbar_ticks=colorbar_ticks, colorbar_tick_labels=colorbar_tick_labels,
                    colorbar_label=colorbar_label,
-                   backend=self.settings.graphics, **kwargs)
+                   backend=self.settings.graphics, ax_lim=self._ax_lim(), **kwargs)
         
 
 
@@ -1018,7 +1382,7 @@ class gcode():
 
     # a function to wrap the stuff needed for a live graph takes a function that returns a
     # X and Y array to be plotted, a single input i to that function is required
-    def animated(self, *args, fig_title='Print Path',**kwargs):
+    def animated(self, *args, fig_title='Print Path', lod=None, frames=100, **kwargs):
 
         '''
         Parameters:
@@ -1026,18 +1390,29 @@ class gcode():
         See visual.py Some arguments are defined here though. Working on it still
 
         Defined here: ax_label, ax_lim, fig_title, loop
+
+        > LOD: the most points to draw. Defaults to the lod of settings. False
+            draws every point
+        > FRAMES: the number of frames, spread evenly over the print time. The
+            cost of the animation depends on this and not on the number of moves
         '''
 
+        # imported here so matplotlib is only loaded when viewing
+        from .visual import live_view
+
         # make a numpy array for indexing, vectorized operations, and method access
-        # getting motion history
-        # list comprehension to get the coordingates from self.history
-        X = array([i[0] for i in self.history]) # numpy
-        Y = array([i[1] for i in self.history]) # numpy
-        Z = array([i[2] for i in self.history]) # numpy
+        # getting motion history reduced to the point budget
+        history, t = self._lod(lod)
+        X = history[:, 0]
+        Y = history[:, 1]
+        Z = history[:, 2]
+
+        # number of points drawn at each frame, found once by time
+        end = self._frame_index(t, frames)
 
         # defining the update function to needed by the plotting function
         def update(i):
-            return X[0:i], Y[0:i], Z[0:i]
+            return X[0:end[i]], Y[0:end[i]], Z[0:end[i]]
 
 
         # setting additional arguments
@@ -1046,53 +1421,88 @@ class gcode():
                      'Z ({})'.format(self.unit_sys)]
 
 
-        # Keeps aspect ratio square but can be computationally expensive for large GCODE
-        # http://stackoverflow.com/questions/13685386
-        # numpy array
-        max_range = array([X.max()-X.min(),
-                              Y.max()-Y.min(),
-                              Z.max()-Z.min()]).max() / 2.0
-
-        mean_x = X.mean()
-        mean_y = Y.mean()
-        mean_z = Z.mean()
-
-        # generating the axis limits
-        ax_lim = [mean_x - max_range, mean_x + max_range,
-                  mean_y - max_range, mean_y + max_range,
-                  mean_z - max_range, mean_z + max_range]
+        # Keeps aspect ratio square using the running totals
+        ax_lim = self._ax_lim()
 
 
 
 
         # calling function from visual.py
         live_view(update, *args, ax_label=ax_labels, ax_lim=ax_lim,
-                  fig_title=fig_title, loop=len(self.t)+1, **kwargs)
+                  fig_title=fig_title, loop=len(end), **kwargs)
 
 
         return
 
 
+    # method that writes the animation of the print to a GIF or video file
+    def export_animation(self, file, frames=100, fps=10, fig_title='Print Path', lod=None,
+                         processes=None, **kwargs):
+        '''
+        Parameters:
+
+        > FILE: the file to write. A .gif is written with Pillow, other formats
+            such as .mp4 are piped to ffmpeg
+        > FRAMES: the number of frames, spread evenly over the print time
+        > FPS: frames per second
+        > FIG_TITLE: the title of every frame
+        > LOD: the most points to draw. Defaults to the lod of settings. False
+            draws every point
+        > PROCESSES: the number of processes rendering frames. Defaults to the
+            number of cpus
+        > KWARGS: see movie.py export_animation
+
+        Returns FILE
+
+        * Notes: unlike animated with a save_file, frames are rendered in
+            parallel, so export time goes down with the number of cores
+        '''
+
+        # imported here so matplotlib is only loaded when exporting
+        from .movie import export_animation
+
+        # getting motion history reduced to the point budget
+        history, t = self._lod(lod)
+
+        # number of points drawn at each frame, found once by time
+        end = self._frame_index(t, frames)
+
+        # generating labels for the axes
+        ax_labels = ['X ({})'.format(self.unit_sys),'Y ({})'.format(self.unit_sys),
+                     'Z ({})'.format(self.unit_sys)]
+
+        return export_animation(history, end, file, fps=fps, ax_lim=self._ax_lim(),
+                                ax_label=ax_labels, fig_title=fig_title,
+                                processes=processes, **kwargs)
+
+
     # method that has a slider on the bottom of the figure to animate the print path
-    def slide_view(self, *args, fig_title='Printer Path', **kwargs):
+    def slide_view(self, *args, fig_title='Printer Path', lod=None, **kwargs):
         '''
         Parameters:
 
         See visual.py, slider_view
+
+        > LOD: the most points to draw. Defaults to the lod of settings. False
+            draws every point
         '''
 
 
 
-        # getting motion history
-        # list comprehension to get the coordingates from self.history
-        X = array([i[0] for i in self.history]) # numpy
-        Y = array([i[1] for i in self.history]) # numpy
-        Z = array([i[2] for i in self.history]) # numpy
+        # imported here so matplotlib is only loaded when viewing
+        from .visual import slider_view
+
+        # getting motion history reduced to the point budget
+        history, t = self._lod(lod)
+        X = history[:, 0]
+        Y = history[:, 1]
+        Z = history[:, 2]
 
         # defining the update function to needed by the plotting function
         def update(i):
-            # when i == self.t[-1], argument == len(self.t)
-            return X[0:int(i*len(self.t)/self.t[-1])], Y[0:int(i*len(self.t)/self.t[-1])], Z[0:int(i*len(self.t)/self.t[-1])]
+            # every point reached by time i. t is sorted so this is a binary search
+            end = searchsorted(t, i, side='right') # numpy
+            return X[0:end], Y[0:end], Z[0:end]
 
         # defining labels:
 
@@ -1102,21 +1512,8 @@ class gcode():
                      'Z ({})'.format(self.unit_sys)]
 
 
-        # Keeps aspect ratio square but can be computationally expensive for large GCODE
-        # http://stackoverflow.com/questions/13685386
-        # numpy array
-        max_range = array([X.max()-X.min(),
-                              Y.max()-Y.min(),
-                              Z.max()-Z.min()]).max() / 2.0
-
-        mean_x = X.mean()
-        mean_y = Y.mean()
-        mean_z = Z.mean()
-
-        # generating the axis limits
-        ax_lim = [mean_x - max_range, mean_x + max_range,
-                  mean_y - max_range, mean_y + max_range,
-                  mean_z - max_range, mean_z + max_range]
+        # Keeps aspect ratio square using the running totals
+        ax_lim = self._ax_lim()
 
 
         # generating the slider labels
@@ -1132,6 +1529,101 @@ class gcode():
         return
 
 
+    # method that accumulates where the machine spends its time into a grid
+    def heatmap(self, bins=256, plane='xy', weight='time', file=None, cmap='inferno',
+                log=True, **kwargs):
+        '''
+        Parameters:
+
+        > BINS: the number of bins, either one number for every axis or one per axis
+        > PLANE: the axes binned, one of 'xy', 'xz', 'yz' or 'xyz' for voxels
+        > WEIGHT: 'time' to accumulate minutes or 'filament' to accumulate the
+            length of filament fed
+        > FILE: if given, the 2D grid is saved to this file as a PNG
+        > CMAP, LOG: the colormap and color scale of the PNG, see heatmap.py heat_image
+        > KWARGS: see heatmap.py density
+
+        Returns the grid, indexed in the order of PLANE, and the bin edges of every axis
+
+        * Notes: every motion is used, not the decimated path of the viewers, so
+            dwells keep their time on their point
+        '''
+
+        # the path starts at the origin with nothing spent yet
+        history = concatenate((zeros((1, 3)), array(self.history).reshape(-1, 3))) # numpy
+
+        if weight == 'time':
+            weights = concatenate(([0], self.t)) # numpy
+        elif weight == 'filament':
+            weights = concatenate(([0], self.e)) # numpy
+        else:
+            raise ValueError("weight must be 'time' or 'filament'")
+
+        # from heatmap.py
+        grid, edges = density(history, weights, bins=bins, plane=plane, **kwargs)
+
+        if file:
+            heat_image(grid, cmap=cmap, log=log, file=file)
+
+        return grid, edges
+
+
+    # method that shows the time density of the print as an image with a colorbar
+    def heat_view(self, bins=256, plane='xy', weight='time', fig_title='Time Density',
+                  log=True, **kwargs):
+        '''
+        Parameters:
+
+        > BINS, PLANE, WEIGHT: see heatmap. PLANE must be two axes
+        > FIG_TITLE: the title given to the figure
+        > LOG: uses a logarithmic color scale
+        > KWARGS: see visual.py heat_view
+        '''
+
+        if len(PLANES[plane]) != 2:
+            raise ValueError("heat_view needs a plane of two axes, such as 'xy'")
+
+        # imported here so matplotlib is only loaded when viewing
+        from .visual import heat_view
+
+        grid, edges = self.heatmap(bins=bins, plane=plane, weight=weight)
+
+        # labels of the binned axes
+        ax_labels = ['{} ({})'.format(i.upper(), self.unit_sys) for i in plane]
+        colorbar_label = 'Time (min)' if weight == 'time' else 'Filament ({})'.format(self.unit_sys)
+
+        # function call from module visual
+        return heat_view(grid, edges, log=log, axis_label=ax_labels, fig_title=fig_title,
+                         colorbar_label=colorbar_label, **kwargs)
+
+
+    # method that triangulates the height surface of the path, such as touch probe points
+    def surface(self, grid=None, tol=1e-6, reduce='mean', file=None):
+        '''
+        Parameters:
+
+        > GRID, TOL, REDUCE: see surface.py surface
+        > FILE: if given, the surface is saved to this binary stl file
+
+        Returns a gmesh of the surface
+
+        * Notes: every motion is a point. Repeated motions to the same x,y, such
+            as a probe touching down twice, give one vertex. The history is a
+            python list of positions, not columns, so it is copied into one
+            array first, which is most of the time for long programs. Pass an
+            (n,3) array to surface.py surface when the points are already in one
+        '''
+
+        # from surface.py
+        mesh = surface(array(self.history).reshape(-1, 3), grid=grid, tol=tol, reduce=reduce)
+
+        if file:
+            from .stl import writestl
+            writestl(file, mesh)
+
+        return mesh
+
+
     ######################################################################################
     ######################################################################################
     ## Hidden methods to handle internal processes---------------------------------------
@@ -1167,17 +1659,17 @@ class gcode():
 
         # appending parameters to line of GCODE
         if x or x == 0:
-            line.append('X' + self.settings['pos'].format(x) )
+            line.append('X' + self._format('pos', x) )
             # updating position
             pos[0] = x
 
         if y or y == 0:
-            line.append('Y' + self.settings['pos'].format(y))
+            line.append('Y' + self._format('pos', y))
             # updating position
             pos[1] = y
 
         if z or z == 0:
-            line.append('Z' + self.settings['pos'].format(z))
+            line.append('Z' + self._format('pos', z))
             # updating position
             pos[2] = z
 
@@ -1187,9 +1679,15 @@ class gcode():
             # and two adjust attributes
             line.append('F' + self._speed(speed))
 
+        # the filament fed during this motion
+        fed = None
+
         # writes the extrusion command to this line
         if extrude or extrude == 0:
-            line.append('E' + self.settings['extrude'].format(extrude))
+            line.append('E' + self._format('extrude', extrude))
+
+            # calls a hidden function to update the extruder position
+            fed = self._extrude(extrude)
 
         # writes command to check if an end point was hit. this defaults to not checking
         if check_end:
@@ -1198,7 +1696,7 @@ class gcode():
         # determining how to return values or to save the GCODE lines to memory
         if write:
             # writing to memory
-            self.write(line,pos)
+            self.write(line,pos,extrude=fed)
         else:
             # returning both values
             return line, pos
@@ -1218,7 +1716,18 @@ class gcode():
             self.print_speed = inps2inpm(v)
 
         # returning the formated string of the speed
-        return self.settings['speed'].format(self.print_speed)
+        return self._format('speed', self.print_speed)
+
+
+
+    # method that starts a line of GCODE. a method so it is timed on its own when profiling
+    def _gline(self, command=None, comment=None):
+        return gline(command, comment)
+
+
+    # method that formats a number with the settings, timed on its own when profiling
+    def _format(self, lib_arg, x):
+        return self.settings.format(lib_arg, x)
 
 
 
@@ -1226,7 +1735,8 @@ class gcode():
     def _time(self, time=None):
 
         '''
-        Calculates the time of motion, independant of coordinate systems
+        Calculates the time of motion, independant of coordinate systems.
+        Returns the distance moved
 
         Parameters:
 
@@ -1256,18 +1766,19 @@ class gcode():
         # adds an element to a vector of time
         self.t.append(self.print_time)
 
-        return
+        return distance
 
 
 
     # method to internally handle updating the previous and current position, the
     # to the time to move, and recording the history of motion for plotting
-    def _pos_update(self, pos, time=None):
+    def _pos_update(self, pos, time=None, extrude=None):
         '''
         Parameters:
 
         > POS: the newly moved to position.  This is always recorded in absolute
             coordinates
+        > EXTRUDE: the length of filament fed during this motion
         '''
 
         # reassigning positions of the print head based on motion given by po
@@ -1290,10 +1801,118 @@ class gcode():
 
 
         # updates the time taken to move the print head
-        self._time(time)
+        distance = self._time(time)
+
+        # recording the filament fed up to this motion
+        if extrude:
+            self.filament += extrude
+        self.e.append(self.filament)
+
+        # updating the running totals
+        self._length += distance
+
+        # motion without feeding filament is travel
+        if not extrude or extrude <= 0:
+            self._travel += distance
 
         return
 
+
+    # method to internally handle the extruder position for the move functions
+    # and return the length of filament fed
+    def _extrude(self, e):
+
+        '''
+        Parameters:
+
+        > E: the E word of the line. Absolute or relative depending on the
+            attribute EXTRUDE_MODE
+        '''
+
+        # absolute extrusion, the filament fed is the change in extruder position
+        if self.extrude_mode == 'abs':
+            fed = e - self.current_e
+            self.current_e = e
+
+        # relative extrusion, the E word is the filament fed
+        else:
+            fed = e
+            self.current_e += e
+
+        return fed
+
+    # method that gives the positions and times of history reduced to at most budget points
+    def _lod(self, budget=None):
+
+        '''
+        Parameters:
+
+        > BUDGET: the most points to keep. Defaults to the lod of settings.
+            False or None keeps every point
+
+        * Notes: the result is cached until more motion is recorded
+        '''
+
+        # using the setting if no budget is given
+        if budget is None:
+            budget = self.settings.lod
+
+        # reusing the last decimation if nothing has moved since
+        key = (len(self.history), budget)
+        if self._lod_cache[0] == key:
+            return self._lod_cache[1]
+
+        history = array(self.history).reshape(-1, 3) # numpy
+        t = array(self.t, dtype=float) # numpy
+
+        # decimating the path, from lod.py
+        if budget:
+            keep = decimate(history, budget)
+            history = history[keep]
+            t = t[keep]
+
+        self._lod_cache = (key, (history, t))
+        return history, t
+
+
+    # method that gives the number of points drawn at frames evenly spaced in time
+    def _frame_index(self, t, frames):
+
+        '''
+        Parameters:
+
+        > T: the time of every point that is drawn
+        > FRAMES: the number of frames
+        '''
+
+        # without print speeds there is no time, so the frames are spaced by motion
+        if len(t) == 0 or t[-1] == 0:
+            return linspace(0, len(t), frames).astype(int) # numpy
+
+        # every point reached by the time of the frame is drawn
+        return searchsorted(t, linspace(0, t[-1], frames), side='right') # numpy
+
+
+    # method that gives square axis limits about the mean position from the running totals
+    def _ax_lim(self):
+
+        # nothing to bound yet
+        if not self.history:
+            return None
+
+        stats = self.stats
+
+        # Keeps aspect ratio square
+        # http://stackoverflow.com/questions/13685386
+        max_range = (stats['max'] - stats['min']).max() / 2.0
+        mean = stats['mean']
+
+        # generating the axis limits in x,y,z order from low to high
+        return [mean[0] - max_range, mean[0] + max_range,
+                mean[1] - max_range, mean[1] + max_range,
+                mean[2] - max_range, mean[2] + max_range]
+
+
     # Method to control the fan parameters
     def _control_fan(self,line,fan_speed=None, fan_n=None, invert_sig=None, fan_freq=None,
                      set_min_speed=None, blip_time=None, select_heaters=None, restore_speed=None,
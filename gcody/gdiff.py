@@ -0,0 +1,280 @@
+'''
+Module that contains a class to compare the motion of two GCODE programs
+
+Written by Ryan Zambrotta
+'''
+from .gcode import gcode
+from .readg import read
+from numpy import (array, zeros, diff, rint, where, unique, bincount, cumsum,
+                   maximum, flatnonzero, concatenate, column_stack,
+                   int64, float64, arange, logical_not)
+from numpy.linalg import norm
+
+
+# class that aligns the motion history of two gcode objects and stores the
+# inserted, removed and reordered blocks of motion
+class gdiff():
+
+    def __init__(self, a, b, tol=1e-4, time_tol=1e-3):
+        '''
+        Parameters:
+
+        > A, B: the gcode objects to compare. File names or lists of lines
+            are read with read
+        > TOL: motions closer than TOL (in distance units) are the same
+        > TIME_TOL: dwells closer than TIME_TOL (in seconds) are the same
+
+        * Notes: The motions are aligned with Heckel's algorithm. Records that
+            occur once in both programs anchor the alignment and matches are
+            grown from them in both directions, so the comparison is linear
+            in the number of motions apart from sorting the records.
+        '''
+
+        # reading files if needed
+        self.a = a if isinstance(a, gcode) else read(a)
+        self.b = b if isinstance(b, gcode) else read(b)
+
+        # normalized records of every motion
+        rec_a = _records(self.a, tol, time_tol)
+        rec_b = _records(self.b, tol, time_tol)
+
+        # hashing records to integer ids shared by both programs
+        n = len(rec_a)
+        _, ids = unique(concatenate((rec_a, rec_b)), axis=0, return_inverse=True) # numpy
+        ids = ids.ravel()
+        ids_a = ids[:n]
+        ids_b = ids[n:]
+
+        # aligning motions. match_a[i] is the index in b of motion i in a, or -1
+        match_a = _align(ids_a, ids_b)
+
+        # blocks of consecutive motions matched in both programs
+        matched = _blocks(match_a)
+
+        # blocks that keep their relative order. the rest were reordered
+        in_order = _in_order([i[1] for i in matched], [i[2] for i in matched])
+
+        # storing blocks as (start in a, start in b, length)
+        self.matched = [matched[i] for i in range(len(matched)) if i in in_order]
+        self.moved = [matched[i] for i in range(len(matched)) if i not in in_order]
+
+        # unmatched motions as (start, length)
+        match_b = zeros(len(ids_b), dtype=int64) - 1 # numpy
+        match_b[match_a[match_a >= 0]] = flatnonzero(match_a >= 0)
+        self.removed = _runs(match_a < 0)
+        self.inserted = _runs(match_b < 0)
+
+        # length of every motion
+        dist_a = _distance(self.a)
+        dist_b = _distance(self.b)
+
+        # difference in print time (minutes) and path length of b relative to a
+        self.time_delta = self.b.print_time - self.a.print_time
+        self.distance_delta = dist_b.sum() - dist_a.sum()
+
+        # time and path length of the removed and inserted motions
+        self.removed_time = _dt(self.a)[match_a < 0].sum()
+        self.inserted_time = _dt(self.b)[match_b < 0].sum()
+        self.removed_distance = dist_a[match_a < 0].sum()
+        self.inserted_distance = dist_b[match_b < 0].sum()
+
+        # end of init
+        return
+
+    # methods ----------------------------------------------------------------------
+
+    # method that determines whether the two programs move the same way
+    def same(self, ordered=True):
+        '''
+        Parameters:
+
+        > ORDERED: if false, reordered blocks still count as the same motion
+        '''
+
+        if self.removed or self.inserted:
+            return False
+
+        return not (ordered and self.moved)
+
+    # ---------------------------------------------------------------------------------
+    # methods for builtin function access
+
+    # creates a summary of the differences
+    def __repr__(self):
+        return ('{} matched, {} moved, {} removed, {} inserted blocks\n'
+                'time delta: {:0.4f} min, distance delta: {:0.4f}').format(
+                    len(self.matched), len(self.moved), len(self.removed),
+                    len(self.inserted), self.time_delta, self.distance_delta)
+    def __str__(self):
+        return self.__repr__()
+
+    # gives the number of blocks that differ
+    def __len__(self):
+        return len(self.moved) + len(self.removed) + len(self.inserted)
+
+
+
+## ----------------------------------------------------------------------------------------
+## hidden functions to build and align the records
+
+
+# position of every motion as a numpy array with shape (n,3)
+def _positions(code):
+    return array(code.history, dtype=float64).reshape(-1, 3) # numpy
+
+
+# length of every motion, starting from the origin like gcode._time
+def _distance(code):
+    pos = _positions(code)
+    return norm(diff(pos, axis=0, prepend=zeros((1, 3))), axis=1) # numpy
+
+
+# time of every motion in minutes
+def _dt(code):
+    return diff(array(code.t, dtype=float64), prepend=0) # numpy
+
+
+# quantized (x, y, z, filament, dwell) record of every motion
+def _records(code, tol, time_tol):
+
+    pos = _positions(code)
+    dist = _distance(code)
+
+    # filament fed at every motion
+    if len(code.e) == len(pos):
+        fed = diff(array(code.e, dtype=float64), prepend=0) # numpy
+    else:
+        fed = zeros(len(pos)) # numpy
+
+    # motions that do not move are dwells
+    dwell = where(dist < tol, _dt(code)*60, 0) # numpy
+
+    return column_stack((rint(pos/tol), rint(fed/tol),
+                         rint(dwell/time_tol))).astype(int64) # numpy
+
+
+# Heckel's algorithm on integer ids. returns the index in b of every element of a
+def _align(ids_a, ids_b):
+
+    n, m = len(ids_a), len(ids_b)
+    match = zeros(n, dtype=int64) - 1 # numpy
+    if n == 0 or m == 0:
+        return match
+
+    # ids that occur exactly once in both programs are anchors
+    k = max(ids_a.max(), ids_b.max()) + 1
+    count_a = bincount(ids_a, minlength=k) # numpy
+    count_b = bincount(ids_b, minlength=k) # numpy
+    where_b = zeros(k, dtype=int64) # numpy
+    where_b[ids_b] = arange(m)
+
+    anchor = (count_a[ids_a] == 1) & (count_b[ids_a] == 1)
+    match[anchor] = where_b[ids_a[anchor]]
+
+    # growing matches forwards then backwards along the diagonal of each anchor
+    forward = _extend(ids_a, ids_b, match, anchor)
+    reverse = where(match[::-1] >= 0, m - 1 - match[::-1], -1)
+    backward = _extend(ids_a[::-1], ids_b[::-1], reverse, anchor[::-1])[::-1]
+    backward = where(backward >= 0, m - 1 - backward, -1)
+
+    # forward matches win when both directions claim a motion
+    match = where(forward >= 0, forward, backward)
+
+    # each motion in b can only be claimed once
+    claimed = flatnonzero(match >= 0)
+    _, first = unique(match[claimed], return_index=True) # numpy
+    keep = zeros(n, dtype=bool)
+    keep[claimed[first]] = True
+    match[logical_not(keep)] = -1
+
+    return match
+
+
+# grows anchored matches forwards while the ids agree on the same diagonal
+def _extend(ids_a, ids_b, match, anchor):
+
+    n, m = len(ids_a), len(ids_b)
+
+    # index of the last anchor at or before every element
+    last = maximum.accumulate(where(anchor, arange(n), -1)) # numpy
+    has = last >= 0
+
+    # candidate index in b following the diagonal of the last anchor
+    j = where(has, arange(n) - last + match[maximum(last, 0)], -1)
+    ok = has & (j < m)
+    ok[ok] = ids_b[j[ok]] == ids_a[ok]
+
+    # a match only holds if every element since the anchor matched
+    bad = cumsum(logical_not(ok)) # numpy
+    bad_at_anchor = bad[maximum(last, 0)]
+    ok &= (bad == bad_at_anchor)
+
+    return where(ok, j, -1)
+
+
+# blocks of consecutive matches as (start in a, start in b, length)
+def _blocks(match):
+
+    i = flatnonzero(match >= 0) # numpy
+    if len(i) == 0:
+        return []
+    j = match[i]
+
+    # a new block starts whenever a or b is not consecutive
+    start = concatenate(([True], (diff(i) != 1) | (diff(j) != 1))) # numpy
+    starts = flatnonzero(start)
+    lengths = diff(concatenate((starts, [len(i)])))
+
+    return [(int(i[s]), int(j[s]), int(l)) for s, l in zip(starts, lengths)]
+
+
+# runs of True as (start, length)
+def _runs(mask):
+
+    edges = diff(concatenate(([0], mask.astype(int64), [0]))) # numpy
+    starts = flatnonzero(edges == 1)
+    ends = flatnonzero(edges == -1)
+
+    return [(int(s), int(e - s)) for s, e in zip(starts, ends)]
+
+
+# indices of the increasing subsequence of starts with the most total length
+def _in_order(starts, lengths):
+
+    # ranks of the starts for a fenwick tree over the best total ending at each rank
+    order = sorted(range(len(starts)), key=lambda i: starts[i])
+    rank = [0]*len(starts)
+    for r, i in enumerate(order):
+        rank[i] = r + 1
+
+    tree = [(0, -1)]*(len(starts) + 1)
+    parent = [-1]*len(starts)
+    best = (0, -1)
+
+    for i in range(len(starts)):
+
+        # best subsequence ending before this start
+        r = rank[i] - 1
+        prev = (0, -1)
+        while r > 0:
+            prev = max(prev, tree[r])
+            r -= r & -r
+
+        parent[i] = prev[1]
+        total = (prev[0] + lengths[i], i)
+        best = max(best, total)
+
+        # recording the subsequence ending at this start
+        r = rank[i]
+        while r < len(tree):
+            tree[r] = max(tree[r], total)
+            r += r & -r
+
+    # walking back through the subsequence
+    keep = set()
+    i = best[1]
+    while i >= 0:
+        keep.add(i)
+        i = parent[i]
+
+    return keep
@@ -7,6 +7,9 @@ class gline():
 
     def __init__(self, command=None, comment=None):
 
+        # stores the command to identify the line without parsing it
+        self.command = command
+
         # creates the gcode command
         if command:
             self.line = command
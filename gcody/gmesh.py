@@ -0,0 +1,270 @@
+'''
+Module that contains an indexed triangle mesh, with every vertex stored once
+and faces as indices into the vertices
+
+Written by Ryan Zambrotta
+'''
+from numpy import (asarray, rint, lexsort, errstate, diff, any, cumsum, empty, concatenate,
+                   sort, cross, flatnonzero, bincount, float32, float64, int32, int64)
+from numpy.linalg import norm
+
+
+# class of a triangle mesh with shared vertices
+class gmesh():
+
+    def __init__(self, vertices, faces):
+        '''
+        Parameters:
+
+        > VERTICES: array with shape (n,3) of the unique vertices
+        > FACES: array with shape (m,3) of the vertex indices of every triangle
+
+        Use gmesh.from_triangles or readmesh to build one from stl triangles:
+
+            m = readmesh('part.stl')
+            m.vertices, m.faces, m.normals, m.edges, m.adjacency, m.zindex
+
+        * Notes: the derived arrays are computed the first time they are used
+            and kept
+        '''
+
+        self.vertices = asarray(vertices)
+        self.faces = asarray(faces, dtype=int32)
+
+        # derived arrays, computed on first use
+        self._normals = None
+        self._areas = None
+        self._edges = None
+        self._face_edges = None
+        self._edge_order = None
+        self._adjacency = None
+        self._zindex = None
+
+        # end of init
+        return
+
+    # builds a mesh from triangles, merging vertices closer than tol
+    @classmethod
+    def from_triangles(cls, vectors, tol=1e-6):
+        '''
+        Parameters:
+
+        > VECTORS: array with shape (m,3,3) of the corners of every triangle,
+            such as readstl(file, xyz=False)[0]
+        > TOL: vertices that round to the same multiple of TOL are merged. Zero
+            merges only identical vertices
+        '''
+
+        vectors = asarray(vectors)
+        points = vectors.reshape(-1, 3)
+
+        # integer keys of the vertices
+        if tol:
+            keys = rint(points / tol).astype(int64) # numpy
+        else:
+            keys = points.view(int32 if points.dtype == float32 else int64).astype(int64)
+
+        first, inverse = _unique_rows(keys)
+
+        return cls(points[first], inverse.reshape(-1, 3))
+
+    # derived arrays ------------------------------------------------------------------
+
+    # array with shape (m,3,3) of the corners of every face
+    @property
+    def triangles(self):
+        return self.vertices[self.faces]
+
+    # unit normals of the faces by the right hand rule, zero for degenerate faces
+    @property
+    def normals(self):
+
+        if self._normals is None:
+            self._face_cross()
+
+        return self._normals
+
+    # areas of the faces
+    @property
+    def areas(self):
+
+        if self._areas is None:
+            self._face_cross()
+
+        return self._areas
+
+    # array with shape (k,2) of the unique edges, lower vertex index first
+    @property
+    def edges(self):
+
+        if self._edges is None:
+            self._find_edges()
+
+        return self._edges
+
+    # array with shape (m,3) of the edges of every face, as indices into edges
+    @property
+    def face_edges(self):
+
+        if self._face_edges is None:
+            self._find_edges()
+
+        return self._face_edges
+
+    # array with shape (j,2) of pairs of faces that share an edge
+    @property
+    def adjacency(self):
+
+        if self._adjacency is None:
+
+            # face sides sorted by their edges, so faces sharing an edge are neighbors
+            order = self._edge_order
+            edge = self.face_edges.reshape(-1)[order]
+            face = order // 3
+            same = flatnonzero(edge[1:] == edge[:-1])
+
+            self._adjacency = concatenate((face[same][:, None], face[same + 1][:, None]),
+                                          axis=1).astype(int32)
+
+        return self._adjacency
+
+    # number of faces that use every edge
+    @property
+    def edge_counts(self):
+        return bincount(self.face_edges.reshape(-1), minlength=len(self.edges))
+
+    # zindex of the faces by height, for finding the faces crossing planes
+    @property
+    def zindex(self):
+
+        if self._zindex is None:
+            from .zindex import zindex
+            self._zindex = zindex.from_mesh(self)
+
+        return self._zindex
+
+    # low and high corners of the mesh
+    @property
+    def bounds(self):
+        return self.vertices.min(axis=0), self.vertices.max(axis=0)
+
+    # volume, area, normals and edge checks
+    def stats(self, chunk=1000000):
+        '''
+        Parameters:
+
+        > CHUNK: the most faces measured at once
+
+        Returns the dictionary of metrics.py meshstats, with exact edge keys
+        from the vertex indices
+        '''
+
+        from .metrics import meshstats
+        return meshstats(self, chunk)
+
+    # hidden methods -----------------------------------------------------------------
+
+    # computes normals and areas from the cross product of two sides of every face
+    def _face_cross(self):
+
+        tri = self.triangles.astype(float64)
+        c = cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]) # numpy
+        length = norm(c, axis=1) # numpy
+
+        self._areas = length / 2
+        self._normals = c / (length + (length == 0))[:, None]
+        return
+
+    # finds the unique edges and the edges of every face
+    def _find_edges(self):
+
+        # three edges of every face with the lower vertex first
+        pairs = self.faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+        pairs = sort(pairs, axis=1) # numpy
+
+        # one integer key per edge
+        key = pairs[:, 0].astype(int64) * len(self.vertices) + pairs[:, 1]
+        first, inverse, order = _group(key)
+
+        self._edges = pairs[first]
+        self._face_edges = inverse.reshape(-1, 3)
+
+        # kept for adjacency
+        self._edge_order = order
+        return
+
+    # methods for builtin function access ---------------------------------------------
+
+    def __len__(self):
+        return len(self.faces)
+
+    def __repr__(self):
+        return 'gmesh of {} vertices and {} faces'.format(len(self.vertices), len(self.faces))
+    def __str__(self):
+        return self.__repr__()
+
+
+# numbers equal keys in sorted order. faster than unique with return_inverse,
+# which sorts twice and stably
+def _group(key):
+    '''
+    Returns the index of one key of every group, the group of every key, and
+    the order that sorts the keys
+    '''
+
+    order = key.argsort() # numpy
+    ordered = key[order]
+
+    new = empty(len(key), dtype=bool) # numpy
+    new[:1] = True
+    new[1:] = ordered[1:] != ordered[:-1]
+
+    inverse = empty(len(key), dtype=int32) # numpy
+    inverse[order] = cumsum(new) - 1
+
+    return order[new], inverse, order
+
+
+# gives one row of every unique row of an integer array and the inverse
+def _unique_rows(keys):
+
+    # rows are grouped by a 64 bit hash, wrapping around on overflow
+    with errstate(over='ignore'):
+        hashed = (keys[:, 0] * int64(-7046029254386353131) ^ keys[:, 1] * int64(6151979557785837349)
+                  ^ keys[:, 2] * int64(-4658895280553007687)) # numpy
+
+    first, inverse, _ = _group(hashed)
+
+    # checking that no two different rows have the same hash
+    if (keys[first][inverse] == keys).all():
+        return first, inverse
+
+    # sorting the rows and numbering the changes
+    order = lexsort(keys.T[::-1]) # numpy
+    ordered = keys[order]
+    new = concatenate(([True], any(diff(ordered, axis=0) != 0, axis=1))) # numpy
+    group = cumsum(new) - 1 # numpy
+
+    inverse = empty(len(keys), dtype=int32) # numpy
+    inverse[order] = group
+
+    return order[new], inverse
+
+
+# reads an stl file into a gmesh
+def readmesh(file, tol=1e-6):
+    '''
+    Parameters:
+
+    > FILE: the name of the stl file, or an stlmap
+    > TOL: vertices that round to the same multiple of TOL are merged
+    '''
+
+    from .stl import readstl
+
+    if isinstance(file, str):
+        vectors = readstl(file, xyz=False, normals=False)[0]
+    else:
+        vectors = file.vectors
+
+    return gmesh.from_triangles(vectors, tol)
@@ -0,0 +1,276 @@
+'''
+Module that contains a class to profile reading, writing and saving GCODE
+
+Written by Ryan Zambrotta
+'''
+from time import perf_counter
+from sys import getsizeof
+from os.path import getsize
+import json
+
+
+# profiles entered as context managers. gcode objects created inside the
+# with block are profiled by the innermost one
+_active = []
+
+
+# class that records the time spent in each stage of a gcode object
+class gprofile():
+
+    # methods of gcode that are timed as stages other than the GCODE commands.
+    # _gline builds the line objects and _format formats numbers with the settings
+    stages = ['_gline', '_format', '_move_format', 'write', '_pos_update', '_time', '_extrude',
+              'save']
+
+    def __init__(self):
+        '''
+        Use as a context manager or pass to gcode:
+
+            with gprofile() as prof:
+                g = read(file)
+            prof.to_json('profile.json')
+
+            g = gcode(profile=True)
+            g.profile.to_dict()
+
+        * Notes: a gcode object without a profile is never wrapped, and calls
+            gline and its settings' format directly instead of through the
+            _gline and _format stages, so profiling adds no calls when it is off
+        '''
+
+        # exclusive seconds spent in each stage
+        self.timers = {}
+
+        # number of calls to each stage
+        self.calls = {}
+
+        # lines and bytes handled by read and save
+        self.read_lines = 0
+        self.read_bytes = 0
+        self.read_time = 0
+        self.save_bytes = 0
+
+        # largest memory of code and history in bytes, sampled when a read or
+        # save finishes
+        self.sampled_peak = 0
+
+        # the profiled gcode objects
+        self.codes = []
+
+        # time spent in the children of the stages that are running
+        self._stack = []
+
+        # end of init
+        return
+
+    # methods ----------------------------------------------------------------------
+
+    # method that wraps the methods of a gcode object with timers
+    def attach(self, code):
+        '''
+        Parameters:
+
+        > CODE: the gcode object to profile
+        '''
+
+        self.codes.append(code)
+
+        # the GCODE commands are timed by method name
+        for key, method in code.gcode_methods.items():
+            timed = self.wrap(method.__name__, method)
+            code.gcode_methods[key] = timed
+            setattr(code, method.__name__, timed)
+
+        # hidden methods where the work is done
+        for name in self.stages:
+            setattr(code, name, self.wrap(name, getattr(code, name)))
+
+        return
+
+
+    # method that returns func timed as stage
+    def wrap(self, stage, func):
+        '''
+        Parameters:
+
+        > STAGE: the name the time is recorded under
+        > FUNC: the function to time
+
+        * Notes: the time is exclusive. Time spent in other timed stages called
+            by FUNC is recorded under those stages
+        '''
+
+        self.timers.setdefault(stage, 0)
+        self.calls.setdefault(stage, 0)
+
+        def timed(*args, **kwargs):
+
+            # collecting the time of timed stages called by func
+            self._stack.append(0)
+            start = perf_counter()
+
+            try:
+                return func(*args, **kwargs)
+
+            finally:
+                elapsed = perf_counter() - start
+                self.timers[stage] += elapsed - self._stack.pop()
+                self.calls[stage] += 1
+
+                # this time belongs to the stage that called func
+                if self._stack:
+                    self._stack[-1] += elapsed
+
+        # keeping the name so code that looks methods up by name still works
+        timed.__name__ = func.__name__
+
+        return timed
+
+
+    # method to start timing a stage that is not a function, such as tokenizing in read.
+    # every start needs a stop, in a finally block if the stage can raise
+    def start(self, stage):
+        self.timers.setdefault(stage, 0)
+        self.calls.setdefault(stage, 0)
+        self._stack.append(0)
+        return perf_counter()
+
+
+    # method to stop timing a stage started with start. returns the inclusive time
+    def stop(self, stage, start):
+        elapsed = perf_counter() - start
+        self.timers[stage] += elapsed - self._stack.pop()
+        self.calls[stage] += 1
+        if self._stack:
+            self._stack[-1] += elapsed
+        return elapsed
+
+
+    # method called by read once a file has been read
+    def read_done(self, code, file, elapsed):
+        '''
+        Parameters:
+
+        > CODE: the gcode object that was read into
+        > FILE: the file name or list of lines that was read
+        > ELAPSED: the total time reading in seconds
+        '''
+
+        self.read_time += elapsed
+        self.read_lines += code.count
+
+        # number of bytes read
+        if isinstance(file, str):
+            self.read_bytes += getsize(file)
+        else:
+            self.read_bytes += sum(len(i) for i in file)
+
+        self.memory(code)
+        return
+
+
+    # method called by save once a file has been written
+    def save_done(self, code, file):
+        self.save_bytes += getsize(file)
+        self.memory(code)
+        return
+
+
+    # method that measures the memory of code and history and updates the sampled peak
+    def memory(self, code):
+        '''
+        Parameters:
+
+        > CODE: the gcode object to measure
+
+        Returns the bytes held by the lists code and history and their elements
+
+        * Notes: this is a sample at the time of the call, made when a read or
+            save finishes. Temporary memory in between is not seen, so the
+            largest sample is not a true peak. Use tracemalloc for that
+        '''
+
+        size = getsizeof(code.code) + sum(getsizeof(i) for i in code.code)
+        size += getsizeof(code.history)
+        if code.history:
+            # every position is a numpy array with shape (3,)
+            size += len(code.history) * getsizeof(code.history[0])
+
+        self.sampled_peak = max(self.sampled_peak, size)
+        return size
+
+
+    # method that gives all of the results
+    def to_dict(self):
+        '''
+        Returns a dictionary with the keys:
+
+        > TIMERS: exclusive seconds spent in each stage
+        > CALLS: number of calls to each stage
+        > OPCODES: the number of lines written for each GCODE command
+        > THROUGHPUT: lines and bytes per second for read and bytes per second for save
+        > MEMORY: the current bytes of code and history and the largest sampled
+            when a read or save finished, see memory
+        '''
+
+        # lines written for each command by all profiled gcode objects
+        opcodes = {}
+        for code in self.codes:
+            for key, n in code.stats['opcodes'].items():
+                opcodes[key] = opcodes.get(key, 0) + n
+
+        save_time = self.timers.get('save', 0)
+
+        return {'timers':dict(self.timers),
+                'calls':dict(self.calls),
+                'opcodes':opcodes,
+                'throughput':{
+                    'read_lines_per_sec':self.read_lines/self.read_time if self.read_time else 0,
+                    'read_bytes_per_sec':self.read_bytes/self.read_time if self.read_time else 0,
+                    'save_bytes_per_sec':self.save_bytes/save_time if save_time else 0},
+                'memory':{
+                    'current':sum(self.memory(code) for code in self.codes),
+                    'sampled_peak':self.sampled_peak}}
+
+
+    # method that gives the results as a JSON string and optionally writes them to file
+    def to_json(self, file=None, indent=2):
+        '''
+        Parameters:
+
+        > FILE: if given, the JSON is also written to this file
+        > INDENT: passed to json.dumps
+        '''
+
+        text = json.dumps(self.to_dict(), indent=indent)
+
+        if file:
+            with open(file, 'w') as f:
+                f.write(text)
+
+        return text
+
+    # ---------------------------------------------------------------------------------
+    # methods for builtin function access
+
+    # context manager so gcode objects created inside the block are profiled
+    def __enter__(self):
+        _active.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _active.remove(self)
+        return False
+
+    # creates a table of the stage times for the stages that were called
+    def __repr__(self):
+        rows = sorted(self.timers.items(), key=lambda i: -i[1])
+        return '\n'.join('{:<20}{:>12.6f} s{:>10} calls'.format(k, v, self.calls[k])
+                         for k, v in rows if self.calls[k])
+    def __str__(self):
+        return self.__repr__()
+
+
+# gives the profile of the innermost with block, or None
+def active():
+    return _active[-1] if _active else None
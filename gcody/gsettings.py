@@ -5,7 +5,7 @@ class gsettings():
 
     # init method contains all the default options
     def __init__(self, pos_str='{:0.4f}',speed_str='{:0.0f}',
-                 extrude_str='{:0.4f}', graphics='matplotlib'):
+                 extrude_str='{:0.4f}', graphics='matplotlib', lod=100000):
 
         # assigning values to memory
         # these are the string formatters when writing numbers to gcode
@@ -15,6 +15,10 @@ class gsettings():
         # it everytime for different types of figures
         self.graphics = graphics
 
+        # the most points the viewers draw. larger paths are decimated.
+        # None draws every point
+        self.lod = lod
+
         # end of init
         return
 
@@ -0,0 +1,140 @@
+'''
+Module that accumulates the time (or filament) of every motion into a 2D pixel
+or 3D voxel grid, to show where the machine spends its time
+
+Written by Ryan Zambrotta
+'''
+from .raster import colormap
+from numpy import (asarray, diff, concatenate, zeros, ones, arange, repeat, cumsum, ceil,
+                   maximum, minimum, searchsorted, ravel_multi_index, bincount, clip,
+                   linspace, log1p, ndim, float64, intp, uint8)
+
+
+# the axes of history binned for each plane
+PLANES = {'xy':(0, 1), 'xz':(0, 2), 'yz':(1, 2), 'xyz':(0, 1, 2)}
+
+
+# accumulates the weight of every segment of a path into a grid
+def density(points, weights, bins=256, plane='xy', limits=None, samples=20000000,
+            chunk=4194304):
+    '''
+    Parameters:
+
+    > POINTS: array with shape (n,3) of the path. The path starts at the first point
+    > WEIGHTS: array with shape (n,) of the running total (time or filament) at
+        every point. The weight of a segment is the change between its ends
+    > BINS: the number of bins, either one number for every axis or one per axis
+    > PLANE: the axes binned, one of 'xy', 'xz', 'yz' or 'xyz' for voxels
+    > LIMITS: low and high of every binned axis, [lo0, hi0, lo1, hi1, ...].
+        Defaults to the extent of the path
+    > SAMPLES: the most samples taken over the whole path
+    > CHUNK: the most samples held in memory at once
+
+    Returns the grid, indexed in the order of PLANE, and a list of the bin edges
+    of every axis
+
+    * Notes: every segment is split into one sample per bin it crosses, each
+        carrying an equal share of its weight, so long moves spread their time
+        along their length and dwells (zero length) stay on their point. When
+        the path needs more than SAMPLES samples, the samples per segment are
+        scaled down. The total weight is unchanged either way
+    '''
+
+    axes = PLANES[plane]
+    points = asarray(points, dtype=float64)[:, axes]
+    weights = asarray(weights, dtype=float64)
+
+    # bins per axis
+    if ndim(bins) == 0:
+        bins = (bins,)*len(axes)
+    bins = asarray(bins, dtype=intp)
+
+    # low and high of the grid. a flat axis is given a width of one
+    if limits is None:
+        lo = points.min(axis=0) if len(points) else zeros(len(axes))
+        hi = points.max(axis=0) if len(points) else ones(len(axes))
+    else:
+        lo = asarray(limits[0::2], dtype=float64)
+        hi = asarray(limits[1::2], dtype=float64)
+    hi = maximum(hi, lo + (hi == lo))
+    cell = (hi - lo) / bins
+
+    grid = zeros(bins.prod(), dtype=float64) # numpy
+    edges = [linspace(lo[i], hi[i], bins[i] + 1) for i in range(len(axes))]
+
+    if len(points) < 2:
+        return grid.reshape(bins), edges
+
+    # segments and their weights
+    start = points[:-1]
+    step = diff(points, axis=0) # numpy
+    w = diff(weights) # numpy
+
+    # one sample for every bin crossed, at least one for every segment
+    k = ceil((abs(step) / cell).max(axis=1)).astype(intp) # numpy
+    k = maximum(k, 1)
+    if k.sum() > samples:
+        k = maximum((k * (samples / k.sum())).astype(intp), 1)
+
+    # weight carried by every sample of a segment
+    share = w / k
+
+    # first sample of every segment
+    first = concatenate(([0], cumsum(k))) # numpy
+
+    # accumulating chunks of whole segments
+    i = 0
+    while i < len(k):
+        j = max(searchsorted(first, first[i] + chunk, side='right') - 1, i + 1)
+
+        # the segment of every sample and its place along the segment
+        n = k[i:j]
+        seg = repeat(arange(i, j), n) # numpy
+        frac = (arange(first[i], first[j]) - repeat(first[i:j], n) + 0.5) / repeat(n, n)
+
+        # sample positions to bin indices
+        pos = start[seg] + frac[:, None] * step[seg]
+        index = clip(((pos - lo) / cell).astype(intp), 0, bins - 1) # numpy
+        flat = ravel_multi_index(tuple(index.T), bins) # numpy
+
+        grid += bincount(flat, weights=share[seg], minlength=len(grid)) # numpy
+        i = j
+
+    return grid.reshape(bins), edges
+
+
+# converts a 2D grid to an RGB image with the low axis values at the bottom left
+def heat_image(grid, cmap='inferno', log=True, file=None):
+    '''
+    Parameters:
+
+    > GRID: array with shape (nx, ny) from density
+    > CMAP: one of the colormaps in raster.py COLORMAPS
+    > LOG: scales the values with log(1 + value / mean of the nonzero values)
+        so short dense features show next to long dwells
+    > FILE: if given, the image is saved to this file with Pillow
+
+    Returns the image as an array with shape (ny, nx, 3) of uint8
+    '''
+
+    grid = asarray(grid, dtype=float64)
+    if grid.ndim != 2:
+        raise ValueError('heat_image needs a 2D grid, sum a voxel grid over an axis first')
+
+    # scaling to 0-1
+    value = grid
+    if log and (grid > 0).any():
+        value = log1p(grid / grid[grid > 0].mean()) # numpy
+    top = value.max()
+    if top > 0:
+        value = value / top
+
+    # rows of an image go down, so y is flipped. RGBA bytes of the colors, from raster.py
+    level = (minimum(value, 1).T[::-1] * 255).astype(intp)
+    image = colormap(cmap)[level.ravel()].view(uint8).reshape(level.shape + (4,))[..., :3].copy()
+
+    if file:
+        from PIL import Image
+        Image.fromarray(image).save(file)
+
+    return image
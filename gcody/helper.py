@@ -1,5 +1,5 @@
 # File contains many helper function for gcode
-from numpy import array, floor, log10
+from numpy import array, floor, log10, pi
 
 
 
@@ -136,3 +136,11 @@ def min2sec(t=1):
 # convert seconds to minutes
 def sec2min(t=1):
     return t/60
+
+
+## --------------------------------------------------------------------------------------
+## extrusion
+
+# cross sectional area of filament with diameter d
+def filament_area(d=1.75):
+    return pi*(d/2)**2
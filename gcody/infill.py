@@ -0,0 +1,143 @@
+'''
+Module that fills closed contours with parallel lines, all lines of all layers
+at once
+
+Written by Ryan Zambrotta
+'''
+from numpy import (asarray, array, arange, zeros, ones, full, repeat, cumsum, concatenate, diff,
+                   ceil, lexsort, flatnonzero, bincount, minimum, maximum, where, radians,
+                   sin, cos, sqrt, float64, int64, intp)
+
+
+# fills closed contours with lines in serpentine order
+def rectilinear(points, start=None, layer=None, spacing=1, angle=45, alternate=True,
+                grid=False):
+    '''
+    Parameters:
+
+    > POINTS: array with shape (n,2) of the points of every contour, one after
+        another, or a list of arrays with shape (m,2) of the contours of one layer
+    > START: array with shape (c+1,) of the first point of every contour and the
+        end of the last. Not needed with a list of contours
+    > LAYER: array with shape (c,) of the layer of every contour. Defaults to
+        one layer
+    > SPACING: the distance between the lines
+    > ANGLE: the direction of the lines in degrees from the x axis
+    > ALTERNATE: turns the lines 90 degrees on every other layer
+    > GRID: fills every layer with lines in both directions
+
+    Returns an array with shape (k,2,2) of the start and end of every line, in
+    print order, and an array with shape (k,) of the layer of every line
+
+    * Notes: the contours of a layer are filled by the even-odd rule, so holes
+        are left empty whichever way they run. The lines are taken along
+        scanlines at SPACING*(i + 1/2) from the origin across the direction of
+        the lines, so lines of different layers line up. Every edge gives the
+        scanlines from its low end up to, but not including, its high end, found
+        with two roundings, and the crossings are sorted by layer, scanline and
+        position. Scanlines run in turn forward and backward (serpentine)
+    '''
+
+    # a list of contours of one layer
+    if start is None:
+        sizes = [len(c) for c in points]
+        start = concatenate(([0], cumsum(sizes))).astype(intp) # numpy
+        points = concatenate(points) if len(points) else zeros((0, 2)) # numpy
+
+    points = asarray(points, dtype=float64)
+    start = asarray(start, dtype=intp)
+    size = diff(start) # numpy
+    if layer is None:
+        layer = zeros(len(size), dtype=intp) # numpy
+    layer = asarray(layer, dtype=intp)
+
+    # every pass is a layer and a direction. grid has two passes a layer
+    turns = [0, 90] if grid else [0]
+    npass = len(turns)
+
+    # the next point of every point, wrapping around its contour
+    following = arange(1, len(points) + 1) # numpy
+    following[start[1:] - 1] = start[:-1]
+
+    # edges of every pass
+    edge = arange(len(points)) # numpy
+    pass_id = (repeat(layer, size)[:, None]*npass + arange(npass)).reshape(-1) # numpy
+    edge = repeat(edge, npass) # numpy
+    turn = array(turns, dtype=float64)[pass_id % npass]
+    if alternate and not grid:
+        turn = turn + 90*(pass_id // npass % 2)
+    theta = radians(angle + turn) # numpy
+
+    # both ends of every edge turned so the lines run along u
+    c, s = cos(theta), sin(theta) # numpy
+    a, b = points[edge], points[following[edge]]
+    ua, va = a[:, 0]*c + a[:, 1]*s, a[:, 1]*c - a[:, 0]*s
+    ub, vb = b[:, 0]*c + b[:, 1]*s, b[:, 1]*c - b[:, 0]*s
+
+    # the scanlines from the low end of every edge up to its high end
+    low, high = minimum(va, vb), maximum(va, vb)
+    first = ceil(low/spacing - 0.5).astype(int64) # numpy
+    count = ceil(high/spacing - 0.5).astype(int64) - first # numpy
+
+    # every crossing of an edge with a scanline
+    e = repeat(arange(len(edge)), count) # numpy
+    line = first[e] + arange(len(e)) - repeat(cumsum(count) - count, count)
+    v = spacing*(line + 0.5)
+    u = ua[e] + (v - va[e])*(ub[e] - ua[e])/(vb[e] - va[e])
+
+    # crossings of every scanline in order, backward on every other scanline
+    p = pass_id[e]
+    backward = line % 2 == 1
+    order = lexsort((where(backward, -u, u), line, p)) # numpy
+    u, v, line, p, theta_e = u[order], v[order], line[order], p[order], theta[e[order]]
+
+    # crossings are paired in turn along a scanline, the first of a pair starts inside
+    new = ones(len(line), dtype=bool)
+    new[1:] = (line[1:] != line[:-1]) | (p[1:] != p[:-1])
+    group = cumsum(new) - 1 # numpy
+    rank = arange(len(line)) - flatnonzero(new)[group] # numpy
+    begin = flatnonzero((rank % 2 == 0) & (rank + 1 < bincount(group)[group])) # numpy
+
+    # turning the lines back
+    c, s = cos(theta_e[begin]), sin(theta_e[begin]) # numpy
+    lines = zeros((len(begin), 2, 2)) # numpy
+    for i, j in enumerate((begin, begin + 1)):
+        lines[:, i, 0] = u[j]*c - v[j]*s
+        lines[:, i, 1] = u[j]*s + v[j]*c
+
+    return lines, p[begin] // npass
+
+
+# writes lines as one batch move, extruding along every line and not between them
+def write_lines(g, lines, z, area, speed, travel_speed=None):
+    '''
+    Parameters:
+
+    > G: the gcode object to write to
+    > LINES: array with shape (k,2,2) of the start and end of every line
+    > Z: the height of the lines
+    > AREA: the filament fed per unit length of line
+    > SPEED: the speed along the lines in units of unit_sys per second
+    > TRAVEL_SPEED: the speed of the moves to the start of every line. Defaults
+        to SPEED
+
+    * Notes: the move to the start of every line feeds no filament, so it is
+        recorded as travel. The extrusion follows the EXTRUDE_MODE of G
+    '''
+
+    if not len(lines):
+        return
+
+    path = lines.reshape(-1, 2)
+
+    # filament of every move. moves to the start of a line feed nothing
+    fed = zeros(len(path)) # numpy
+    fed[1::2] = area * sqrt(((lines[:, 1] - lines[:, 0])**2).sum(axis=1)) # numpy
+    if g.extrude_mode == 'abs':
+        fed = g.current_e + cumsum(fed) # numpy
+
+    # travel to the start of every line, print along it
+    speeds = full(len(path), speed, dtype=float64) # numpy
+    speeds[0::2] = speed if travel_speed is None else travel_speed
+
+    g.move(path[:, 0], path[:, 1], z + zeros(len(path)), speed=speeds, extrude=fed)
@@ -0,0 +1,154 @@
+'''
+Module that contains level of detail tools to reduce the number of points drawn
+by the viewers
+
+Written by Ryan Zambrotta
+'''
+from numpy import (asarray, arange, unique, concatenate, flatnonzero, searchsorted, minimum,
+                   maximum, clip, einsum, argsort, argpartition, cumsum, ones, zeros, full,
+                   diff, float64)
+
+
+# reduces a path to at most budget points with the Ramer-Douglas-Peucker algorithm
+def decimate(points, budget=100000, tol=0, keep=None, rounds=24):
+    '''
+    Parameters:
+
+    > POINTS: array with shape (n,3) of the path
+    > BUDGET: the maximum number of points to keep. The path is returned
+        unchanged if it already fits
+    > TOL: points closer than TOL to the simplified path are never kept. With the
+        default of zero, only points exactly on a straight run are dropped
+    > KEEP: optional array of indices that are always kept
+    > ROUNDS: the most rounds of splitting. What is left of the budget after
+        the last round goes to the farthest of the remaining points
+
+    Returns the sorted indices of the kept points
+
+    * Notes: the first and last points and both sides of every layer boundary
+        (a change in z) are always kept, unless the boundaries alone would take
+        more than half of the budget. Every round splits all of the simplified
+        segments at once at the point farthest from them, so direction changes
+        are kept before points on gentle curves. Paths of more than twice the
+        budget are first cut into bins of consecutive points, and only the ends
+        of every bin and its point farthest from the line between them take part
+        in the rounds. An eighth of the budget is spread evenly along the path
+        before the rounds start, so the work is one pass over the path and a few
+        passes over about 1.5 times the budget
+    '''
+
+    points = asarray(points, dtype=float64)
+    n = len(points)
+
+    # nothing to do
+    if n <= budget or n <= 2:
+        return arange(n)
+
+    # endpoints and layer boundaries. a path where z changes nearly everywhere,
+    # like a spiral vase or touch probing, has no layers to keep
+    layer = flatnonzero(diff(points[:, 2]) != 0) # numpy
+    if 2*len(layer) > budget/2:
+        layer = layer[:0]
+    kept = [[0, n - 1], layer, layer + 1]
+    if keep is not None:
+        kept.append(asarray(keep, dtype=int))
+
+    # points that may be kept. long paths are narrowed to a few points per bin,
+    # and evenly spaced points start the simplified path so few rounds are needed
+    free = ones(n, dtype=bool) if n <= 2*budget else _bin_candidates(points, budget // 2)
+    kept.append(arange(0, n, -(-n // max(budget // 8, 1)))) # numpy
+    kept = unique(concatenate(kept)) # numpy
+    free[kept] = False
+
+    # rounding error of the distances is not a direction change
+    tol = max(tol, 1e-9*(points.max(axis=0) - points.min(axis=0)).max())
+    i = flatnonzero(free)
+    d = None
+
+    # splitting segments until the budget or the tolerance is reached
+    for _ in range(rounds):
+        if len(kept) >= budget or len(i) == 0:
+            break
+
+        # the segment between kept points every free point is on. the free
+        # points are sorted so each segment's points are contiguous
+        seg = searchsorted(kept, i) - 1
+        step = diff(seg, prepend=-1) != 0
+        start = flatnonzero(step) # numpy
+        group = cumsum(step) - 1 # numpy
+
+        # distance of every free point to its segment
+        d = _segment_distance(points[i], points[kept[seg]], points[kept[seg + 1]])
+
+        # farthest point of each segment. ties go to the first point
+        top = maximum.reduceat(d, start) # numpy
+        far = flatnonzero(d == top[group])
+        far = far[diff(group[far], prepend=-1) != 0]
+
+        # segments already within the tolerance are done
+        split = top > tol
+        far = far[split]
+        if len(far) == 0:
+            i = i[:0]
+            break
+
+        # only the farthest of the candidates when the budget would be exceeded
+        room = budget - len(kept)
+        if len(far) > room:
+            far = far[argsort(d[far])[-room:]]
+
+        kept = unique(concatenate((kept, i[far]))) # numpy
+
+        # dropping the new kept points and the points of finished segments
+        alive = split[group]
+        alive[far] = False
+        i, d = i[alive], d[alive]
+
+    # out of rounds, the rest of the budget goes to the farthest points left
+    room = budget - len(kept)
+    if room > 0 and len(i) and d is not None:
+        far = i[d > tol]
+        if len(far) > room:
+            far = far[argpartition(d[d > tol], -room)[-room:]] # numpy
+        kept = unique(concatenate((kept, far))) # numpy
+
+    return kept
+
+
+# the ends of every bin of consecutive points and its point farthest from the
+# line between them, as a boolean array with shape (n,)
+def _bin_candidates(points, bins):
+
+    n = len(points)
+    width = -(-n // bins)
+    ends = minimum(arange(width - 1, n + width - 1, width), n - 1) # numpy
+    first = ends - (ends % width)
+
+    # distance of every point to the line between the ends of its bin
+    b = arange(n) // width # numpy
+    d = _segment_distance(points, points[first[b]], points[ends[b]])
+
+    # the farthest point of every bin, from the bins as rows of a padded array
+    padded = full(len(ends)*width, -1.) # numpy
+    padded[:n] = d
+    far = first + padded.reshape(-1, width).argmax(axis=1)
+
+    candidate = zeros(n, dtype=bool) # numpy
+    candidate[first] = candidate[ends] = candidate[far] = True
+    return candidate
+
+
+# distance from points p to the segments a-b, all arrays with shape (n,3)
+def _segment_distance(p, a, b):
+
+    ab = b - a
+    ap = p - a
+
+    # position along the segment clipped to its ends
+    length = einsum('ij,ij->i', ab, ab) # numpy
+    s = einsum('ij,ij->i', ap, ab) / maximum(length, 1e-300)
+    s = clip(s, 0, 1) # numpy
+
+    # distance to the closest point on the segment
+    r = ap - s[:, None]*ab
+    return einsum('ij,ij->i', r, r)**0.5
@@ -0,0 +1,175 @@
+'''
+Module that measures triangle meshes and checks that they are closed and
+manifold, with whole array operations over chunks of triangles
+
+Written by Ryan Zambrotta
+'''
+from numpy import (asarray, array, empty, concatenate, cross, einsum, sqrt, minimum, maximum,
+                   flatnonzero, errstate, diff, float32, float64, uint32, uint64)
+
+
+# 64 bit odd multipliers that mix the bits of the keys
+_MIX = (uint64(0x9E3779B97F4A7C15), uint64(0xC2B2AE3D27D4EB4F), uint64(0x165667B19E3779F9),
+        uint64(0xD6E8FEB86659FD93), uint64(0xFF51AFD7ED558CCD))
+
+
+# measures a mesh and checks its edges
+def meshstats(mesh, chunk=1000000):
+    '''
+    Parameters:
+
+    > MESH: a gmesh, an stlmap, the name of an stl file, or an array with shape
+        (m,3,3) of the corners of every triangle
+    > CHUNK: the most triangles measured at once
+
+    Returns a dictionary with the keys:
+
+    > COUNT: the number of triangles
+    > VOLUME: the enclosed volume, positive when the faces are wound
+        counterclockwise seen from outside
+    > AREA: the surface area
+    > MIN, MAX: numpy arrays of the low and high corners of the bounding box
+    > NORMALS: array with shape (m,3) of the unit normals found from the
+        corners by the right hand rule, zero for degenerate triangles
+    > DEGENERATE: the number of triangles with no area
+    > EDGES: the number of distinct edges
+    > BOUNDARY: the number of edges of only one triangle (holes)
+    > NONMANIFOLD: the number of edges of more than two triangles
+    > FLIPPED: the number of edges of two triangles that run the same way
+        along it, so one of the triangles is wound backward
+    > WATERTIGHT: True if every edge belongs to exactly two triangles
+    > MANIFOLD: True if no edge belongs to more than two triangles. A mesh with
+        holes can be manifold, with a boundary
+    > ORIENTED: True if no edge is flipped, so neighboring triangles are wound
+        the same way. VOLUME is the volume of a solid only when the mesh is
+        watertight and oriented
+
+    WATERTIGHT, MANIFOLD and ORIENTED are None for a mesh with no triangles
+
+    * Notes: the volume is the sum of the signed tetrahedra from the first
+        corner to every triangle, and the area is half the length of the cross
+        products, all in float64. Edges are checked with one sort of a key for
+        every side of every triangle, with the direction of the side in its
+        lowest bit. A gmesh gives its vertex indices as keys. Triangles give a
+        64 bit hash of the exact coordinates of their corners, so two different
+        edges sharing a hash, which is very unlikely, count as one edge
+    '''
+
+    from .gmesh import gmesh
+
+    # the triangles and the vertex keys of their corners
+    if isinstance(mesh, str):
+        from .stl import readstl
+        mesh = readstl(mesh, xyz=False, normals=False)[0]
+    elif hasattr(mesh, 'vectors') and not isinstance(mesh, gmesh):
+        mesh = mesh.vectors
+
+    if isinstance(mesh, gmesh):
+        triangles = lambda a, b: mesh.vertices[mesh.faces[a:b]]
+        corner_keys = lambda a, b: mesh.faces[a:b].astype(uint64)
+        n = len(mesh.vertices)
+        m = len(mesh.faces)
+    else:
+        vectors = asarray(mesh).reshape(-1, 3, 3)
+        triangles = lambda a, b: vectors[a:b]
+        corner_keys = lambda a, b: _vertex_hash(vectors[a:b])
+        n = None
+        m = len(vectors)
+
+    volume = area = 0.
+    degenerate = 0
+    low, high = None, None
+    normals = empty((m, 3), dtype=float32) # numpy
+    keys = empty(3*m, dtype=uint64) # numpy
+
+    origin = asarray(triangles(0, 1), dtype=float64).reshape(-1, 3)[:1]
+
+    for a in range(0, m, chunk):
+        b = min(a + chunk, m)
+
+        # corners relative to the first corner of the mesh, for precision
+        tri = asarray(triangles(a, b), dtype=float64) - origin
+        p, q, r = tri[:, 0], tri[:, 1], tri[:, 2]
+
+        # areas and normals from the cross product of two sides
+        c = cross(q - p, r - p) # numpy
+        length = sqrt(einsum('ij,ij->i', c, c)) # numpy
+        area += length.sum() / 2
+        degenerate += int((length == 0).sum())
+        normals[a:b] = c / (length + (length == 0))[:, None]
+
+        # signed tetrahedra from the origin to every triangle. p.(q x r) is p.c
+        volume += einsum('ij,ij->', p, c) / 6 # numpy
+
+        # bounding box, one axis at a time
+        lo = array([tri[:, :, k].min() for k in range(3)]) # numpy
+        hi = array([tri[:, :, k].max() for k in range(3)]) # numpy
+        low = lo if low is None else minimum(low, lo)
+        high = hi if high is None else maximum(high, hi)
+
+        # keys of the sides of the triangles
+        keys[3*a:3*b] = _edge_keys(corner_keys(a, b), n)
+
+    edges, boundary, nonmanifold, flipped = _edge_check(keys)
+
+    return {'count':m,
+            'volume':volume,
+            'area':area,
+            'min':low + origin[0] if m else None,
+            'max':high + origin[0] if m else None,
+            'normals':normals,
+            'degenerate':degenerate,
+            'edges':edges,
+            'boundary':boundary,
+            'nonmanifold':nonmanifold,
+            'flipped':flipped,
+            'watertight':boundary == 0 and nonmanifold == 0 if m else None,
+            'manifold':nonmanifold == 0 if m else None,
+            'oriented':flipped == 0 if m else None}
+
+
+# a 64 bit hash of the exact coordinates of every corner
+def _vertex_hash(vectors):
+
+    # float32 bits, with -0 made 0 so both give the same key
+    bits = (asarray(vectors, dtype=float32) + float32(0)).view(uint32).astype(uint64)
+
+    with errstate(over='ignore'):
+        return bits[..., 0]*_MIX[0] ^ bits[..., 1]*_MIX[1] ^ bits[..., 2]*_MIX[2] # numpy
+
+
+# one key for every side of every triangle, with its direction in the lowest bit.
+# with the number of vertices n the keys are exact, otherwise they are hashed
+def _edge_keys(corners, n=None):
+
+    start = corners.reshape(-1)
+    end = corners[:, [1, 2, 0]].reshape(-1)
+    lo, hi = minimum(start, end), maximum(start, end)
+
+    if n:
+        edge = (lo*uint64(n) + hi) << uint64(1)
+    else:
+        with errstate(over='ignore'):
+            edge = (lo*_MIX[3] ^ hi*_MIX[4] ^ (hi >> uint64(29))) & ~uint64(1) # numpy
+
+    return edge | (start > end).astype(uint64)
+
+
+# counts the distinct, boundary, nonmanifold and flipped edges from the side keys
+def _edge_check(keys):
+
+    if not len(keys):
+        return 0, 0, 0, 0
+
+    keys.sort() # numpy
+
+    # sides of the same edge are next to each other
+    edge = keys >> uint64(1)
+    first = concatenate(([0], flatnonzero(edge[1:] != edge[:-1]) + 1, [len(keys)])) # numpy
+    count = diff(first) # numpy
+
+    # the two sides of an edge run opposite ways unless their keys are equal
+    two = first[:-1][count == 2]
+    flipped = int((keys[two] == keys[two + 1]).sum())
+
+    return len(count), int((count == 1).sum()), int((count > 2).sum()), flipped
@@ -0,0 +1,190 @@
+'''
+Module that exports animations of a path to GIF or MP4, rendering the frames
+in a pool of processes with matplotlib's Agg canvas
+
+Written by Ryan Zambrotta
+'''
+import os
+
+
+# state of a worker process: the shared path and the figure that draws it
+_worker = {}
+
+
+# sets up a worker with the path in shared memory and a figure to draw frames on
+def _frame_init(name, shape, size, dpi, ax_lim, ax_label, fig_title, elev, azim, kwargs):
+
+    # imports are here so reading and writing GCODE never loads matplotlib
+    from multiprocessing.shared_memory import SharedMemory
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from numpy import ndarray, float64
+
+    # the path is not copied, only mapped
+    shm = SharedMemory(name=name)
+    history = ndarray(shape, dtype=float64, buffer=shm.buf)
+
+    # one figure for every frame of this worker, only the line data changes
+    fig = Figure(figsize=(size[0]/dpi, size[1]/dpi), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, projection='3d')
+    ax.view_init(elev=elev, azim=azim)
+    line, = ax.plot([], [], [], **kwargs)
+
+    # setting axis sizes
+    if ax_lim is not None:
+        ax.set_xlim(ax_lim[0], ax_lim[1])
+        ax.set_ylim(ax_lim[2], ax_lim[3])
+        ax.set_zlim(ax_lim[4], ax_lim[5])
+
+    # labeling axes
+    if ax_label is not None:
+        ax.set_xlabel(ax_label[0])
+        ax.set_ylabel(ax_label[1])
+        ax.set_zlabel(ax_label[2])
+
+    # setting figure title
+    if fig_title:
+        ax.set_title(fig_title)
+
+    _worker.update(shm=shm, history=history, fig=fig, line=line)
+
+
+# draws the path up to end and returns the frame as RGB bytes
+def _frame(end):
+
+    history = _worker['history']
+    _worker['line'].set_data_3d(history[:end, 0], history[:end, 1], history[:end, 2])
+
+    canvas = _worker['fig'].canvas
+    canvas.draw()
+
+    # dropping alpha from the RGBA buffer
+    from numpy import asarray
+    return asarray(canvas.buffer_rgba())[..., :3].tobytes()
+
+
+# writes frames to a GIF with Pillow, one frame at a time as they arrive
+def _write_gif(file, frames, size, fps):
+    '''
+    * Notes: Pillow's save_all keeps every frame until the file is done, so
+        memory grows with the length of the animation. Here every frame is
+        encoded with its own palette and written before the next one is read,
+        with GifImagePlugin getheader and getdata. These are not documented, so
+        requirements.txt pins the Pillow versions they are tested with, and
+        save_all with a generator of the frames is used if they are missing
+    '''
+
+    from PIL import Image, GifImagePlugin
+
+    # up to 256 colors for every frame, as Pillow picks them when saving
+    images = (Image.frombytes('RGB', size, frame).convert('P', palette=Image.Palette.ADAPTIVE)
+              for frame in frames)
+
+    # the supported way, holding every frame until the end
+    if not (hasattr(GifImagePlugin, 'getheader') and hasattr(GifImagePlugin, 'getdata')):
+        first = next(images)
+        first.save(file, save_all=True, append_images=images, duration=int(1000/fps), loop=0)
+        return
+
+    with open(file, 'wb') as f:
+        for i, image in enumerate(images):
+
+            # the header with the palette of the first frame, looping forever
+            if i == 0:
+                f.writelines(GifImagePlugin.getheader(image, info={'loop':0})[0])
+
+            f.writelines(GifImagePlugin.getdata(image, duration=int(1000/fps),
+                                                include_color_table=True))
+
+        # trailer
+        f.write(b';')
+
+
+# writes frames to a video by piping them to ffmpeg
+def _write_ffmpeg(file, frames, size, fps, ffmpeg):
+
+    from subprocess import Popen, PIPE, DEVNULL
+
+    command = [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+               '-s', '{}x{}'.format(*size), '-r', str(fps), '-i', '-',
+               '-pix_fmt', 'yuv420p', file]
+
+    process = Popen(command, stdin=PIPE, stdout=DEVNULL)
+    try:
+        for frame in frames:
+            process.stdin.write(frame)
+    finally:
+        process.stdin.close()
+        process.wait()
+
+    if process.returncode:
+        raise RuntimeError('ffmpeg failed with exit code {}'.format(process.returncode))
+
+
+# renders the frames of an animation in parallel and writes them in order
+def export_animation(history, end, file, fps=10, size=(640, 480), dpi=100, ax_lim=None,
+                     ax_label=None, fig_title=None, elev=30, azim=-60, processes=None,
+                     chunksize=4, **kwargs):
+    '''
+    Parameters:
+
+    > HISTORY: array with shape (n,3) of the path
+    > END: the number of points drawn in every frame
+    > FILE: the file to write. A .gif is written with Pillow, anything else is
+        piped to ffmpeg, which must be installed
+    > FPS: frames per second
+    > SIZE: width and height of the frames in pixels
+    > DPI: dots per inch of the figure. Only changes the relative text and line size
+    > AX_LIM: x,y,z axis limits in x,y,z order from low to high
+    > AX_LABEL: the x,y,z axis labels
+    > FIG_TITLE: the title of every frame
+    > ELEV, AZIM: the camera elevation and azimuth in degrees
+    > PROCESSES: the number of worker processes. Defaults to the number of cpus
+    > CHUNKSIZE: the frames sent to a worker at once
+    > KWARGS: passed to matplotlib's plot for the line
+
+    Returns FILE
+
+    * Notes: the path is placed in shared memory once, so workers only receive
+        the frame number. Frames are written in order as soon as they are done,
+        so only the frames rendered ahead of the writer are held in memory
+    '''
+
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing.shared_memory import SharedMemory
+    from shutil import which
+    from numpy import asarray, ndarray, float64
+
+    history = asarray(history, dtype=float64).reshape(-1, 3)
+    size = (int(size[0]), int(size[1]))
+
+    # checking the writer before rendering anything
+    gif = os.path.splitext(file)[1].lower() == '.gif'
+    ffmpeg = None if gif else which('ffmpeg')
+    if not gif and ffmpeg is None:
+        raise RuntimeError('ffmpeg was not found, install it or save to a .gif file')
+
+    # copying the path to shared memory once for all of the workers
+    shm = SharedMemory(create=True, size=max(history.nbytes, 1))
+    try:
+        ndarray(history.shape, dtype=float64, buffer=shm.buf)[:] = history
+
+        initargs = (shm.name, history.shape, size, dpi, ax_lim, ax_label, fig_title,
+                    elev, azim, kwargs)
+
+        with ProcessPoolExecutor(processes, initializer=_frame_init, initargs=initargs) as pool:
+
+            # map gives the frames in order
+            frames = pool.map(_frame, [int(i) for i in end], chunksize=chunksize)
+
+            if gif:
+                _write_gif(file, frames, size, fps)
+            else:
+                _write_ffmpeg(file, frames, size, fps, ffmpeg)
+
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return file
@@ -0,0 +1,195 @@
+'''
+Module that draws previews of a path straight into a NumPy image, without
+matplotlib or a display. Images are saved with Pillow
+
+Written by Ryan Zambrotta
+'''
+from numpy import (asarray, array, zeros, full, arange, repeat, cumsum, concatenate, where,
+                   unique, abs, maximum, rint, searchsorted, linspace, interp, radians, sin,
+                   cos, float32, float64, intp, uint8, uint32)
+
+
+# camera elevation and azimuth in degrees of the named views
+VIEWS = {'top':(90, -90), 'front':(0, -90), 'side':(0, 0), 'iso':(35.264, -45)}
+
+
+# colormaps as evenly spaced RGB anchors, interpolated to 256 colors
+COLORMAPS = {
+    'jet':[(0, 0, 128), (0, 0, 255), (0, 128, 255), (0, 255, 255), (128, 255, 128),
+           (255, 255, 0), (255, 128, 0), (255, 0, 0), (128, 0, 0)],
+    'viridis':[(68, 1, 84), (72, 40, 120), (62, 74, 137), (49, 104, 142), (38, 130, 142),
+               (31, 158, 137), (53, 183, 121), (110, 206, 88), (181, 222, 43), (253, 231, 37)],
+    'inferno':[(0, 0, 4), (40, 11, 84), (101, 21, 110), (159, 42, 99), (212, 72, 66),
+               (245, 125, 21), (250, 193, 39), (252, 255, 164)],
+    'gray':[(0, 0, 0), (255, 255, 255)]}
+
+
+# 256 colors of a colormap packed as RGBA in uint32
+def colormap(cmap):
+    '''
+    Parameters:
+
+    > CMAP: one of the names in COLORMAPS
+
+    Returns an array of 256 uint32 colors, with red in the lowest byte and an
+    opaque alpha in the highest
+
+    * Notes: index with values scaled to 0-255 to color them without matplotlib.
+        view(uint8).reshape(-1, 4) gives the RGBA bytes
+    '''
+
+    anchors = array(COLORMAPS[cmap], dtype=float64)
+    x = linspace(0, 1, 256)
+    rgb = [rint(interp(x, linspace(0, 1, len(anchors)), anchors[:, i])).astype(uint32)
+           for i in range(3)]
+
+    return rgb[0] | rgb[1] << 8 | rgb[2] << 16 | uint32(255) << 24
+
+
+# projects points to the screen of an orthographic camera
+def project(points, view='iso'):
+    '''
+    Parameters:
+
+    > POINTS: array with shape (n,3)
+    > VIEW: one of 'top', 'front', 'side' or 'iso', or a tuple of the camera
+        elevation and azimuth in degrees
+
+    Returns an array with shape (n,2) of the right and up screen coordinates
+    '''
+
+    elev, azim = VIEWS[view] if isinstance(view, str) else view
+    e, a = radians(elev), radians(azim)
+
+    # screen axes of a camera looking at the origin from elev and azim
+    right = array([-sin(a), cos(a), 0])
+    up = array([-sin(e)*cos(a), -sin(e)*sin(a), cos(e)])
+
+    points = asarray(points, dtype=float64)
+    return concatenate(((points @ right)[:, None], (points @ up)[:, None]), axis=1)
+
+
+# draws a path into an RGB image
+def rasterize(points, values=None, size=(800, 600), view='iso', cmap='jet',
+              background=(255, 255, 255), linewidth=1, margin=0.05, file=None,
+              chunk=4194304):
+    '''
+    Parameters:
+
+    > POINTS: array with shape (n,3) of the path
+    > VALUES: array with shape (n,) that colors the segment ending at each point.
+        Defaults to the order of the points
+    > SIZE: width and height of the image in pixels
+    > VIEW: see project
+    > CMAP: one of the names in COLORMAPS
+    > BACKGROUND: RGB color behind the path
+    > LINEWIDTH: width of the lines in pixels
+    > MARGIN: fraction of the image left empty around the path
+    > FILE: if given, the image is saved to this file with Pillow
+    > CHUNK: the most pixels drawn at once
+
+    Returns the image as an array with shape (height, width, 3) of uint8
+
+    * Notes: segments are drawn in order, so later motion is drawn over
+        earlier motion. Every segment is drawn between the pixels of its ends
+        with one pixel per step along its longer screen axis, all segments at
+        once. Segments repeated later with the same pixels are skipped
+    '''
+
+    width, height = size
+    points = asarray(points, dtype=float64)
+    n = len(points)
+
+    # packed RGBA image filled with the background. little endian so the bytes are R,G,B,A
+    image = full(width*height, background[0] | background[1] << 8 | background[2] << 16
+                 | 255 << 24, dtype='<u4') # numpy
+
+    if n:
+
+        # screen coordinates scaled to fit the image, keeping the aspect ratio
+        uv = project(points, view)
+        lo, hi = uv.min(axis=0), uv.max(axis=0)
+        span = maximum(hi - lo, 1e-12)
+        scale = min((width - 1)*(1 - 2*margin)/span[0], (height - 1)*(1 - 2*margin)/span[1])
+        center = (lo + hi) / 2
+        px = (uv[:, 0] - center[0])*scale + (width - 1)/2
+        py = (height - 1)/2 - (uv[:, 1] - center[1])*scale
+
+        # color of every point
+        if values is None:
+            values = arange(n)
+        values = asarray(values, dtype=float64)
+        low, top = values.min(), values.max()
+        level = ((values - low) / (top - low) * 255 if top > low else zeros(n)).astype(intp)
+        colors = colormap(cmap)[level]
+
+        # pixel of every point
+        px, py = rint(px).astype(intp), rint(py).astype(intp) # numpy
+
+        # a single point is drawn as a dot
+        if n == 1:
+            px, py, colors = repeat(px, 2), repeat(py, 2), repeat(colors, 2)
+
+        # segments between pixels, each from its lower to its higher end so both
+        # directions give the same pixels
+        x0, y0, x1, y1 = px[:-1], py[:-1], px[1:], py[1:]
+        swap = (x0 > x1) | ((x0 == x1) & (y0 > y1))
+        x0, x1 = where(swap, x1, x0), where(swap, x0, x1) # numpy
+        y0, y1 = where(swap, y1, y0), where(swap, y0, y1) # numpy
+
+        # a segment drawn again later with the same pixels is completely drawn
+        # over, so only the last of every repeated segment is drawn. this keeps
+        # dense infill and stacked layers from drawing the same pixels many times
+        key = ((x0*height + y0)*width + x1)*height + y1
+        last = len(key) - 1 - unique(key[::-1], return_index=True)[1] # numpy
+        last.sort()
+        x0, y0, x1, y1, colors = x0[last], y0[last], x1[last], y1[last], colors[1:][last]
+
+        # pixels per segment along its longer axis, and the step of each pixel
+        dx, dy = x1 - x0, y1 - y0
+        k = maximum(abs(dx), abs(dy)) + 1 # numpy
+        first = concatenate(([0], cumsum(k))) # numpy
+        sx = (dx / maximum(k - 1, 1)).astype(float32)
+        sy = (dy / maximum(k - 1, 1)).astype(float32)
+        start = y0*width + x0
+
+        # offsets of a square pen for thick lines
+        pen = arange(linewidth) - (linewidth - 1)//2
+
+        # drawing chunks of whole segments in order
+        i = 0
+        while i < len(k):
+            j = max(searchsorted(first, first[i] + chunk, side='right') - 1, i + 1)
+
+            # segment of every pixel and its number of steps along the segment
+            seg = repeat(arange(i, j), k[i:j]) # numpy
+            step = (arange(first[i], first[j]) - first[seg]).astype(float32)
+
+            # offsets of every pixel from the start of its segment
+            x = rint(step*sx[seg]).astype(intp) # numpy
+            y = rint(step*sy[seg]).astype(intp) # numpy
+            flat = start[seg] + y*width + x
+            c = colors[seg]
+
+            # later pixels overwrite earlier ones
+            if linewidth == 1:
+                image[flat] = c
+            else:
+                x += x0[seg]
+                y += y0[seg]
+                for ox in pen:
+                    for oy in pen:
+                        xi, yi = x + ox, y + oy
+                        inside = (xi >= 0) & (xi < width) & (yi >= 0) & (yi < height)
+                        image[(flat + oy*width + ox)[inside]] = c[inside]
+
+            i = j
+
+    # dropping alpha from the packed pixels
+    image = image.view(uint8).reshape(height, width, 4)[..., :3].copy()
+
+    if file:
+        from PIL import Image
+        Image.fromarray(image).save(file)
+
+    return image
@@ -34,7 +34,41 @@ def read(file=None, **kwargs):
     # creating an empty GCODE object to then populate
     code = gcode(**kwargs)
 
-    
+    # time spent outside of the gcode commands is tokenizing
+    prof = code.profile
+    if prof:
+        start = prof.start('tokenize')
+
+    # parsing every line. the file is closed and the stage stopped even if a line fails
+    try:
+        _read_lines(code, f)
+
+    finally:
+        # closing file
+        if isinstance(file, str):
+            f.close()
+
+        if prof:
+            elapsed = prof.stop('tokenize', start)
+
+    # recording the lines and bytes read
+    if prof:
+        prof.read_done(code, file, elapsed)
+
+    # returning the filled gcode object
+    return code
+
+
+
+# parses every line of GCODE into a gcode object
+def _read_lines(code, f):
+    '''
+    Parameters:
+
+    > CODE: the gcode object that the commands are run on
+    > F: an opened file or a list of lines
+    '''
+
     # iterating over all lines in file f
     for line in f:
 
@@ -99,6 +133,14 @@ def read(file=None, **kwargs):
                 elif i[0] == 'E':
                     k['extrude'] = float(i[1:])
 
+                # checking for dwell time in seconds
+                elif i[0] == 'S' and commands[0] == 'G4':
+                    k['sec'] = float(i[1:])
+
+                # checking for dwell time in miliseconds
+                elif i[0] == 'P' and commands[0] == 'G4':
+                    k['milisec'] = float(i[1:])
+
                 # checking for check end hit
                 elif i[0] == 'S':
                     k['check_end'] = i[1:]
@@ -237,10 +279,3 @@ def read(file=None, **kwargs):
 
         else:
             raise Warning('Unknown command {}, Skipping command'.format(line))
-
-    # closing file
-    if isinstance(file, str):
-        f.close()
-
-    # returning the filled gcode object
-    return code
@@ -0,0 +1,147 @@
+'''
+Module that renders PNG previews of GCODE without a display, using matplotlib's
+Agg canvas directly instead of pyplot
+
+Written by Ryan Zambrotta
+'''
+from io import BytesIO
+from base64 import b64encode
+import os
+
+
+# sizes of the thumbnails embedded by common slicers, width by height in pixels
+THUMBNAIL_SIZES = [(16, 16), (220, 124)]
+
+
+# renders the path of a gcode object to PNG bytes
+def render(code, file=None, size=(220, 124), dpi=100, elev=30, azim=-60,
+           cmap='jet', linewidth=0.5, background='white', lod=None):
+    '''
+    Parameters:
+
+    > CODE: the gcode object to render
+    > FILE: if given, the PNG is also written to this file
+    > SIZE: width and height of the image in pixels
+    > DPI: dots per inch of the figure. Only changes the relative line width
+    > ELEV, AZIM: the camera elevation and azimuth in degrees
+    > CMAP: the colormap used to color the path by print time
+    > LINEWIDTH: the width of the path
+    > BACKGROUND: the color behind the path
+    > LOD: the most points to draw. Defaults to the lod of the gcode settings
+
+    Returns the PNG as bytes
+    '''
+
+    # imports are here so reading and writing GCODE never loads matplotlib
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib import colormaps
+    from mpl_toolkits.mplot3d.art3d import Line3DCollection
+    from numpy import stack
+
+    # creating a figure that is not managed by pyplot
+    fig = Figure(figsize=(size[0]/dpi, size[1]/dpi), dpi=dpi, facecolor=background)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1], projection='3d')
+    ax.set_axis_off()
+    ax.set_facecolor(background)
+    ax.view_init(elev=elev, azim=azim)
+
+    # positions and times reduced to the point budget
+    history, t = code._lod(lod)
+
+    if len(history) > 1:
+
+        # coloring every segment by the time at its end
+        colors = colormaps[cmap](t[1:] / t[-1] if t[-1] else t[1:])
+        segments = stack((history[:-1], history[1:]), axis=1) # numpy
+        ax.add_collection3d(Line3DCollection(segments, colors=colors, linewidths=linewidth))
+
+        # square axis limits
+        lim = code._ax_lim()
+        ax.set_xlim(lim[0], lim[1])
+        ax.set_ylim(lim[2], lim[3])
+        ax.set_zlim(lim[4], lim[5])
+
+    # writing the png to memory
+    buffer = BytesIO()
+    fig.canvas.print_png(buffer)
+    png = buffer.getvalue()
+
+    if file:
+        with open(file, 'wb') as f:
+            f.write(png)
+
+    return png
+
+
+# creates the comment block of a thumbnail as read by printer interfaces
+def thumbnail_block(png, size, width=78):
+    '''
+    Parameters:
+
+    > PNG: the image as bytes
+    > SIZE: width and height of the image in pixels
+    > WIDTH: the number of base64 characters on each line
+
+    Returns a list of GCODE comment lines
+    '''
+
+    text = b64encode(png).decode('ascii')
+
+    lines = ['; thumbnail begin {}x{} {}\n'.format(size[0], size[1], len(text))]
+    lines += ['; {}\n'.format(text[i:i+width]) for i in range(0, len(text), width)]
+    lines += ['; thumbnail end\n', ';\n']
+
+    return lines
+
+
+# renders a GCODE file in a worker process
+def _render_file(file, out_dir, sizes, kwargs):
+
+    # reading here so only the file name is sent to the worker
+    from .readg import read
+
+    code = read(file)
+    name = os.path.splitext(os.path.basename(file))[0]
+
+    written = []
+    for size in sizes:
+        png = os.path.join(out_dir, '{}_{}x{}.png'.format(name, size[0], size[1]))
+        render(code, png, size=size, **kwargs)
+        written.append(png)
+
+    return written
+
+
+# renders every GCODE file in a directory with a pool of processes
+def render_dir(directory, out_dir=None, sizes=THUMBNAIL_SIZES, pattern='*.gcode',
+               processes=None, **kwargs):
+    '''
+    Parameters:
+
+    > DIRECTORY: the directory of GCODE files
+    > OUT_DIR: where the PNG files are written. Defaults to DIRECTORY
+    > SIZES: a list of image sizes to render for every file
+    > PATTERN: the glob pattern of the files to render
+    > PROCESSES: the number of worker processes. Defaults to the number of cpus
+    > KWARGS: passed to render
+
+    Returns a dictionary of each GCODE file to the PNG files written for it
+    '''
+
+    # imports are here so short lived processes that do not batch render skip them
+    from concurrent.futures import ProcessPoolExecutor
+    from glob import glob
+
+    out_dir = out_dir or directory
+    os.makedirs(out_dir, exist_ok=True)
+
+    files = sorted(glob(os.path.join(directory, pattern)))
+
+    # every file is read and rendered in its own process
+    with ProcessPoolExecutor(processes) as pool:
+        written = pool.map(_render_file, files, [out_dir]*len(files),
+                           [sizes]*len(files), [kwargs]*len(files))
+
+        return dict(zip(files, written))
@@ -0,0 +1,570 @@
+'''
+Module that slices a triangle mesh into closed contours at a stack of z planes
+and writes their perimeters and infill as GCODE
+
+Written by Ryan Zambrotta
+'''
+from .infill import rectilinear, write_lines
+from .helper import filament_area
+from numpy import (asarray, array, arange, zeros, ones, repeat, cumsum, concatenate,
+                   searchsorted, lexsort, flatnonzero, bincount, argmax, minimum, maximum,
+                   where, diff, unique, linspace, sqrt, ceil, log2, float64, int64, intp)
+
+
+# class of the contours of every layer of a sliced mesh
+class gslice():
+
+    def __init__(self, points, start, layer, closed, heights, tops):
+        '''
+        Parameters:
+
+        > POINTS: array with shape (n,2) of the x,y points of every contour, one
+            contour after another
+        > START: array with shape (c+1,) of the first point of every contour and
+            the end of the last
+        > LAYER: array with shape (c,) of the layer of every contour
+        > CLOSED: array with shape (c,) that is True for closed contours. The
+            last point of a closed contour joins back to its first
+        > HEIGHTS: array of the z of every slicing plane
+        > TOPS: array of the z the nozzle prints every layer at
+
+        Use slice_mesh to build one:
+
+            s = slice_mesh('part.stl', layer_height=0.2)
+            s[10]                 # list of (m,2) arrays of the contours of layer 10
+            g = s.gcode(perimeters=2)
+
+        * Notes: outer contours run counterclockwise and holes clockwise seen
+            from above, so the material is always on the left
+        '''
+
+        self.points = points
+        self.start = start
+        self.layer = layer
+        self.closed = closed
+        self.heights = heights
+        self.tops = tops
+
+        # end of init
+        return
+
+    # signed area of every contour, positive counterclockwise
+    @property
+    def areas(self):
+
+        x, y = self.points[:, 0], self.points[:, 1]
+        following = self._following()
+        cross = x*y[following] - x[following]*y
+
+        return _contour_sum(cross, self.start) / 2
+
+    # moves the closed contours to the left (into the material) by dist
+    def inset(self, dist, miter=2):
+        '''
+        Parameters:
+
+        > DIST: the distance to move every edge
+        > MITER: the most a corner moves, as a multiple of DIST
+
+        Returns the moved points in the order of POINTS and an array with shape
+        (c,) that is False for contours that turned inside out (smaller than
+        the inset)
+
+        * Notes: every point moves along the bisector of its two edges so both
+            edges move by DIST. Open contours are not moved
+        '''
+
+        points = self.points
+        following = self._following()
+        previous = self._previous()
+
+        # unit left normal of the edge from every point to the next
+        step = points[following] - points
+        length = sqrt((step**2).sum(axis=1)) # numpy
+        length[length == 0] = 1
+        normal = concatenate((-step[:, 1:], step[:, :1]), axis=1) / length[:, None]
+
+        # offset of a corner that moves both of its edges by one
+        before, after = normal[previous], normal
+        c = 1 + (before*after).sum(axis=1)
+        offset = (before + after) / maximum(c, 2/miter**2)[:, None]
+
+        # open contours stay in place
+        fixed = repeat(~self.closed, diff(self.start)) # numpy
+        offset[fixed] = 0
+
+        moved = points + dist*offset
+
+        # contours whose area changed sign are gone
+        x, y = moved[:, 0], moved[:, 1]
+        area = _contour_sum(x*y[following] - x[following]*y, self.start)
+        valid = ~self.closed | (area*self.areas > 0)
+
+        return moved, valid
+
+    # writes the perimeters of every layer to a gcode object
+    def gcode(self, g=None, perimeters=1, line_width=0.4, speed=30, travel_speed=120,
+              diameter=1.75, flow=1, infill=None, infill_angle=45, grid=False):
+        '''
+        Parameters:
+
+        > G: the gcode object to write to. Defaults to a new one
+        > PERIMETERS: the number of loops printed inside every closed contour
+        > LINE_WIDTH: the width of the printed lines
+        > SPEED: the print speed in units of unit_sys per second
+        > TRAVEL_SPEED: the speed of moves between contours
+        > DIAMETER: the diameter of the filament
+        > FLOW: multiplies the extruded filament
+        > INFILL: the spacing of the infill lines. Defaults to no infill
+        > INFILL_ANGLE: the direction of the infill lines in degrees, turned 90
+            degrees every other layer
+        > GRID: infill lines in both directions on every layer
+
+        Returns the gcode object
+
+        * Notes: every layer starts with new_layer. The loops of a contour are
+            printed from the inside out, each as one batch move with the
+            filament of every segment. The outermost loop is centered half a
+            line width inside the contour. Open contours are printed once as
+            they are. The infill fills the inside of the innermost loops, see
+            infill.rectilinear, and is one batch move a layer after the loops.
+            The extrusion follows the EXTRUDE_MODE of G
+        '''
+
+        if g is None:
+            from .gcode import gcode
+            g = gcode()
+
+        # filament fed per unit length of line
+        area = flow * line_width * self._layer_height() / filament_area(diameter) # from helper.py
+
+        # the points and valid contours of every loop, innermost loop first
+        loops = [self.inset((i + 0.5)*line_width) for i in range(perimeters)][::-1]
+
+        # infill lines of every layer inside the innermost loops
+        if infill:
+            lines, line_layer = self._infill(perimeters*line_width, infill, infill_angle, grid)
+            line_first = searchsorted(line_layer, arange(len(self.tops) + 1)) # numpy
+
+        # contours of every layer
+        first = searchsorted(self.layer, arange(len(self.tops) + 1)) # numpy
+
+        for k in range(len(self.tops)):
+            g.new_layer()
+            z = self.tops[k]
+
+            for c in range(first[k], first[k + 1]):
+                a, b = self.start[c], self.start[c + 1]
+
+                # closed contours get loops, open contours are printed as they are
+                if self.closed[c]:
+                    paths = [concatenate((moved[a:b], moved[a:a+1])) for moved, valid in loops
+                             if valid[c]] # numpy
+                else:
+                    paths = [self.points[a:b]]
+
+                for path in paths:
+                    self._print_path(g, path, z, area, speed, travel_speed)
+
+            if infill:
+                write_lines(g, lines[line_first[k]:line_first[k + 1]], z, area, speed,
+                            travel_speed)
+
+        return g
+
+    # hidden methods -----------------------------------------------------------------
+
+    # prints one path: travel to its start then one batch move along it
+    def _print_path(self, g, path, z, area, speed, travel_speed):
+
+        g.move(path[0, 0], path[0, 1], z, speed=travel_speed)
+
+        # filament of every segment
+        fed = area * sqrt((diff(path, axis=0)**2).sum(axis=1)) # numpy
+        if g.extrude_mode == 'abs':
+            fed = g.current_e + cumsum(fed) # numpy
+
+        rest = path[1:]
+        g.move(rest[:, 0], rest[:, 1], z + zeros(len(rest)), speed=speed, extrude=fed)
+
+    # infill lines of the closed contours moved in by dist
+    def _infill(self, dist, spacing, angle, grid):
+
+        moved, valid = self.inset(dist)
+        keep = self.closed & valid
+        size = diff(self.start) # numpy
+
+        points = moved[repeat(keep, size)] # numpy
+        start = concatenate(([0], cumsum(size[keep]))) # numpy
+
+        return rectilinear(points, start, self.layer[keep], spacing, angle, grid=grid)
+
+    # the layer height, from the print heights
+    def _layer_height(self):
+
+        if len(self.tops) > 1:
+            return float(self.tops[1] - self.tops[0])
+        return float(self.tops[0]) if len(self.tops) else 0.
+
+    # index of the next point of every point within its contour, wrapping around
+    def _following(self):
+
+        following = arange(1, len(self.points) + 1) # numpy
+        following[self.start[1:] - 1] = self.start[:-1]
+        return following
+
+    # index of the previous point of every point within its contour, wrapping around
+    def _previous(self):
+
+        previous = arange(-1, len(self.points) - 1) # numpy
+        previous[self.start[:-1]] = self.start[1:] - 1
+        return previous
+
+    # methods for builtin function access ---------------------------------------------
+
+    # the contours of a layer as a list of arrays with shape (m,2)
+    def __getitem__(self, k):
+
+        first = searchsorted(self.layer, [k, k + 1]) # numpy
+        return [self.points[self.start[c]:self.start[c + 1]] for c in range(*first)]
+
+    def __len__(self):
+        return len(self.tops)
+
+    def __repr__(self):
+        return 'gslice of {} layers and {} contours'.format(len(self.tops), len(self.layer))
+    def __str__(self):
+        return self.__repr__()
+
+
+# sums the values of every contour
+def _contour_sum(values, start):
+
+    total = concatenate(([0], cumsum(values))) # numpy
+    return total[start[1:]] - total[start[:-1]]
+
+
+# drops the points of closed contours that lie on the line between their neighbors
+def _drop_collinear(points, start, closed, tol=1e-6):
+    '''
+    Parameters:
+
+    > POINTS, START, CLOSED: see gslice
+    > TOL: points closer than TOL to the line through their neighbors, and
+        repeated points, are dropped
+
+    Returns the points and the start of every contour without them
+
+    * Notes: the planes cut the mesh wherever an edge crosses them, so flat
+        sides of a contour have points in the middle. Moved by gslice.inset, a
+        point closer to a corner than the inset would pass that corner and the
+        perimeter would run back over itself. Contours that would be left with
+        fewer than three points are kept as they are
+    '''
+
+    size = diff(start) # numpy
+    following = arange(1, len(points) + 1) # numpy
+    following[start[1:] - 1] = start[:-1]
+    previous = arange(-1, len(points) - 1) # numpy
+    previous[start[:-1]] = start[1:] - 1
+
+    # distance of every point from the line through its neighbors, and whether it is between them
+    a, b = points - points[previous], points[following] - points
+    chord = points[following] - points[previous]
+    length = sqrt((chord**2).sum(axis=1)) # numpy
+    cross = abs(a[:, 0]*b[:, 1] - a[:, 1]*b[:, 0])
+    between = (a*b).sum(axis=1) > 0
+    repeated = (b**2).sum(axis=1) <= tol**2
+
+    drop = repeated | (between & (cross <= tol*length))
+    drop &= repeat(closed, size) # numpy
+
+    # contours that would be too small keep every point
+    left = size - _contour_sum(drop, start)
+    drop &= repeat(left >= 3, size) # numpy
+
+    keep = ~drop
+    start = concatenate(([0], cumsum(_contour_sum(keep, start)))).astype(intp) # numpy
+
+    return points[keep], start
+
+
+# intersects a mesh with z planes and joins the pieces into contours
+def section(mesh, heights, processes=1):
+    '''
+    Parameters:
+
+    > MESH: a gmesh
+    > HEIGHTS: sorted array of the z of every plane, or one plane for a
+        cross section
+    > PROCESSES: the number of worker processes that cut ranges of planes.
+        None uses every cpu
+
+    Returns the points, start, layer and closed arrays of gslice
+
+    * Notes: all planes are cut at once. The faces of every plane come from
+        the zindex of the mesh, so faces are only cut at the planes they cross
+        and a single cross section only looks at the faces near it after the
+        first call. A triangle crosses a plane when one
+        corner is below it and one is at or above it, so corners on a plane
+        count as above and every crossing is on an edge. Each piece runs from
+        the edge where the triangle goes down through the plane to the edge
+        where it goes up, and is joined to the piece that starts on the same
+        edge of the same plane, found by sorting edge keys. The point on an
+        edge is computed from the edge, so both triangles of an edge give the
+        same point exactly. With more than one process, the mesh is placed in
+        shared memory once and the workers cut contiguous ranges of planes
+        with about the same number of crossings. The contours are the same as
+        with one process
+    '''
+
+    vertices = asarray(mesh.vertices, dtype=float64)
+    heights = asarray(heights, dtype=float64).reshape(-1)
+
+    # the faces crossing every plane, grouped by plane, from the zindex of the mesh
+    if len(heights) == 1:
+        items = mesh.zindex.plane(heights[0])
+        start = array([0, len(items)])
+    else:
+        items, start = mesh.zindex.planes(heights)
+
+    arrays = {'vertices':vertices, 'faces':mesh.faces, 'edges':mesh.edges,
+              'face_edges':mesh.face_edges, 'items':items, 'start':start, 'heights':heights}
+
+    if processes == 1 or len(heights) == 1:
+        return _section_range(arrays, 0, len(heights))
+
+    return _parallel_section(arrays, processes)
+
+
+# state of a worker process: the arrays of the mesh mapped from shared memory
+_worker = {}
+
+
+# sets up a worker with the arrays of the mesh in shared memory
+def _section_init(name, layout):
+
+    from multiprocessing.shared_memory import SharedMemory
+    from numpy import ndarray
+
+    # the arrays are not copied, only mapped
+    shm = SharedMemory(name=name)
+    arrays = {key:ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+              for key, dtype, shape, offset in layout}
+
+    _worker.update(shm=shm, arrays=arrays)
+
+
+# cuts a range of planes in a worker
+def _section_work(span):
+    return _section_range(_worker['arrays'], *span)
+
+
+# cuts the planes from a up to b
+def _section_range(arrays, a, b):
+
+    start = arrays['start']
+    face = arrays['items'][start[a]:start[b]]
+    layer = repeat(arange(a, b), diff(start[a:b + 1])) # numpy
+
+    return _chain(arrays['vertices'], arrays['faces'], arrays['edges'], arrays['face_edges'],
+                  face, layer, arrays['heights'])
+
+
+# cuts ranges of planes in a pool of processes and joins them in order
+def _parallel_section(arrays, processes=None, chunks=4):
+
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing.shared_memory import SharedMemory
+    from numpy import ndarray
+
+    processes = processes or os.cpu_count()
+
+    # contiguous ranges of planes with about the same number of crossings
+    start = arrays['start']
+    n = len(start) - 1
+    cuts = searchsorted(start, linspace(0, start[-1], processes*chunks + 1)) # numpy
+    cuts = unique(concatenate(([0], minimum(cuts, n), [n]))) # numpy
+    spans = [(int(a), int(b)) for a, b in zip(cuts[:-1], cuts[1:])]
+
+    # every array in one block of shared memory, each at a multiple of 8 bytes
+    layout, offset = [], 0
+    for key, value in arrays.items():
+        layout.append((key, value.dtype, value.shape, offset))
+        offset += -(-value.nbytes // 8) * 8
+
+    shm = SharedMemory(create=True, size=max(offset, 1))
+    try:
+        for key, dtype, shape, at in layout:
+            ndarray(shape, dtype=dtype, buffer=shm.buf, offset=at)[...] = arrays[key]
+
+        with ProcessPoolExecutor(processes, initializer=_section_init,
+                                 initargs=(shm.name, layout)) as pool:
+
+            # map gives the ranges in order
+            parts = list(pool.map(_section_work, spans))
+
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # joining the contours of the ranges
+    points = concatenate([part[0] for part in parts]) # numpy
+    sizes = concatenate([diff(part[1]) for part in parts]) # numpy
+    start = concatenate(([0], cumsum(sizes))) # numpy
+    layer = concatenate([part[2] for part in parts]) # numpy
+    closed = concatenate([part[3] for part in parts]) # numpy
+
+    return points, start, layer, closed
+
+
+# cuts the faces at their planes and joins the pieces into contours
+def _chain(vertices, faces, edges, face_edges, face, layer, heights):
+
+    z = heights[layer]
+
+    # which corners are below the plane, and the edges going down and up through it.
+    # edge j of a face runs from corner j to corner j+1
+    below = vertices[:, 2][faces[face]] < z[:, None]
+    after = below[:, [1, 2, 0]]
+    down = argmax(~below & after, axis=1) # numpy
+    up = argmax(below & ~after, axis=1) # numpy
+
+    near = arange(len(face))
+    begin = face_edges[face, down].astype(int64)
+    end = face_edges[face, up].astype(int64)
+
+    # pieces are joined where one ends on the edge and plane another starts on
+    n_edges = len(edges)
+    start_key = layer*n_edges + begin
+    end_key = layer*n_edges + end
+    order = start_key.argsort() # numpy
+    found = minimum(searchsorted(start_key[order], end_key), len(order) - 1) # numpy
+    nxt = order[found]
+    joined = start_key[nxt] == end_key
+
+    # one piece after every piece. a piece two others end on keeps only one
+    pred = -ones(len(face), dtype=intp) # numpy
+    pred[nxt[joined]] = near[joined]
+    joined &= pred[nxt] == near
+    nxt = where(joined, nxt, near)
+    has_pred = zeros(len(face), dtype=bool)
+    has_pred[nxt[joined]] = True
+
+    # rounds of pointer jumping to cover the longest contour
+    rounds = int(ceil(log2(max(bincount(layer).max(), 2)))) + 1 if len(face) else 0
+
+    # the lowest piece of every loop, and whether a piece leads to an end
+    label, jump = near.copy(), nxt.copy()
+    for _ in range(rounds):
+        label = minimum(label, label[jump])
+        jump = jump[jump]
+    loop_head = (nxt[jump] != jump) & (label == near)
+
+    # loops are opened before their lowest piece
+    cut = pred[loop_head]
+    nxt[cut] = cut
+    head = ~has_pred | loop_head
+
+    # distance of every piece to the end of its contour, and the end
+    dist, jump = (nxt != near).astype(int64), nxt.copy()
+    for _ in range(rounds):
+        dist = dist + dist[jump]
+        jump = jump[jump]
+    last = jump
+
+    # every piece gives its first point, the last piece of an open contour gives both
+    closed = zeros(len(face), dtype=bool)
+    closed[last[head]] = loop_head[head]
+    tail = flatnonzero((nxt == near) & ~closed) # numpy
+
+    piece = concatenate((near, tail)) # numpy
+    edge = concatenate((begin, end[tail])) # numpy
+    rank = concatenate((-dist, ones(len(tail), dtype=int64))) # numpy
+    owner = last[piece]
+
+    # contours in order of plane then end piece, points in order along them
+    sort = lexsort((rank, owner, layer[piece])) # numpy
+    piece, edge, owner = piece[sort], edge[sort], owner[sort]
+
+    # the point of every edge at its plane
+    a, b = vertices[edges[edge, 0]], vertices[edges[edge, 1]]
+    t = (heights[layer[piece]] - a[:, 2]) / (b[:, 2] - a[:, 2])
+    points = a[:, :2] + t[:, None]*(b[:, :2] - a[:, :2])
+
+    # the start of every contour
+    new = ones(len(owner), dtype=bool)
+    new[1:] = owner[1:] != owner[:-1]
+
+    # corners on a plane give the same point on two edges, only one is kept
+    same = zeros(len(owner), dtype=bool)
+    same[1:] = (points[1:] == points[:-1]).all(axis=1) & ~new[1:]
+    keep = ~same
+    points, owner, new = points[keep], owner[keep], new[keep]
+    start = concatenate((flatnonzero(new), [len(owner)])) # numpy
+    contour = owner[start[:-1]]
+
+    # a closed contour ending on its first point
+    closed = closed[contour]
+    size = diff(start) # numpy
+    repeat_first = closed & (size > 1) & (points[start[1:] - 1] == points[start[:-1]]).all(axis=1)
+    if repeat_first.any():
+        keep = ones(len(points), dtype=bool)
+        keep[start[1:][repeat_first] - 1] = False
+        points = points[keep]
+        size = size - repeat_first
+        start = concatenate(([0], cumsum(size))) # numpy
+
+    # dropping contours too small to have an inside
+    good = size >= where(closed, 3, 2)
+    if not good.all():
+        keep = repeat(good, size) # numpy
+        points = points[keep]
+        start = concatenate(([0], cumsum(size[good]))) # numpy
+        contour, closed = contour[good], closed[good]
+
+    return points, start, layer[contour], closed
+
+
+# slices a mesh into layers
+def slice_mesh(mesh, layer_height=0.2, tol=1e-6, processes=1):
+    '''
+    Parameters:
+
+    > MESH: a gmesh, an stlmap, the name of an stl file, or an array with shape
+        (m,3,3) of triangles
+    > LAYER_HEIGHT: the thickness of every layer
+    > TOL: vertices closer than TOL are merged when MESH is not a gmesh
+    > PROCESSES: the number of processes that cut the layers, see section.
+        None uses every cpu
+
+    Returns a gslice
+
+    * Notes: the mesh is cut half a layer above the bottom of every layer and
+        printed at the top of every layer, with the bottom of the mesh at z=0.
+        The mesh should be closed with its faces wound counterclockwise seen
+        from outside, as in stl files. Holes in the mesh give open contours.
+        Points on the straight sides of closed contours are dropped
+    '''
+
+    from .gmesh import gmesh, readmesh
+
+    if not isinstance(mesh, gmesh):
+        if hasattr(mesh, 'vectors') or isinstance(mesh, str):
+            mesh = readmesh(mesh, tol)
+        else:
+            mesh = gmesh.from_triangles(mesh, tol)
+
+    # planes through the middle of every layer
+    bottom, top = mesh.bounds
+    n = max(int(round((top[2] - bottom[2]) / layer_height)), 1)
+    tops = layer_height*arange(1, n + 1) # numpy
+    heights = bottom[2] + tops - layer_height/2
+
+    points, start, layer, closed = section(mesh, heights, processes)
+
+    # flat sides of the contours as single edges, so insets do not run back over themselves
+    points, start = _drop_collinear(points, start, closed, tol)
+
+    return gslice(points, start, layer, closed, heights, tops)
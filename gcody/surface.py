@@ -0,0 +1,159 @@
+'''
+Module that builds a triangulated height surface from points, such as the
+points of a touch probe, without python loops over the points
+
+Written by Ryan Zambrotta
+'''
+from .gmesh import gmesh, _unique_rows
+from warnings import warn
+from numpy import (asarray, arange, zeros, full, rint, floor, clip, unique, searchsorted, lexsort,
+                   bincount, concatenate, stack, flatnonzero, where, ndim, float64, int32, int64,
+                   intp)
+
+
+# triangulates a height surface z(x,y) through points
+def surface(points, grid=None, tol=1e-6, reduce='mean'):
+    '''
+    Parameters:
+
+    > POINTS: array with shape (n,3) of the points
+    > GRID: resamples the points to a grid of this many cells in x and y, one
+        number or one per axis. Every cell with points gives one vertex at its
+        center. Defaults to no resampling
+    > TOL: points whose x and y round to the same multiple of TOL are one point
+    > REDUCE: the z of points in the same place or cell, 'mean', 'max' or 'min'
+
+    Returns a gmesh with faces wound counterclockwise seen from above, so the
+    normals point up
+
+    * Notes: points that lie on the nodes of a lattice of x and y values, as
+        probe points do, are joined to their neighbors directly, two triangles
+        a cell, and one triangle for cells missing a corner. Scattered points
+        are triangulated with scipy's Delaunay when GRID is not given. Use GRID
+        for scattered points without scipy and for huge point sets. Lattice
+        nodes, or grid cells, with too few neighbors to share a triangle raise
+        a ValueError if there are no triangles at all and warn otherwise
+    '''
+
+    points = asarray(points, dtype=float64).reshape(-1, 3)
+
+    # resampling to the cells of a grid
+    if grid is not None:
+        nx, ny = (grid, grid) if ndim(grid) == 0 else grid # numpy
+        lo, hi = points[:, :2].min(axis=0), points[:, :2].max(axis=0)
+        size = (hi - lo) / [nx, ny]
+        size[size == 0] = 1
+
+        i = clip(floor((points[:, 0] - lo[0]) / size[0]), 0, nx - 1).astype(int64) # numpy
+        j = clip(floor((points[:, 1] - lo[1]) / size[1]), 0, ny - 1).astype(int64) # numpy
+        cell, inverse = unique(i*ny + j, return_inverse=True) # numpy
+
+        z = _reduce(points[:, 2], inverse, len(cell), reduce)
+        i, j = cell // ny, cell % ny
+        x, y = lo[0] + (i + 0.5)*size[0], lo[1] + (j + 0.5)*size[1]
+
+        faces = _covered(_lattice(i, j, nx, ny), len(cell), 'use fewer GRID cells')
+        return gmesh(stack((x, y, z), axis=1), faces) # numpy
+
+    # one point for every place
+    keys = rint(points[:, :2] / tol).astype(int64) # numpy
+    first, inverse = _unique_rows(concatenate((keys, zeros((len(keys), 1), dtype=int64)), axis=1))
+    keys = keys[first]
+    vertices = points[first]
+    vertices[:, 2] = _reduce(points[:, 2], inverse, len(first), reduce)
+
+    # the lattice of the x and y values, if the points fill enough of it
+    ux, i = unique(keys[:, 0], return_inverse=True) # numpy
+    uy, j = unique(keys[:, 1], return_inverse=True) # numpy
+    if len(ux)*len(uy) <= 4*len(keys):
+        faces = _covered(_lattice(i, j, len(ux), len(uy)), len(keys), 'use GRID to resample them')
+        return gmesh(vertices, faces)
+
+    # scattered points
+    try:
+        from scipy.spatial import Delaunay
+    except ImportError:
+        raise ImportError('scattered points need scipy to triangulate, or use GRID to resample them')
+
+    faces = Delaunay(vertices[:, :2]).simplices.astype(int32)
+
+    # turning the faces counterclockwise
+    a, b, c = vertices[faces[:, 0], :2], vertices[faces[:, 1], :2], vertices[faces[:, 2], :2]
+    clockwise = ((b - a)[:, 0]*(c - a)[:, 1] - (b - a)[:, 1]*(c - a)[:, 0]) < 0
+    faces[clockwise] = faces[clockwise][:, ::-1]
+
+    return gmesh(vertices, faces)
+
+
+# the z of every group of points
+def _reduce(z, group, n, reduce):
+
+    if reduce not in ('mean', 'max', 'min'):
+        raise ValueError("reduce must be 'mean', 'max' or 'min', not {}".format(reduce))
+
+    if reduce == 'mean':
+        return bincount(group, weights=z, minlength=n) / bincount(group, minlength=n) # numpy
+
+    # the highest or lowest z of every group from one sort
+    order = lexsort((z, group)) # numpy
+    ends = searchsorted(group[order], arange(n), side='right' if reduce == 'max' else 'left')
+    return z[order[ends - (reduce == 'max')]]
+
+
+# the faces of a lattice, raising if there are none and warning if some vertices are in none
+def _covered(faces, n, advice):
+    '''
+    Parameters:
+
+    > FACES: array with shape (m,3) from _lattice
+    > N: the number of vertices
+    > ADVICE: what to do about it, added to the message
+    '''
+
+    # vertices of no face
+    alone = n - len(unique(faces)) # numpy
+
+    if n and not len(faces):
+        raise ValueError('none of the {} vertices of the surface share a cell with another, '
+                         '{}'.format(n, advice))
+    if alone:
+        warn('{} of the {} vertices of the surface are in no face, {}'.format(alone, n, advice))
+
+    return faces
+
+
+# triangles of the cells of a lattice with vertices at some of its nodes
+def _lattice(i, j, nx, ny):
+    '''
+    Parameters:
+
+    > I, J: arrays with shape (n,) of the lattice node of every vertex
+    > NX, NY: the number of nodes along x and y
+    '''
+
+    # vertex at every node, -1 where there is none
+    node = full(nx*ny, -1, dtype=int64) # numpy
+    node[i*ny + j] = arange(len(i))
+
+    # the corners of every cell, counterclockwise from its low corner
+    cell = arange(max(nx - 1, 0)*max(ny - 1, 0)) # numpy
+    ci, cj = cell // max(ny - 1, 1), cell % max(ny - 1, 1)
+    a = node[ci*ny + cj]
+    b = node[(ci + 1)*ny + cj]
+    c = node[(ci + 1)*ny + cj + 1]
+    d = node[ci*ny + cj + 1]
+    corners = stack((a, b, c, d), axis=1) # numpy
+    has = corners >= 0
+
+    # full cells give two triangles, cells missing one corner give the other three
+    full_cell = has.all(axis=1)
+    missing = where(has.sum(axis=1) == 3, (~has).argmax(axis=1), -1) # numpy
+
+    # the three corners left when a corner is missing, in counterclockwise order
+    others = asarray([[1, 2, 3], [0, 2, 3], [0, 1, 3], [0, 1, 2]], dtype=intp)
+    three = flatnonzero(missing >= 0) # numpy
+
+    faces = concatenate((corners[full_cell][:, [0, 1, 2]], corners[full_cell][:, [0, 2, 3]],
+                         corners[three[:, None], others[missing[three]]])) # numpy
+
+    return faces.astype(int32)
@@ -3,15 +3,16 @@
 # Needed imports
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 from matplotlib import style, use
-from numpy import array
+from numpy import array, stack
 from time import time as t
 
 
 # A function that generates a 3d line plot given a matrix of values
 def plot3(history, *args, title=None, give=False, plot_style='default',
          axis_label=None, make_square=True, figsize=None,backend='matplotlib',
-         **kwargs):
+         ax_lim=None, **kwargs):
 
     '''
     Parameters:
@@ -23,10 +24,11 @@ def plot3(history, *args, title=None, give=False, plot_style='default',
     > GIVE : this command makes the method return the figure after the path data is
             plotted.
     > BACKEND: either matplotlib or mayavi.
+    > AX_LIM: x,y,z axis limits in x,y,z order from low to high. If not given and
+        MAKE_SQUARE, these are calculated from history
     '''
 
     if backend == 'matplotlib':
-        print('hi')
 
         # setting style
         style.use(plot_style)
@@ -37,7 +39,7 @@ def plot3(history, *args, title=None, give=False, plot_style='default',
         else:
             fig = plt.figure()                
         
-        ax = fig.gca(projection='3d')
+        ax = fig.add_subplot(111, projection='3d')
         ax.set_aspect('auto')
 
         # makes history a numpy array
@@ -54,20 +56,14 @@ def plot3(history, *args, title=None, give=False, plot_style='default',
         ax.plot(X, Y, Z, *args, **kwargs)
 
         # Keeps aspect ratio square but can be computationally expensive for large GCODE
-        if make_square:
-            # Keeps aspect ratio square
-            # http://stackoverflow.com/questions/13685386
-            # numpy array
-            max_range = array([X.max()-X.min(),
-                                  Y.max()-Y.min(),
-                                  Z.max()-Z.min()]).max() / 2.0
-
-            mean_x = X.mean()
-            mean_y = Y.mean()
-            mean_z = Z.mean()
-            ax.set_xlim(mean_x - max_range, mean_x + max_range)
-            ax.set_ylim(mean_y - max_range, mean_y + max_range)
-            ax.set_zlim(mean_z - max_range, mean_z + max_range)
+        if make_square and ax_lim is None:
+            ax_lim = _square_lim(X, Y, Z)
+
+        # setting axis sizes
+        if ax_lim is not None:
+            ax.set_xlim(ax_lim[0], ax_lim[1])
+            ax.set_ylim(ax_lim[2], ax_lim[3])
+            ax.set_zlim(ax_lim[4], ax_lim[5])
 
         # labeling figure axes
         if axis_label:
@@ -142,14 +138,14 @@ add option of labeling the start and stopping point
 def color_view(history, time, *args, cmap='jet', axis_label=None, fig_title=None,
                plot_style='default', colorbar_ticks=None, colorbar_tick_labels=None,
                colorbar_label=None,give=False,backend='matplotlib',figsize=None,
-               orientation='vertical',**kwargs):
+               orientation='vertical',ax_lim=None,**kwargs):
 
     '''
     Parameters:
 
     > HISTORY:
     > TIME:
-    > ARGS:
+    > ARGS: not used by the matplotlib backend. KWARGS are passed to Line3DCollection
     > CMAP:
     > AXIS_LABEL:
     > FIG_TITLE:
@@ -158,6 +154,8 @@ def color_view(history, time, *args, cmap='jet', axis_label=None, fig_title=None
     > COLORBAR_TICK_LABELS:
     > COLORBAR_LABEL
     > GIVE:
+    > AX_LIM: x,y,z axis limits in x,y,z order from low to high. Calculated from
+        history if not given
     > KWARGS:
     '''
 
@@ -173,7 +171,7 @@ def color_view(history, time, *args, cmap='jet', axis_label=None, fig_title=None
         else:
             fig = plt.figure()
         
-        ax = fig.gca(projection='3d')
+        ax = fig.add_subplot(111, projection='3d')
         ax.set_aspect('equal')
 
         # makes history a numpy array
@@ -203,13 +201,13 @@ def color_view(history, time, *args, cmap='jet', axis_label=None, fig_title=None
         # adding colorbar with the given ticks
         if colorbar_ticks:
             # actually adding color bar with given_ticks
-            colorbar = fig.colorbar(color_map, pad=0.09,
+            colorbar = fig.colorbar(color_map, ax=ax, pad=0.09,
                                     ticks=colorbar_ticks)
 
         # else, use default which does calculations on time
         else:
             # actually adding color bar with 3 tick marks
-            colorbar = fig.colorbar(color_map, pad=0.09,
+            colorbar = fig.colorbar(color_map, ax=ax, pad=0.09,
                                     ticks=[0,time[-1]/2,time[-1]])
 
 
@@ -222,25 +220,20 @@ def color_view(history, time, *args, cmap='jet', axis_label=None, fig_title=None
         if colorbar_label:
             colorbar.set_label(colorbar_label)
 
-        # Plots the 3 past printer positions on figure parameterized by time
-        for i in range(1,len(X)):
-            ax.plot(X[i-1:i+1], Y[i-1:i+1], Z[i-1:i+1], *args,
-                    color=colors[i,:], **kwargs)
+        # Plots the printer path as a single collection of segments parameterized by time
+        # segment i goes from history[i] to history[i+1] and is colored by the time
+        # at its end
+        segments = stack((history[:-1], history[1:]), axis=1) # numpy
+        ax.add_collection3d(Line3DCollection(segments, colors=colors[1:], **kwargs))
 
 
         # Keeps aspect ratio square but can be computationally expensive for large GCODE
-        # http://stackoverflow.com/questions/13685386
-        # numpy array
-        max_range = array([X.max()-X.min(),
-                              Y.max()-Y.min(),
-                              Z.max()-Z.min()]).max() / 2.0
-
-        mean_x = X.mean()
-        mean_y = Y.mean()
-        mean_z = Z.mean()
-        ax.set_xlim(mean_x - max_range, mean_x + max_range)
-        ax.set_ylim(mean_y - max_range, mean_y + max_range)
-        ax.set_zlim(mean_z - max_range, mean_z + max_range)
+        if ax_lim is None:
+            ax_lim = _square_lim(X, Y, Z)
+
+        ax.set_xlim(ax_lim[0], ax_lim[1])
+        ax.set_ylim(ax_lim[2], ax_lim[3])
+        ax.set_zlim(ax_lim[4], ax_lim[5])
 
         # labeling figure axes
         if axis_label:
@@ -263,7 +256,11 @@ def color_view(history, time, *args, cmap='jet', axis_label=None, fig_title=None
     # Using mayavi to create a colorbar view
     elif backend == 'mayavi':
 
+        # tubes are drawn for every point by default which is slow for large GCODE
+        kwargs.setdefault('tube_radius', None)
+
         # calling plot3 because mayavi's default is color
+        # this is a single polyline with time as the scalar that is colored
         fig, mlab = plot3(history, time, backend='mayavi', give=True, colormap=cmap,
                           figsize=figsize, axis_label=axis_label, title=fig_title, **kwargs)
 
@@ -289,7 +286,7 @@ def color_view(history, time, *args, cmap='jet', axis_label=None, fig_title=None
 # X and Y array to be plotted, a single input i to that function is required
 def live_view(animate, *args, loop=60, ax_lim=None, ax_label=None,
               fig_title=None, save_file=None, writer='pillow',interval=100,
-              plot_style='default',show=True,**kwargs):
+              plot_style='default',show=True,blit=True,**kwargs):
 
     '''
     Parameters:
@@ -297,15 +294,18 @@ def live_view(animate, *args, loop=60, ax_lim=None, ax_label=None,
     > ANIMATE: A function that takes a single integer input starting from zero. This
         function must return x,y,z to be plotted
     > ARGS:
-    > LOOP:
-    > AX_LIM: x,y,z axis limits in x,y,z order from low to high
+    > LOOP: the number of frames. The animation restarts after the last frame
+    > AX_LIM: x,y,z axis limits in x,y,z order from low to high. If not given, the
+        limits of the last frame are used
     > AX_LABEL: a list-like object that contains strings for the x,y,z labels in that order
     > FIG_TITLE:
-    > SAVE_FILE:
+    > SAVE_FILE: the animation is saved to this file, rendering one frame at a
+        time. See movie.py export_animation to render frames in parallel
     > ANIMATE:
     > COLOR:
     > REFRESH:
     > PLOT_STYLE:
+    > BLIT: only redraw the line on every frame instead of the whole figure
     > KWARGS:
     '''
 
@@ -320,6 +320,31 @@ def live_view(animate, *args, loop=60, ax_lim=None, ax_label=None,
     ax = fig.add_subplot(111, projection='3d')
     ax.set_aspect('auto')
 
+    # the line that is updated on every frame
+    line, = ax.plot([], [], [], *args, **kwargs)
+
+    # the last frame bounds the whole animation
+    if ax_lim is None and loop:
+        x,y,z = animate(loop - 1)
+        if len(x):
+            ax_lim = [min(x), max(x), min(y), max(y), min(z), max(z)]
+
+    # setting axis sizes
+    if ax_lim is not None:
+        ax.set_xlim(ax_lim[0], ax_lim[1])
+        ax.set_ylim(ax_lim[2], ax_lim[3])
+        ax.set_zlim(ax_lim[4], ax_lim[5])
+
+    # labeling axes
+    if ax_label is not None:
+        ax.set_xlabel(ax_label[0])
+        ax.set_ylabel(ax_label[1])
+        ax.set_zlabel(ax_label[2])
+
+    # setting figure title
+    if fig_title:
+        ax.set_title(fig_title)
+
     # creates the animation
     def animate_loop(i):
 
@@ -330,32 +355,16 @@ def live_view(animate, *args, loop=60, ax_lim=None, ax_label=None,
         # calls the animate function
         x,y,z = animate(i)
 
-        # cleans old drawing off screen. computationally light
-        ax.clear()
+        # only the data of the line changes
+        line.set_data_3d(x,y,z)
 
-        # redraws stuff on to plot
-        ax.plot(x,y,z, *args,**kwargs)
-
-        # setting axis sizes
-        if ax_lim != None:
-            ax.set_xlim(ax_lim[0], ax_lim[1])
-            ax.set_ylim(ax_lim[2], ax_lim[3])
-            ax.set_zlim(ax_lim[4], ax_lim[5])
-
-        # labeling axes
-        if ax_label != None:
-            ax.set_xlabel(ax_label[0])
-            ax.set_ylabel(ax_label[1])
-            ax.set_zlabel(ax_label[2])
-
-        # setting figure title
-        if fig_title:
-            ax.set_title(fig_title)
+        return line,
 
 
     # animation function from matplotlib
     # arguments are where to draw, which drawing function to use, and how often to redraw
-    ani = animation.FuncAnimation(fig, animate_loop, interval=interval)
+    ani = animation.FuncAnimation(fig, animate_loop, frames=loop, interval=interval,
+                                  blit=blit)
 
     # if a save file is passed, the animation is saved to the file
     if save_file:
@@ -375,7 +384,7 @@ def live_view(animate, *args, loop=60, ax_lim=None, ax_label=None,
 def slider_view(update, *args, slide_geo=[0.25, 0.1, 0.65, 0.03],
                 slide_label=None, slide_color='w', slide_range=[0,10], slide_0=0.0,
                 slide_dx=1, ax_lim=None, ax_label=None, plot_style='default',
-                fig_title=None, **kwargs ):
+                fig_title=None, throttle=50, **kwargs ):
 
     '''
     Parameters:
@@ -391,6 +400,8 @@ def slider_view(update, *args, slide_geo=[0.25, 0.1, 0.65, 0.03],
     > AX_LIM:
     > AX_LABEL:
     > PLOT_STYLE:
+    > THROTTLE: milliseconds to wait before drawing, so that a burst of slider
+        events only draws the last value. Zero draws every event
     > KWARGS:
     '''
 
@@ -410,7 +421,7 @@ def slider_view(update, *args, slide_geo=[0.25, 0.1, 0.65, 0.03],
     data = update(0)
 
     # plotting inital data on the figure
-    l, = plt.plot(*data,*args)
+    l, = ax.plot(*data,*args, **kwargs)
 
     # setting axis sizes
     if ax_lim != None:
@@ -438,36 +449,43 @@ def slider_view(update, *args, slide_geo=[0.25, 0.1, 0.65, 0.03],
     time_slider = Slider(time_ax, slide_label, valmin=slide_range[0],
                          valmax=slide_range[1], valinit=slide_0, valstep=slide_dx)
 
+    # the latest slider value that has not been drawn yet
+    pending = []
+
     # calling update function to set the new plotted values
-    def slide(i):
+    def draw():
+
+        # only the latest value of a burst of events is drawn
+        if not pending:
+            return
+        i = pending.pop()
+        pending.clear()
 
         # calling update function to give new values
         x,y,z = update(i)
 
-        # setting new values
-        l.set_xdata(x)
-        l.set_ydata(y)
-        l.set_3d_properties(z)
+        # setting new values. limits, labels and title do not change
+        l.set_data_3d(x,y,z)
 
-        # setting axis sizes
-        if ax_lim != None:
-            ax.set_xlim(ax_lim[0], ax_lim[1])
-            ax.set_ylim(ax_lim[2], ax_lim[3])
-            ax.set_zlim(ax_lim[4], ax_lim[5])
-
-        # labeling axes
-        if ax_label != None:
-            ax.set_xlabel(ax_label[0])
-            ax.set_ylabel(ax_label[1])
-            ax.set_zlabel(ax_label[2])
+        # drawing the new values to the figure
+        fig.canvas.draw_idle()
 
-        # setting figure title
-        if fig_title:
-            ax.set_title(fig_title)
+    # timer that draws once the slider has been quiet for throttle milliseconds
+    if throttle:
+        timer = fig.canvas.new_timer(interval=throttle)
+        timer.single_shot = True
+        timer.add_callback(draw)
 
+    # called on every slider event
+    def slide(i):
+        pending.append(i)
 
-        # drawing the new values to the figure
-        fig.canvas.draw_idle()
+        if throttle:
+            # restarting the timer
+            timer.stop()
+            timer.start()
+        else:
+            draw()
 
 
     # tells the slider to use the slide function to update the figure
@@ -476,3 +494,85 @@ def slider_view(update, *args, slide_geo=[0.25, 0.1, 0.65, 0.03],
     # showing the figure
     plt.show()
     return
+
+
+
+# shows a 2D grid, such as the time density from heatmap.py, as an image with a colorbar
+def heat_view(grid, edges, cmap='inferno', log=True, axis_label=None, fig_title=None,
+              colorbar_label=None, plot_style='default', figsize=None, give=False, **kwargs):
+
+    '''
+    Parameters:
+
+    > GRID: array with shape (nx, ny)
+    > EDGES: the bin edges of both axes
+    > CMAP: the colormap of the image
+    > LOG: uses a logarithmic color scale so short dense features show next to long dwells
+    > AXIS_LABEL: the labels of the two axes
+    > COLORBAR_LABEL: the label of the colorbar
+    > GIVE: this command makes the function return the figure instead of showing it
+    > KWARGS: are passed to matplotlib's imshow
+    '''
+
+    from matplotlib.colors import LogNorm
+
+    # maplotlib style to use
+    style.use(plot_style)
+
+    # creating figure
+    if figsize:
+        fig = plt.figure(figsize=figsize)
+    else:
+        fig = plt.figure()
+    ax = fig.add_subplot(111)
+
+    # empty bins are left blank on the log scale
+    norm = None
+    if log and (grid > 0).any():
+        norm = LogNorm(vmin=grid[grid > 0].min(), vmax=grid.max())
+
+    # the grid is indexed x then y, images are rows of y
+    image = ax.imshow(grid.T, origin='lower', cmap=cmap, norm=norm, aspect='equal',
+                      extent=[edges[0][0], edges[0][-1], edges[1][0], edges[1][-1]],
+                      interpolation='nearest', **kwargs)
+
+    # adding colorbar
+    cbar = fig.colorbar(image, ax=ax)
+    if colorbar_label:
+        cbar.set_label(colorbar_label)
+
+    # labeling figure axes
+    if axis_label:
+        ax.set_xlabel(axis_label[0])
+        ax.set_ylabel(axis_label[1])
+
+    # sets the figure title
+    if fig_title:
+        ax.set_title(fig_title)
+
+    # determines whether to show the figure or to return it
+    if give:
+        return fig
+    else:
+        plt.show()
+
+    return
+
+
+
+# square axis limits about the mean position in x,y,z order from low to high
+# http://stackoverflow.com/questions/13685386
+def _square_lim(X, Y, Z):
+
+    # numpy array
+    max_range = array([X.max()-X.min(),
+                       Y.max()-Y.min(),
+                       Z.max()-Z.min()]).max() / 2.0
+
+    mean_x = X.mean()
+    mean_y = Y.mean()
+    mean_z = Z.mean()
+
+    return [mean_x - max_range, mean_x + max_range,
+            mean_y - max_range, mean_y + max_range,
+            mean_z - max_range, mean_z + max_range]
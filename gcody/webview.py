@@ -0,0 +1,280 @@
+'''
+Module that exports a path to a single HTML file with an inline WebGL viewer,
+so previews can be shared with anyone that has a browser
+
+Written by Ryan Zambrotta
+'''
+from base64 import b64encode
+from html import escape
+import json
+import re
+
+from numpy import asarray, rint, clip, maximum, unique, linspace, float64, int64
+
+
+# writes a path and its times to a self contained HTML viewer
+def export_html(points, t, file, quantize=True, title='Print Path', unit='mm', layers=1000):
+    '''
+    Parameters:
+
+    > POINTS: array with shape (n,3) of the path
+    > T: array with shape (n,) of the time at every point in minutes
+    > FILE: the HTML file to write
+    > QUANTIZE: stores positions as int16 over the extent of the path, 6 bytes
+        a point instead of 12. The error is at most 1/131070 of the extent
+    > TITLE: the title of the page
+    > UNIT: the unit of the positions, shown with the layer heights
+    > LAYERS: the most stops of the layer sliders. Paths with more heights,
+        such as vase or probe paths, get this many spread evenly among them
+
+    Returns the size of the file in bytes
+
+    * Notes: the file needs no network access. Drag to orbit, scroll to zoom,
+        and use the sliders to scrub through time and pick a range of layers
+    '''
+
+    points = asarray(points, dtype=float64).reshape(-1, 3)
+    t = asarray(t, dtype=float64)
+
+    lo = points.min(axis=0) if len(points) else [0, 0, 0]
+    hi = points.max(axis=0) if len(points) else [1, 1, 1]
+
+    # positions as int16 steps over the extent, or as float32
+    if quantize and len(points):
+        scale = maximum(hi - lo, 1e-12) / 65535
+        data = clip(rint((points - lo) / scale) - 32768, -32768, 32767).astype('<i2')
+        offset = lo + 32768*scale
+    else:
+        scale = [1, 1, 1]
+        data = points.astype('<f4')
+        offset = [0, 0, 0]
+
+    # heights of the layers from the z the viewer decodes, so no point falls between them
+    z = offset[2] + data[:, 2]*scale[2]
+
+    header = {'n':len(points), 'type':'int16' if data.dtype.kind == 'i' else 'float32',
+              'offset':[float(i) for i in offset], 'scale':[float(i) for i in scale],
+              'lo':[float(i) for i in lo], 'hi':[float(i) for i in hi], 'unit':unit,
+              'heights':[float(i) for i in _heights(z, layers)]}
+
+    # every placeholder filled in one pass, so text put in one is never read as another.
+    # < is escaped in the JSON so nothing in it can close its script tag
+    fields = {'TITLE':escape(title),
+              'HEADER':json.dumps(header).replace('<', '\\u003c'),
+              'POSITIONS':b64encode(data.tobytes()).decode('ascii'),
+              'TIMES':b64encode(t.astype('<f4').tobytes()).decode('ascii')}
+    page = _FIELD.sub(lambda m: fields[m.group(1)], _PAGE).encode('utf-8')
+
+    with open(file, 'wb') as f:
+        f.write(page)
+
+    return len(page)
+
+
+# the distinct heights of z to a tolerance, evenly thinned when there are too many
+def _heights(z, most=1000, tol=1e-4):
+    '''
+    Parameters:
+
+    > Z: array with shape (n,) of heights
+    > MOST: the most heights returned. When there are more, this many are
+        taken evenly spaced through the sorted heights, keeping the lowest
+        and highest
+    > TOL: heights that round to the same multiple of TOL are one height
+    '''
+
+    heights = unique(rint(asarray(z, dtype=float64) / tol).astype(int64)) * tol # numpy
+
+    if len(heights) > most:
+        heights = heights[rint(linspace(0, len(heights) - 1, max(most, 2))).astype(int64)]
+
+    return heights
+
+
+# the placeholders of the page
+_FIELD = re.compile(r'__(TITLE|HEADER|POSITIONS|TIMES)__')
+
+
+# the viewer. the data is decoded into typed arrays and drawn as one line strip
+_PAGE = r'''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+  html, body { margin: 0; height: 100%; overflow: hidden; font: 13px sans-serif; }
+  canvas { display: block; width: 100%; height: 100%; cursor: grab; }
+  #panel { position: absolute; left: 10px; bottom: 10px; right: 10px; padding: 8px;
+           background: rgba(255,255,255,0.85); border-radius: 4px; }
+  #panel label { display: inline-block; width: 70px; }
+  #panel input { width: calc(100% - 250px); vertical-align: middle; }
+  #panel span { display: inline-block; width: 160px; text-align: right; }
+</style>
+</head>
+<body>
+<canvas id="view"></canvas>
+<div id="panel">
+  <div><label>Time</label><input id="time" type="range" min="0" max="1000" value="1000"><span id="time_text"></span></div>
+  <div><label>Layer min</label><input id="zmin" type="range" min="0" value="0"><span id="zmin_text"></span></div>
+  <div><label>Layer max</label><input id="zmax" type="range" min="0" value="0"><span id="zmax_text"></span></div>
+</div>
+<script id="header" type="application/json">__HEADER__</script>
+<script id="positions" type="application/octet-stream">__POSITIONS__</script>
+<script id="times" type="application/octet-stream">__TIMES__</script>
+<script>
+"use strict";
+
+// decoding the embedded base64 buffers
+function decode(id) {
+  var text = atob(document.getElementById(id).textContent.trim());
+  var bytes = new Uint8Array(text.length);
+  for (var i = 0; i < text.length; i++) bytes[i] = text.charCodeAt(i);
+  return bytes.buffer;
+}
+
+var header = JSON.parse(document.getElementById("header").textContent);
+var n = header.n;
+var positions = header.type === "int16" ? new Int16Array(decode("positions"))
+                                        : new Float32Array(decode("positions"));
+var times = new Float32Array(decode("times"));
+var tmax = n ? times[n - 1] : 0;
+
+// heights of the layers, sorted and found when the page was written
+var heights = header.heights.length ? header.heights : [0];
+
+// webgl setup
+var canvas = document.getElementById("view");
+var gl = canvas.getContext("webgl", {antialias: true});
+
+function shader(type, source) {
+  var s = gl.createShader(type);
+  gl.shaderSource(s, source);
+  gl.compileShader(s);
+  if (!gl.getShaderParameter(s, gl.COMPILE_STATUS)) throw gl.getShaderInfoLog(s);
+  return s;
+}
+
+var program = gl.createProgram();
+gl.attachShader(program, shader(gl.VERTEX_SHADER, [
+  "attribute vec3 pos;",
+  "attribute float time;",
+  "uniform vec3 offset, scale, center;",
+  "uniform mat3 rot;",
+  "uniform vec3 zoom;",
+  "uniform float tmax;",
+  "varying float v_time, v_z;",
+  "void main() {",
+  "  vec3 world = offset + pos*scale;",
+  "  v_time = tmax > 0.0 ? time/tmax : 0.0;",
+  "  v_z = world.z;",
+  "  gl_Position = vec4((rot*(world - center))*zoom, 1.0);",
+  "}"].join("\n")));
+gl.attachShader(program, shader(gl.FRAGMENT_SHADER, [
+  "#ifdef GL_FRAGMENT_PRECISION_HIGH",
+  "precision highp float;",
+  "#else",
+  "precision mediump float;",
+  "#endif",
+  "uniform float zmin, zmax;",
+  "varying float v_time, v_z;",
+  "void main() {",
+  "  if (v_z < zmin || v_z > zmax) discard;",
+  "  float x = 4.0*v_time;",
+  "  gl_FragColor = vec4(clamp(min(x - 1.5, 4.5 - x), 0.0, 1.0),",
+  "                      clamp(min(x - 0.5, 3.5 - x), 0.0, 1.0),",
+  "                      clamp(min(x + 0.5, 2.5 - x), 0.0, 1.0), 1.0);",
+  "}"].join("\n")));
+gl.linkProgram(program);
+gl.useProgram(program);
+
+function attribute(name, data, size, type) {
+  var buffer = gl.createBuffer();
+  gl.bindBuffer(gl.ARRAY_BUFFER, buffer);
+  gl.bufferData(gl.ARRAY_BUFFER, data, gl.STATIC_DRAW);
+  var loc = gl.getAttribLocation(program, name);
+  gl.enableVertexAttribArray(loc);
+  gl.vertexAttribPointer(loc, size, type, false, 0, 0);
+}
+attribute("pos", positions, 3, header.type === "int16" ? gl.SHORT : gl.FLOAT);
+attribute("time", times, 1, gl.FLOAT);
+
+function uniform(name) { return gl.getUniformLocation(program, name); }
+gl.uniform3fv(uniform("offset"), header.offset);
+gl.uniform3fv(uniform("scale"), header.scale);
+gl.uniform3fv(uniform("center"), [0, 1, 2].map(function (i) { return (header.lo[i] + header.hi[i])/2; }));
+gl.uniform1f(uniform("tmax"), tmax);
+
+// camera and the sliders
+var radius = Math.max(1e-12, Math.sqrt([0, 1, 2].reduce(function (s, i) {
+  return s + Math.pow(header.hi[i] - header.lo[i], 2); }, 0))/2);
+var camera = {azim: -45, elev: 30, zoom: 1};
+var count = n;
+var time = document.getElementById("time");
+var zmin = document.getElementById("zmin");
+var zmax = document.getElementById("zmax");
+zmin.max = zmax.max = zmax.value = heights.length - 1;
+
+function draw() {
+  var w = canvas.clientWidth, h = canvas.clientHeight;
+  if (canvas.width !== w || canvas.height !== h) { canvas.width = w; canvas.height = h; }
+  gl.viewport(0, 0, w, h);
+  gl.clearColor(1, 1, 1, 1);
+  gl.clear(gl.COLOR_BUFFER_BIT | gl.DEPTH_BUFFER_BIT);
+  gl.enable(gl.DEPTH_TEST);
+
+  // rotation about z by the azimuth then about x by the elevation, z up on screen
+  var a = camera.azim*Math.PI/180, e = camera.elev*Math.PI/180;
+  var ca = Math.cos(a), sa = Math.sin(a), ce = Math.cos(e), se = Math.sin(e);
+  gl.uniformMatrix3fv(uniform("rot"), false, [
+    -sa, -se*ca, ce*ca,
+     ca, -se*sa, ce*sa,
+      0,     ce,    se]);
+  var s = camera.zoom/radius;
+  gl.uniform3fv(uniform("zoom"), [s*Math.min(1, h/w), s*Math.min(1, w/h), -1/radius]);
+
+  var lo = heights[Math.min(zmin.value, zmax.value)], hi = heights[Math.max(zmin.value, zmax.value)];
+  gl.uniform1f(uniform("zmin"), lo - 1e-4);
+  gl.uniform1f(uniform("zmax"), hi + 1e-4);
+  gl.drawArrays(gl.LINE_STRIP, 0, count);
+
+  document.getElementById("time_text").textContent = (count ? times[count - 1] : 0).toFixed(2) + " min";
+  document.getElementById("zmin_text").textContent = lo.toFixed(3) + " " + header.unit;
+  document.getElementById("zmax_text").textContent = hi.toFixed(3) + " " + header.unit;
+}
+
+var pending = false;
+function redraw() {
+  if (!pending) { pending = true; requestAnimationFrame(function () { pending = false; draw(); }); }
+}
+
+// every point reached by the slider time, found by binary search
+time.oninput = function () {
+  var target = tmax*time.value/1000, a = 0, b = n;
+  while (a < b) { var m = (a + b) >> 1; if (times[m] <= target) a = m + 1; else b = m; }
+  count = time.value == 1000 ? n : a;
+  redraw();
+};
+zmin.oninput = zmax.oninput = redraw;
+
+// orbit by dragging and zoom by scrolling
+var drag = null;
+canvas.onmousedown = function (ev) { drag = [ev.clientX, ev.clientY]; };
+window.onmouseup = function () { drag = null; };
+window.onmousemove = function (ev) {
+  if (!drag) return;
+  camera.azim -= (ev.clientX - drag[0])*0.4;
+  camera.elev = Math.max(-90, Math.min(90, camera.elev + (ev.clientY - drag[1])*0.4));
+  drag = [ev.clientX, ev.clientY];
+  redraw();
+};
+canvas.onwheel = function (ev) {
+  ev.preventDefault();
+  camera.zoom *= Math.exp(-ev.deltaY*0.001);
+  redraw();
+};
+window.onresize = redraw;
+draw();
+</script>
+</body>
+</html>
+'''
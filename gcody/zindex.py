@@ -0,0 +1,169 @@
+'''
+Module that indexes items such as triangles by their z extent, to find the
+items crossing a plane or a range of heights without testing every item
+
+Written by Ryan Zambrotta
+'''
+from numpy import (asarray, arange, repeat, cumsum, concatenate, searchsorted, frexp, unique,
+                   lexsort, zeros, maximum, float64, intp)
+
+
+# class of an index of z extents
+class zindex():
+
+    def __init__(self, low, high):
+        '''
+        Parameters:
+
+        > LOW: array with shape (m,) of the lowest z of every item
+        > HIGH: array with shape (m,) of the highest z of every item
+
+        Use zindex.from_mesh or the zindex of a gmesh for triangles:
+
+            index = readmesh('part.stl').zindex
+            index.plane(2.5)               # triangles crossing z=2.5
+            index.range(2, 3)              # triangles with any part from z=2 to 3
+            faces, start = index.planes(heights) # every plane of a layer stack at once
+
+        * Notes: an item crosses a plane z when LOW < z <= HIGH, so an item is
+            never counted twice in a stack of planes through its corners. Items
+            are grouped by the power of two of their height and sorted by LOW
+            in every group. A query only looks at the items of a group whose
+            LOW is within the tallest height of the group below the query, so
+            the work is close to the number of items found
+        '''
+
+        self.low = asarray(low, dtype=float64)
+        self.high = asarray(high, dtype=float64)
+
+        # groups of items of about the same height, each sorted by low
+        power = frexp(self.high - self.low)[1] # numpy
+        self.order = lexsort((self.low, power)) # numpy
+        self.sorted_low = self.low[self.order]
+
+        first = unique(power[self.order], return_index=True)[1] # numpy
+        self._group_start = concatenate((first, [len(self.order)])) # numpy
+
+        # the tallest item of every group
+        height = (self.high - self.low)[self.order]
+        self._group_height = maximum.reduceat(height, first) if len(height) else height
+
+        # end of init
+        return
+
+    # builds the index of the faces of a mesh
+    @classmethod
+    def from_mesh(cls, mesh):
+        '''
+        Parameters:
+
+        > MESH: a gmesh
+        '''
+
+        zf = asarray(mesh.vertices[:, 2], dtype=float64)[mesh.faces]
+        return cls(zf.min(axis=1), zf.max(axis=1))
+
+    # items crossing the plane z
+    def plane(self, z):
+        '''
+        Parameters:
+
+        > Z: the height of the plane
+
+        Returns the sorted indices of the items with LOW < Z <= HIGH
+        '''
+
+        found = self._candidates(z, z, side='left')
+        found = found[self.high[found] >= z]
+        found.sort()
+
+        return found
+
+    # items with any part in a range of heights
+    def range(self, z0, z1):
+        '''
+        Parameters:
+
+        > Z0, Z1: the low and high of the range
+
+        Returns the sorted indices of the items with LOW <= Z1 and HIGH >= Z0
+        '''
+
+        found = self._candidates(z0, z1, side='right')
+        found = found[self.high[found] >= z0]
+        found.sort()
+
+        return found
+
+    # every item and plane that cross, item by item
+    def pairs(self, heights):
+        '''
+        Parameters:
+
+        > HEIGHTS: sorted array of the z of every plane
+
+        Returns arrays of the item and the plane of every crossing, in order of
+        item and then plane
+
+        * Notes: the planes of every item are the planes between its LOW and
+            HIGH, found with two binary searches, so the work is the number of
+            items and the number of crossings, not their product
+        '''
+
+        heights = asarray(heights, dtype=float64)
+
+        # first plane above low and first plane above high
+        first = searchsorted(heights, self.low, side='right') # numpy
+        last = searchsorted(heights, self.high, side='right') # numpy
+        count = maximum(last - first, 0)
+
+        item = repeat(arange(len(count)), count) # numpy
+        offset = cumsum(count) - count
+        plane = first[item] + arange(len(item)) - offset[item]
+
+        return item, plane
+
+    # the items crossing every plane of a stack
+    def planes(self, heights):
+        '''
+        Parameters:
+
+        > HEIGHTS: sorted array of the z of every plane
+
+        Returns an array of items and an array START with shape (k+1,) so the
+        items crossing plane i are items[start[i]:start[i+1]], in sorted order
+        '''
+
+        item, plane = self.pairs(heights)
+
+        # grouping the crossings by plane, items stay sorted within a plane
+        order = plane.argsort(kind='stable') # numpy
+        start = searchsorted(plane[order], arange(len(heights) + 1)) # numpy
+
+        return item[order], start
+
+    # hidden methods -----------------------------------------------------------------
+
+    # items of every group with a low from z0 less the group height up to z1
+    def _candidates(self, z0, z1, side):
+
+        found = []
+        for g in range(len(self._group_height)):
+            a, b = self._group_start[g], self._group_start[g + 1]
+            lows = self.sorted_low[a:b]
+
+            i = searchsorted(lows, z0 - self._group_height[g], side='left') # numpy
+            j = searchsorted(lows, z1, side=side) # numpy
+            found.append(self.order[a + i:a + j])
+
+        return concatenate(found) if found else zeros(0, dtype=intp)
+
+    # methods for builtin function access ---------------------------------------------
+
+    def __len__(self):
+        return len(self.low)
+
+    def __repr__(self):
+        return 'zindex of {} items in {} height groups'.format(len(self.low), len(self._group_height))
+    def __str__(self):
+        return self.__repr__()
@@ -53,7 +53,7 @@ file = 'elefante_small.gcode'
 elefante = read(file)
 
 # This figure colors the lines draw with a color that corresponds to a print time
-elefante.cbar_view() # rendering all the colors can a while
+elefante.cbar_view() # drawn as a single collection of colored segments
 
 # this view has a slider bar that allows one to select the print time
 elefante.slide_view('r')
@@ -0,0 +1,56 @@
+'''
+Shared meshes for the tests, as triangles wound counterclockwise seen from outside
+'''
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# running from a checkout without installing gcody
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# the 12 triangles of an axis aligned box from lo to hi
+def box_triangles(lo=(0, 0, 0), hi=(20, 20, 2)):
+
+    lo, hi = np.asarray(lo, dtype=float), np.asarray(hi, dtype=float)
+    corners = lo + np.array([[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)])*(hi - lo)
+    faces = np.array([(0, 1, 3), (0, 3, 2), (4, 6, 7), (4, 7, 5), (0, 4, 5), (0, 5, 1),
+                      (2, 3, 7), (2, 7, 6), (0, 2, 6), (0, 6, 4), (1, 5, 7), (1, 7, 3)])
+    tri = corners[faces]
+
+    # turning the faces to point away from the center
+    normal = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    inward = np.einsum('ij,ij->i', normal, tri.mean(axis=1) - (lo + hi)/2) < 0
+    tri[inward] = tri[inward][:, ::-1]
+
+    return tri
+
+
+# the triangles of a torus around the z axis through center
+def torus_triangles(nu=40, nv=24, R=30, r=10, center=(50, 50, 10)):
+
+    u = np.linspace(0, 2*np.pi, nu, endpoint=False)
+    v = np.linspace(0, 2*np.pi, nv, endpoint=False)
+    U, V = np.meshgrid(u, v, indexing='ij')
+    points = np.stack([(R + r*np.cos(V))*np.cos(U), (R + r*np.cos(V))*np.sin(U), r*np.sin(V)],
+                      axis=-1).reshape(-1, 3) + center
+
+    i, j = np.meshgrid(np.arange(nu), np.arange(nv), indexing='ij')
+    a, b = i*nv + j, (i + 1) % nu*nv + j
+    c, d = (i + 1) % nu*nv + (j + 1) % nv, i*nv + (j + 1) % nv
+    faces = np.concatenate((np.stack((a, b, c), -1).reshape(-1, 3),
+                            np.stack((a, c, d), -1).reshape(-1, 3)))
+
+    return points[faces]
+
+
+@pytest.fixture
+def box():
+    return box_triangles
+
+
+@pytest.fixture
+def torus():
+    return torus_triangles
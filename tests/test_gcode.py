@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import gcody
+
+
+PROGRAM = ['G90', 'M82', 'G1 X0 Y0 Z0.2 F600', 'G1 X10 E1', 'G1 X20 E3', 'G92 E0',
+           'G1 X30 E2', 'M83', 'G1 X40 E0.5', 'G1 X50 E-0.2']
+
+
+def test_extrusion_modes_and_resets():
+    g = gcody.read(PROGRAM)
+
+    np.testing.assert_allclose(g.filament_lengths(), [0, 1, 2, 2, 0.5, -0.2])
+    assert np.isclose(g.filament, 5.3)
+    assert g.extrude_mode == 'rel'
+
+
+def test_stats_are_running_totals():
+    g = gcody.read(PROGRAM)
+    stats = g.stats
+
+    assert stats['count'] == 6
+    np.testing.assert_allclose(stats['min'], [0, 0, 0.2])
+    np.testing.assert_allclose(stats['max'], [50, 0, 0.2])
+    np.testing.assert_allclose(stats['mean'], np.array(g.history).mean(axis=0))
+    assert np.isclose(stats['length'], 50.2)
+    # the first move and the retraction feed no filament
+    assert np.isclose(stats['travel'], 10.2)
+    assert stats['opcodes']['G1'] == 6
+
+    # the bounds follow new motion
+    g.move(-5, 0, 0.2)
+    assert g.stats['min'][0] == -5
+
+
+def test_volumetric_flow_and_material():
+    g = gcody.read(PROGRAM)
+    flow = g.volumetric_flow(diameter=1.75)
+
+    area = np.pi*1.75**2/4
+    # 10 mm at 600 mm/min takes one second
+    assert np.isclose(flow[1], area)
+    assert flow[0] == 0
+    assert np.isclose(g.material(printit=False)['length'], 5.3)
+
+
+def test_batch_move_matches_single_moves():
+    points = np.random.default_rng(0).uniform(0, 100, (200, 3))
+    one, batch = gcody.gcode(), gcody.gcode()
+    for g in (one, batch):
+        g.move(0, 0, 0, speed=600)
+    for p in points:
+        one.move(*p)
+    batch.move(points[:, 0], points[:, 1], points[:, 2])
+
+    assert one.code == batch.code
+    assert np.isclose(one.print_time, batch.print_time)
+
+
+def test_read_save_round_trip(tmp_path):
+    g = gcody.read(PROGRAM)
+    file = str(tmp_path / 'out.gcode')
+    g.save(file)
+    again = gcody.read(file)
+
+    np.testing.assert_allclose(np.array(again.history), np.array(g.history))
+    np.testing.assert_allclose(again.filament_lengths(), g.filament_lengths())
+    assert np.isclose(again.print_time, g.print_time)
+
+
+def test_unknown_input_type():
+    with pytest.raises(RuntimeError):
+        gcody.read(42)
@@ -0,0 +1,51 @@
+import gcody
+from gcody import gdiff
+
+
+def lines(points, speed=600):
+    out = ['G90', 'G1 X0 Y0 Z0.2 F{}'.format(speed)]
+    out += ['G1 X{} Y{} Z{}'.format(*p) for p in points]
+    return out
+
+
+def path(n=60):
+    return [(i, (i*7) % 13, 0.2) for i in range(1, n + 1)]
+
+
+def test_same_program():
+    d = gdiff(lines(path()), lines(path()))
+
+    assert d.same() and len(d) == 0
+    assert d.time_delta == 0 and d.distance_delta == 0
+
+
+def test_moved_block_is_found():
+    p = path()
+    # the block of 10 motions from 20 is printed last instead
+    q = p[:20] + p[30:] + p[20:30]
+    d = gdiff(lines(p), lines(q))
+
+    assert not d.same() and d.same(ordered=False)
+    assert [length for _, _, length in d.moved] == [10]
+    start_a, start_b, _ = d.moved[0]
+    # the moved motions in a start at the first motion of the block
+    assert gcody.read(lines(p)).history[start_a].tolist() == [20 + 1, (20 + 1)*7 % 13, 0.2]
+    assert not d.removed and not d.inserted
+
+
+def test_removed_and_inserted():
+    p = path()
+    q = p[:10] + p[15:40] + [(100, 100, 0.2), (101, 100, 0.2)] + p[40:]
+    d = gdiff(lines(p), lines(q))
+
+    assert [length for _, length in d.removed] == [5]
+    assert [length for _, length in d.inserted] == [2]
+    assert d.removed_distance > 0 and d.inserted_distance > 0
+    assert len(d) == 2
+
+
+def test_speed_changes_time_not_motion():
+    d = gdiff(lines(path(), 600), lines(path(), 1200), time_tol=1e-3)
+
+    assert d.time_delta < 0
+    assert d.distance_delta == 0
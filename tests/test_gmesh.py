@@ -0,0 +1,61 @@
+import numpy as np
+
+from gcody import gmesh, readmesh, writestl
+
+
+def test_from_triangles_merges_shared_corners(box):
+    mesh = gmesh.from_triangles(box())
+
+    assert len(mesh) == 12 and len(mesh.vertices) == 8
+    np.testing.assert_array_equal(mesh.triangles, np.asarray(box()))
+    lo, hi = mesh.bounds
+    np.testing.assert_array_equal(lo, [0, 0, 0])
+    np.testing.assert_array_equal(hi, [20, 20, 2])
+
+
+def test_tolerance_merges_close_corners(box):
+    triangles = np.asarray(box(), dtype=float)
+    noisy = triangles + np.random.default_rng(0).uniform(-1e-8, 1e-8, triangles.shape)
+
+    assert len(gmesh.from_triangles(noisy, tol=1e-6).vertices) == 8
+    assert len(gmesh.from_triangles(noisy, tol=0).vertices) > 8
+
+
+def test_edges_and_adjacency_of_a_closed_box(box):
+    mesh = gmesh.from_triangles(box())
+
+    # 12 box edges and 6 face diagonals, every one shared by two faces
+    assert len(mesh.edges) == 18
+    assert (mesh.edges[:, 0] < mesh.edges[:, 1]).all()
+    assert (mesh.edge_counts == 2).all()
+    assert len(mesh.adjacency) == 18
+
+    # every face edge is one of the edges, and neighbors share a vertex pair
+    for f, g in mesh.adjacency:
+        assert len(set(mesh.faces[f]) & set(mesh.faces[g])) == 2
+
+
+def test_normals_and_areas(box):
+    mesh = gmesh.from_triangles(box((0, 0, 0), (2, 3, 4)))
+
+    assert np.allclose(np.linalg.norm(mesh.normals, axis=1), 1)
+    assert np.isclose(mesh.areas.sum(), 2*(6 + 8 + 12))
+    # the two triangles of the top face point up
+    top = np.flatnonzero((mesh.triangles[:, :, 2] == 4).all(axis=1))
+    np.testing.assert_allclose(mesh.normals[top], [[0, 0, 1]]*2)
+
+
+def test_degenerate_faces_have_zero_normals():
+    mesh = gmesh([[0, 0, 0], [1, 0, 0], [2, 0, 0], [0, 1, 0]], [[0, 1, 2], [0, 1, 3]])
+
+    np.testing.assert_array_equal(mesh.normals[0], [0, 0, 0])
+    assert mesh.areas[0] == 0 and np.isclose(mesh.areas[1], 0.5)
+
+
+def test_readmesh(tmp_path, torus):
+    file = str(tmp_path / 'torus.stl')
+    writestl(file, torus())
+    mesh = readmesh(file)
+
+    assert len(mesh) == 2*40*24 and len(mesh.vertices) == 40*24
+    assert mesh.stats()['watertight']
@@ -0,0 +1,40 @@
+import gcody
+from gcody.gline import gline
+
+
+def program(g):
+    g.abs_move()
+    g.move(0, 0, 0, speed=600)
+    for i in range(10):
+        g.move(i, i, 0.2, extrude=0.1)
+    return g
+
+
+def test_without_a_profile_nothing_is_wrapped():
+    g = program(gcody.gcode())
+
+    assert g.profile is None
+    assert g._gline is gline
+    assert g.move.__func__ is gcody.gcode.move
+
+
+def test_profile_times_the_stages(tmp_path):
+    with gcody.gprofile() as prof:
+        g = program(gcody.gcode())
+    g.save(str(tmp_path / 'out.gcode'))
+    report = prof.to_dict()
+
+    assert g.profile is prof
+    assert report['calls']['_gline'] == len(g)
+    assert report['calls']['_pos_update'] == 11
+    assert report['calls']['save'] == 1
+    assert report['opcodes']['G1'] == 11
+    assert all(seconds >= 0 for seconds in report['timers'].values())
+
+
+def test_profiled_and_plain_output_match(tmp_path):
+    plain, timed = tmp_path / 'plain.gcode', tmp_path / 'timed.gcode'
+    program(gcody.gcode()).save(str(plain))
+    program(gcody.gcode(profile=True)).save(str(timed))
+
+    assert plain.read_bytes() == timed.read_bytes()
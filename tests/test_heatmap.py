@@ -0,0 +1,24 @@
+import numpy as np
+
+from gcody.heatmap import density, heat_image
+
+
+def test_density_keeps_the_total_weight():
+    points = np.array([[0, 0, 0], [10, 0, 0], [10, 10, 0], [10, 10, 0]], dtype=float)
+    grid, edges = density(points, [0, 1, 3, 6], bins=np.int64(8))
+
+    assert grid.shape == (8, 8)
+    assert len(edges) == 2 and len(edges[0]) == 9
+    assert np.isclose(grid.sum(), 6)
+    # the dwell at the last point stays in its corner
+    assert grid[-1, -1] >= 3
+
+
+def test_heat_image_puts_low_y_at_the_bottom():
+    grid = np.zeros((4, 3))
+    grid[0, 0] = 1
+    image = heat_image(grid, log=False)
+
+    assert image.shape == (3, 4, 3) and image.dtype == np.uint8
+    # the low x low y cell is the bottom left pixel and the brightest
+    assert image[-1, 0].sum() == image.reshape(-1, 3).sum(axis=1).max()
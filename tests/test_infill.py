@@ -0,0 +1,52 @@
+import numpy as np
+
+import gcody
+from gcody.infill import rectilinear
+
+
+def square(lo, hi):
+    return np.array([[lo, lo], [hi, lo], [hi, hi], [lo, hi]], dtype=float)
+
+
+def test_square_is_filled_by_scanlines():
+    lines, layer = rectilinear([square(0, 10)], spacing=1, angle=0)
+
+    assert len(lines) == 10 and (layer == 0).all()
+    np.testing.assert_allclose(lines[:, 0, 1], np.arange(10) + 0.5)
+    assert np.allclose(np.abs(lines[:, 1, 0] - lines[:, 0, 0]), 10)
+    # serpentine, every other line runs backward
+    assert (np.sign(lines[:, 1, 0] - lines[:, 0, 0]) == np.tile([1, -1], 5)).all()
+
+
+def test_hole_is_left_empty_whichever_way_it_runs():
+    for hole in (square(3, 7), square(3, 7)[::-1]):
+        lines, _ = rectilinear([square(0, 10), hole], spacing=1, angle=0)
+
+        length = np.abs(lines[:, 1, 0] - lines[:, 0, 0]).sum()
+        assert np.isclose(length, 10*10 - 4*4)
+        middle = (lines[:, :, 0].mean(axis=1) > 3) & (lines[:, :, 0].mean(axis=1) < 7)
+        assert not (middle & (lines[:, 0, 1] > 3) & (lines[:, 0, 1] < 7)).any()
+
+
+def test_layers_alternate_direction():
+    points = np.concatenate((square(0, 10), square(0, 10)))
+    lines, layer = rectilinear(points, start=[0, 4, 8], layer=[0, 1], spacing=1, angle=0)
+
+    first, second = lines[layer == 0], lines[layer == 1]
+    assert np.allclose(first[:, 0, 1], first[:, 1, 1])
+    assert np.allclose(second[:, 0, 0], second[:, 1, 0])
+
+
+def test_gcode_infill_travels_without_filament():
+    g = gcody.gcode()
+    g.abs_move()
+    g.move(0, 0, 0.2, speed=120)
+    n = g.infill([square(0, 10)], spacing=1, angle=0, speed=30, travel_speed=120)
+
+    fed = g.filament_lengths()[1:]
+    assert n == 10 and len(fed) == 20
+    assert (fed[0::2] == 0).all() and (fed[1::2] > 0).all()
+
+    # travel is the length of the moves between lines, printing is the rest
+    stats = g.stats
+    assert np.isclose(stats['length'] - stats['travel'], 100)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import gcody
+from gcody.lod import decimate
+
+
+def layered(n, per_layer=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    i = np.arange(n)
+    return np.column_stack((rng.uniform(0, 100, n), rng.uniform(0, 100, n), 0.2*(i // per_layer)))
+
+
+@pytest.mark.parametrize('n, budget', [(10, 100), (5000, 1000), (200000, 5000), (1000000, 20000)])
+def test_budget_and_ends(n, budget):
+    points = layered(n)
+    keep = decimate(points, budget)
+
+    assert len(keep) <= budget
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert (np.diff(keep) > 0).all()
+
+
+def test_short_path_is_unchanged():
+    np.testing.assert_array_equal(decimate(layered(50), 100), np.arange(50))
+
+
+def test_layer_boundaries_are_kept():
+    points = layered(20000, per_layer=2000)
+    keep = decimate(points, 2000)
+
+    boundary = np.flatnonzero(np.diff(points[:, 2]))
+    assert np.isin(boundary, keep).all() and np.isin(boundary + 1, keep).all()
+
+
+def test_straight_runs_are_dropped_and_corners_kept():
+    # a square traced with many points on every side
+    t = np.linspace(0, 1, 1001)[:-1]
+    side = [np.column_stack((t, 0*t)), np.column_stack((1 + 0*t, t)),
+            np.column_stack((1 - t, 1 + 0*t)), np.column_stack((0*t, 1 - t))]
+    points = np.column_stack((np.concatenate(side), np.zeros(4000)))
+    keep = decimate(points, 100)
+
+    for corner in (1000, 2000, 3000):
+        assert corner in keep
+    # every dropped point lies on the kept polyline
+    kept = points[keep]
+    assert len(keep) <= 100
+    assert np.allclose(np.interp(np.arange(4000), keep, kept[:, 0]), points[:, 0])
+
+
+def test_keep_is_honored():
+    points = layered(50000)
+    keep = decimate(points, 1000, keep=[123, 45678])
+
+    assert 123 in keep and 45678 in keep
+
+
+def test_gcode_lod_uses_the_budget():
+    g = gcody.gcode()
+    g.move(0, 0, 0, speed=600)
+    g.move(layered(5000)[:, 0], layered(5000)[:, 1], layered(5000)[:, 2])
+
+    history, t = g.lod(500)
+    assert len(history) == len(t) <= 500
+    assert np.all(np.diff(t) >= 0)
+    assert g.lod(500)[0] is history
+    assert g.lod(500, cached=False)[0] is not history
+    assert len(g.lod(False)[0]) == len(g.history)
@@ -0,0 +1,60 @@
+import numpy as np
+
+from gcody import meshstats, gmesh, writestl
+
+
+def test_closed_box(box):
+    stats = meshstats(np.asarray(box((0, 0, 0), (2, 3, 4))))
+
+    assert stats['count'] == 12
+    assert np.isclose(stats['volume'], 24)
+    assert np.isclose(stats['area'], 2*(6 + 8 + 12))
+    np.testing.assert_array_equal(stats['min'], [0, 0, 0])
+    np.testing.assert_array_equal(stats['max'], [2, 3, 4])
+    assert stats['edges'] == 18 and stats['boundary'] == 0
+    assert stats['watertight'] and stats['manifold'] and stats['oriented']
+
+
+def test_torus_volume(torus):
+    stats = meshstats(np.asarray(torus(nu=80, nv=48)))
+
+    # the faceted torus is a little smaller than 2 pi^2 R r^2
+    assert 0.97 < stats['volume'] / (2*np.pi**2*30*10**2) < 1
+    assert stats['watertight'] and stats['oriented']
+
+
+def test_open_and_flipped_meshes(box):
+    triangles = np.asarray(box())
+
+    # a missing face leaves a hole but every edge still has at most two faces
+    open_box = meshstats(triangles[1:])
+    assert open_box['boundary'] == 3
+    assert not open_box['watertight'] and open_box['manifold']
+
+    # a face turned the other way runs its edges the same way as its neighbors
+    flipped = triangles.copy()
+    flipped[0] = flipped[0][::-1]
+    stats = meshstats(flipped)
+    assert stats['watertight'] and not stats['oriented']
+    assert stats['flipped'] == 3
+
+    # an extra face on an edge makes it nonmanifold
+    extra = meshstats(np.concatenate((triangles, triangles[:1])))
+    assert not extra['manifold'] and not extra['watertight']
+
+
+def test_inputs_agree(tmp_path, box):
+    triangles = np.asarray(box())
+    file = str(tmp_path / 'box.stl')
+    writestl(file, triangles)
+
+    volumes = [meshstats(m)['volume'] for m in (triangles, gmesh.from_triangles(triangles), file)]
+    assert np.allclose(volumes, 800)
+    assert gmesh.from_triangles(triangles).stats()['watertight']
+
+
+def test_empty_mesh_gives_no_verdict():
+    stats = meshstats(np.zeros((0, 3, 3)))
+
+    assert stats['count'] == 0
+    assert stats['watertight'] is None and stats['manifold'] is None and stats['oriented'] is None
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from gcody import movie
+
+Image = pytest.importorskip('PIL.Image')
+GifImagePlugin = pytest.importorskip('PIL.GifImagePlugin')
+pytest.importorskip('matplotlib')
+
+
+def helix(n=200):
+    t = np.linspace(0, 4*np.pi, n)
+    return np.column_stack((np.cos(t), np.sin(t), t/10))
+
+
+def read_frames(file):
+    image = Image.open(file)
+    frames = []
+    for i in range(image.n_frames):
+        image.seek(i)
+        frames.append((np.asarray(image.convert('RGB')), image.info.get('duration')))
+    return image.info.get('loop'), frames
+
+
+@pytest.mark.parametrize('streamed', [True, False])
+def test_gif_has_every_frame_in_order(tmp_path, monkeypatch, streamed):
+    # the save_all fallback for Pillow without getheader and getdata
+    if not streamed:
+        monkeypatch.delattr(GifImagePlugin, 'getdata')
+
+    file = str(tmp_path / 'path.gif')
+    end = np.linspace(0, 200, 6).astype(int)
+    movie.export_animation(helix(), end, file, fps=5, size=(160, 120), processes=1,
+                           ax_lim=[-1, 1, -1, 1, 0, 1.3])
+
+    loop, frames = read_frames(file)
+    assert loop == 0
+    assert len(frames) == 6
+    assert all(frame.shape == (120, 160, 3) for frame, _ in frames)
+    assert [duration for _, duration in frames] == [200]*6
+
+    # more of the path is drawn in every frame, so no frame repeats the one before
+    for (a, _), (b, _) in zip(frames[:-1], frames[1:]):
+        assert (a != b).any()
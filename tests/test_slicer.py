@@ -0,0 +1,57 @@
+import numpy as np
+
+from gcody import gmesh, slice_mesh
+
+
+def test_box_contours_are_rectangles(box):
+    s = slice_mesh(gmesh.from_triangles(box((0, 0, 0), (20, 20, 2))), layer_height=0.5)
+
+    assert len(s) == 4
+    for k in range(len(s)):
+        contour, = s[k]
+        assert sorted(map(tuple, contour)) == [(0, 0), (0, 20), (20, 0), (20, 20)]
+
+
+def test_box_inset_is_a_simple_rectangle(box):
+    s = slice_mesh(gmesh.from_triangles(box((0, 0, 0), (20, 20, 2))), layer_height=0.5)
+    moved, valid = s.inset(0.6)
+
+    assert valid.all()
+    for a, b in zip(s.start[:-1], s.start[1:]):
+        loop = moved[a:b]
+        assert len(loop) == 4
+        np.testing.assert_allclose(np.sort(np.unique(loop[:, 0])), [0.6, 19.4])
+        np.testing.assert_allclose(np.sort(np.unique(loop[:, 1])), [0.6, 19.4])
+
+
+def test_perimeters_never_run_back(box):
+    g = slice_mesh(gmesh.from_triangles(box((0, 0, 0), (20, 20, 2))), layer_height=0.5).gcode(perimeters=3)
+
+    # no move goes straight back along the one before it
+    path = np.array(g.history).reshape(-1, 3)[:, :2]
+    step = np.diff(path, axis=0)
+    step = step[np.abs(step).sum(axis=1) > 0]
+    a, b = step[:-1], step[1:]
+    cross = a[:, 0]*b[:, 1] - a[:, 1]*b[:, 0]
+    dot = (a*b).sum(axis=1)
+    assert not ((np.abs(cross) < 1e-9) & (dot < 0)).any()
+
+
+def test_torus_contours_are_oriented(torus):
+    s = slice_mesh(torus(), layer_height=1)
+
+    # every layer through the hole has an outer contour and a hole
+    areas = s.areas
+    for k in range(len(s)):
+        layer = areas[s.layer == k]
+        assert (layer > 0).sum() == 1 and (layer < 0).sum() == 1
+        assert layer.max() > -layer.min()
+
+
+def test_parallel_slicing_matches_serial(torus):
+    mesh = gmesh.from_triangles(torus())
+    serial = slice_mesh(mesh, layer_height=0.5)
+    parallel = slice_mesh(mesh, layer_height=0.5, processes=2)
+
+    for name in ['points', 'start', 'layer', 'closed']:
+        np.testing.assert_array_equal(getattr(serial, name), getattr(parallel, name))
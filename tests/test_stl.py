@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from gcody import readstl, writestl, stlmap, gmesh
+
+
+def write_ascii(file, vectors, normals, upper=False):
+    lines = ['solid part']
+    for corners, normal in zip(vectors, normals):
+        lines.append('  facet normal {:e} {:e} {:e}'.format(*normal))
+        lines.append('    outer loop')
+        lines += ['      vertex {:.9g} {:.9g} {:.9g}'.format(*corner) for corner in corners]
+        lines += ['    endloop', '  endfacet']
+    lines.append('endsolid part')
+    text = '\n'.join(lines) + '\n'
+    with open(file, 'w') as f:
+        f.write(text.upper() if upper else text)
+
+
+@pytest.fixture
+def triangles(box):
+    return np.asarray(box(), dtype=np.float32)
+
+
+def test_binary_round_trip(tmp_path, triangles):
+    file = str(tmp_path / 'box.stl')
+    assert writestl(file, triangles) == 12
+
+    vectors, normals, attr = readstl(file, xyz=False)
+    np.testing.assert_array_equal(vectors, triangles)
+    assert np.allclose(np.linalg.norm(normals, axis=1), 1)
+    # outward normals of a box centered at (10,10,1)
+    assert ((normals*(vectors.mean(axis=1) - [10, 10, 1])).sum(axis=1) > 0).all()
+
+    x, y, z = readstl(file)
+    np.testing.assert_array_equal(np.column_stack((x, y, z)), triangles.reshape(-1, 3))
+
+
+@pytest.mark.parametrize('upper', [False, True])
+def test_ascii_matches_binary(tmp_path, triangles, upper):
+    binary, ascii = str(tmp_path / 'box.stl'), str(tmp_path / 'box_ascii.stl')
+    writestl(binary, triangles)
+    _, normals, _ = readstl(binary, xyz=False)
+    write_ascii(ascii, triangles, normals, upper)
+
+    for a, b in zip(readstl(ascii, xyz=False), readstl(binary, xyz=False)):
+        np.testing.assert_allclose(a, b, rtol=1e-6)
+    assert np.count_nonzero(readstl(ascii, xyz=False, normals=False)[1]) == 0
+
+
+def test_binary_header_starting_with_solid(tmp_path, triangles):
+    file = str(tmp_path / 'solid.stl')
+    writestl(file, triangles, header='solid but binary')
+
+    np.testing.assert_array_equal(readstl(file, xyz=False)[0], triangles)
+
+
+def test_malformed_ascii_raises(tmp_path, triangles):
+    file = str(tmp_path / 'bad.stl')
+    write_ascii(file, triangles, np.zeros((12, 3)))
+    with open(file) as f:
+        text = f.read()
+    with open(file, 'w') as f:
+        f.write(text.replace('vertex 0 0 0', 'vertex 0 zero 0', 1))
+
+    with pytest.raises(ValueError):
+        readstl(file)
+
+
+def test_stlmap_views_and_chunks(tmp_path, triangles):
+    file = str(tmp_path / 'box.stl')
+    writestl(file, gmesh.from_triangles(triangles))
+    mapped = stlmap(file, chunk=5)
+
+    assert len(mapped) == 12 and len(mapped[3:7]) == 4
+    np.testing.assert_array_equal(mapped[3:7].vectors, readstl(file, xyz=False)[0][3:7])
+    assert [i for i, _ in mapped.chunks()] == [0, 5, 10]
+    lo, hi = mapped.bounds()
+    np.testing.assert_array_equal(lo, [0, 0, 0])
+    np.testing.assert_array_equal(hi, [20, 20, 2])
+    np.testing.assert_array_equal(readstl(file, mmap=True).vectors, mapped.vectors)
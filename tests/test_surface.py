@@ -0,0 +1,50 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from gcody.surface import surface
+
+
+def lattice(nx=5, ny=4):
+    x, y = np.meshgrid(np.arange(nx, dtype=float), np.arange(ny, dtype=float), indexing='ij')
+    return np.column_stack((x.ravel(), y.ravel(), 0.1*x.ravel()*y.ravel()))
+
+
+def test_lattice_gives_two_triangles_a_cell_facing_up():
+    mesh = surface(lattice())
+
+    assert len(mesh.vertices) == 20 and len(mesh.faces) == 2*4*3
+    v = mesh.vertices[mesh.faces]
+    normal = np.cross(v[:, 1] - v[:, 0], v[:, 2] - v[:, 0])
+    assert (normal[:, 2] > 0).all()
+
+
+def test_repeated_points_are_reduced():
+    points = np.concatenate((lattice(), lattice() + [0, 0, 1]))
+
+    for reduce, shift in [('max', 1), ('mean', 0.5), ('min', 0)]:
+        mesh = surface(points, reduce=reduce)
+        assert len(mesh.vertices) == 20
+        assert np.allclose(mesh.vertices[:, 2], 0.1*mesh.vertices[:, 0]*mesh.vertices[:, 1] + shift)
+
+
+def test_grid_resamples_to_cell_centers():
+    rng = np.random.default_rng(0)
+    points = np.column_stack((rng.uniform(0, 10, (5000, 2)), np.zeros(5000)))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        mesh = surface(points, grid=np.int64(10))
+
+    assert len(mesh.vertices) == 100 and len(mesh.faces) == 2*9*9
+    assert np.allclose(np.unique(mesh.vertices[:, 0]), np.arange(10) + 0.5, atol=0.01)
+
+
+def test_grid_with_no_neighboring_cells_raises():
+    points = np.array([[0, 0, 0], [10, 10, 1], [0, 10, 2], [10, 0, 3], [5, 5, 4]], dtype=float)
+
+    with pytest.raises(ValueError):
+        surface(points, grid=10)
+
+    with pytest.warns(UserWarning):
+        surface(np.concatenate((points, [[0, 1, 0], [1, 0, 0], [1, 1, 0]])), grid=10)
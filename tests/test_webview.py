@@ -0,0 +1,61 @@
+import base64
+import json
+import os
+import re
+
+import numpy as np
+
+import gcody
+from gcody.webview import export_html
+
+
+def embedded(file):
+    with open(file, encoding='utf-8') as f:
+        page = f.read()
+    fields = dict(re.findall(r'<script id="(\w+)" type="[^"]+">(.*?)</script>', page, re.S))
+    return page, json.loads(fields['header']), fields
+
+
+def layered(layers=5, per=40, height=0.2):
+    t = np.linspace(0, 2*np.pi, per, endpoint=False)
+    return np.concatenate([np.column_stack((10*np.cos(t), 10*np.sin(t), np.full(per, (k + 1)*height)))
+                           for k in range(layers)])
+
+
+def test_heights_are_the_layers(tmp_path):
+    file = str(tmp_path / 'path.html')
+    points = layered()
+    size = export_html(points, np.arange(len(points), dtype=float), file)
+
+    page, header, fields = embedded(file)
+    assert size == os.path.getsize(file)
+    assert header['n'] == len(points)
+    assert np.allclose(header['heights'], [0.2, 0.4, 0.6, 0.8, 1.0], atol=1e-4)
+
+    # the positions decode back to the path
+    data = np.frombuffer(base64.b64decode(fields['positions']), dtype='<i2').reshape(-1, 3)
+    decoded = np.array(header['offset']) + data*np.array(header['scale'])
+    assert np.abs(decoded - points).max() <= (points.max(0) - points.min(0)).max()/65535
+
+
+def test_vase_heights_are_thinned(tmp_path):
+    t = np.linspace(0, 200*np.pi, 100000)
+    points = np.column_stack((np.cos(t), np.sin(t), t/100))
+    export_html(points, t, str(tmp_path / 'vase.html'), layers=50)
+
+    heights = embedded(str(tmp_path / 'vase.html'))[1]['heights']
+    assert len(heights) == 50
+    assert np.all(np.diff(heights) > 0)
+    assert np.isclose(heights[0], 0, atol=1e-3) and np.isclose(heights[-1], 2*np.pi, atol=1e-3)
+
+
+def test_title_is_escaped_and_size_is_in_bytes(tmp_path):
+    g = gcody.gcode()
+    g.move(0, 0, 0.2, speed=600)
+    g.move(10, 0, 0.2)
+    file = str(tmp_path / 'g.html')
+    size = g.export_html(file, title='<b>é</b> __HEADER__')
+
+    page = embedded(file)[0]
+    assert size == os.path.getsize(file)
+    assert '<title>&lt;b&gt;é&lt;/b&gt; __HEADER__</title>' in page
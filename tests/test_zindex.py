@@ -0,0 +1,49 @@
+import numpy as np
+
+from gcody import zindex, gmesh
+
+
+def items(m=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    low = rng.uniform(0, 100, m)
+    # heights over several powers of two, some flat
+    height = np.where(rng.random(m) < 0.05, 0, rng.exponential(2, m)**2)
+    return low, low + height
+
+
+def test_plane_matches_brute_force():
+    low, high = items()
+    index = zindex(low, high)
+
+    for z in np.concatenate((np.linspace(-1, 101, 40), low[:20], high[:20])):
+        np.testing.assert_array_equal(index.plane(z), np.flatnonzero((low < z) & (z <= high)))
+
+
+def test_range_matches_brute_force():
+    low, high = items()
+    index = zindex(low, high)
+
+    for z0 in np.linspace(-5, 105, 23):
+        z1 = z0 + 3.3
+        np.testing.assert_array_equal(index.range(z0, z1), np.flatnonzero((low <= z1) & (high >= z0)))
+
+
+def test_planes_are_the_planes_one_at_a_time():
+    low, high = items()
+    index = zindex(low, high)
+    heights = np.arange(0.1, 100, 0.7)
+
+    found, start = index.planes(heights)
+    assert len(start) == len(heights) + 1
+    for k, z in enumerate(heights):
+        np.testing.assert_array_equal(np.sort(found[start[k]:start[k + 1]]), index.plane(z))
+
+
+def test_mesh_index_finds_the_faces_crossing_a_plane(box):
+    mesh = gmesh.from_triangles(box((0, 0, 0), (20, 20, 2)))
+
+    # the four sides, two triangles each, cross the middle of the box
+    faces = mesh.zindex.plane(1.0)
+    assert len(faces) == 8
+    z = mesh.triangles[faces][:, :, 2]
+    assert ((z.min(axis=1) < 1) & (z.max(axis=1) >= 1)).all()